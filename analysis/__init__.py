@@ -0,0 +1,2 @@
+# This file can be empty
+# END OF FILE analysis/__init__.py
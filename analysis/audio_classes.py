@@ -0,0 +1,121 @@
+# START OF FILE analysis/audio_classes.py
+import numpy as np
+from analysis.features import ANALYSIS_BLOCK_SECONDS
+
+# --- Region Classes ---
+CLASS_SILENCE = 0
+CLASS_SPEECH = 1
+CLASS_MUSIC = 2
+CLASS_NAMES = {CLASS_SILENCE: 'silence', CLASS_SPEECH: 'speech', CLASS_MUSIC: 'music'}
+
+# --- Classifier Parameters ---
+CLASS_SUBFRAME_SECONDS = 0.02 # Short frames the statistics are computed from
+CLASS_WINDOW_SECONDS = 1.0 # Each window of this length gets one label
+CLASS_SILENCE_DB = -40.0 # Window level below the loud level that counts as silence
+CLASS_LOW_ENERGY_RATIO = 0.5 # A subframe is "low energy" below this fraction of its window's mean RMS
+CLASS_SPEECH_LER = 0.25 # Speech has many low-energy gaps between syllables, music has few
+CLASS_SPEECH_ZCR_CV = 0.6 # Voiced/unvoiced alternation makes the zero-crossing rate jump around
+CLASS_SMOOTHING_WINDOWS = 5 # Majority vote over this many neighbouring windows
+CLASS_MIN_REGION_SECONDS = 3.0 # Shorter regions are absorbed by their neighbours
+
+
+def _subframe_stats(samples, sample_rate, block_seconds=ANALYSIS_BLOCK_SECONDS):
+    '''Per-subframe RMS (linear) and zero-crossing rate, computed block by block.'''
+    hop = max(1, int(round(CLASS_SUBFRAME_SECONDS * sample_rate)))
+    n_frames = len(samples) // hop
+    rms = np.empty(n_frames, dtype=np.float32)
+    zcr = np.empty(n_frames, dtype=np.float32)
+    frames_per_block = max(1, int(block_seconds * sample_rate) // hop)
+    for f0 in range(0, n_frames, frames_per_block):
+        f1 = min(n_frames, f0 + frames_per_block)
+        block = np.asarray(samples[f0 * hop:f1 * hop], dtype=np.float32).reshape(f1 - f0, hop)
+        rms[f0:f1] = np.sqrt(np.mean(block * block, axis=1))
+        signs = np.signbit(block)
+        zcr[f0:f1] = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / hop
+    return rms, zcr, hop / sample_rate
+
+
+def _majority_filter(labels, width, n_classes):
+    '''Most frequent label within a centered window, vectorized via per-class running counts.'''
+    half = width // 2
+    one_hot = (labels[:, None] == np.arange(n_classes)[None, :]).astype(np.int32)
+    csum = np.concatenate((np.zeros((1, n_classes), dtype=np.int32), np.cumsum(one_hot, axis=0)))
+    idx = np.arange(len(labels))
+    lo, hi = np.maximum(0, idx - half), np.minimum(len(labels), idx + half + 1)
+    return np.argmax(csum[hi] - csum[lo], axis=1)
+
+
+def classify_audio(samples, sample_rate):
+    '''Labels audio as speech, music or silence and merges the labels into regions.
+
+    Returns a dict with 'starts', 'ends' (seconds) and 'labels' (CLASS_* ints)
+    of consecutive regions covering the whole file.
+    '''
+    duration = len(samples) / sample_rate if sample_rate else 0.0
+    rms, zcr, subframe_seconds = _subframe_stats(samples, sample_rate)
+    per_window = max(1, int(round(CLASS_WINDOW_SECONDS / subframe_seconds)))
+    window_seconds = per_window * subframe_seconds
+    n_windows = len(rms) // per_window
+    if n_windows == 0:
+        return {'starts': np.array([0.0]), 'ends': np.array([duration]), 'labels': np.array([CLASS_SILENCE])}
+
+    rms = rms[:n_windows * per_window].reshape(n_windows, per_window)
+    zcr = zcr[:n_windows * per_window].reshape(n_windows, per_window)
+    mean_rms = rms.mean(axis=1)
+    level_db = 20.0 * np.log10(mean_rms + 1e-10)
+    low_energy_ratio = np.mean(rms < CLASS_LOW_ENERGY_RATIO * mean_rms[:, None], axis=1)
+    zcr_cv = zcr.std(axis=1) / (zcr.mean(axis=1) + 1e-6)
+
+    speech_like = (low_energy_ratio >= CLASS_SPEECH_LER) | (zcr_cv >= CLASS_SPEECH_ZCR_CV)
+    labels = np.where(speech_like, CLASS_SPEECH, CLASS_MUSIC)
+    labels[level_db < np.percentile(level_db, 95) + CLASS_SILENCE_DB] = CLASS_SILENCE
+    labels = _majority_filter(labels, CLASS_SMOOTHING_WINDOWS, len(CLASS_NAMES))
+
+    # Merge runs, then fold the shortest region into its longer neighbour until all are long enough
+    min_windows = max(1, int(round(CLASS_MIN_REGION_SECONDS / window_seconds)))
+    while True:
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(labels)) + 1))
+        lengths = np.diff(np.append(starts, n_windows))
+        shortest = int(np.argmin(lengths))
+        if lengths[shortest] >= min_windows or len(starts) == 1: break
+        left = lengths[shortest - 1] if shortest > 0 else -1
+        right = lengths[shortest + 1] if shortest + 1 < len(starts) else -1
+        neighbour = starts[shortest - 1] if left >= right else starts[shortest + 1]
+        labels[starts[shortest]:starts[shortest] + lengths[shortest]] = labels[neighbour]
+
+    starts_seconds = starts * window_seconds
+    return {'starts': starts_seconds, 'ends': np.append(starts_seconds[1:], duration), 'labels': labels[starts]}
+
+
+class AudioRegions:
+    '''Sorted, non-overlapping labelled intervals with time lookups.'''
+
+    def __init__(self, starts, ends, labels):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+
+    @classmethod
+    def from_dict(cls, regions):
+        return cls(regions['starts'], regions['ends'], regions['labels'])
+
+    def __len__(self): return len(self.starts)
+
+    def labels_at(self, times):
+        '''Label for each time (vectorized); -1 outside all regions.'''
+        times = np.asarray(times, dtype=np.float64)
+        if len(self.starts) == 0: return np.full(times.shape, -1, dtype=np.int64)
+        idx = np.searchsorted(self.starts, times, side='right') - 1
+        safe = np.maximum(idx, 0)
+        return np.where((idx >= 0) & (times < self.ends[safe]), self.labels[safe], -1)
+
+    def label_at(self, time_seconds):
+        '''Label of the region containing time_seconds, or -1.'''
+        return int(self.labels_at(np.array([time_seconds]))[0])
+
+    def total_seconds(self, label):
+        '''Total duration covered by one label.'''
+        mask = self.labels == label
+        return float(np.sum(self.ends[mask] - self.starts[mask]))
+
+# END OF FILE analysis/audio_classes.py
@@ -0,0 +1,138 @@
+# START OF FILE analysis/features.py
+import numpy as np
+
+# --- Feature Types (used as snap index tags) ---
+FEATURE_PAUSE = 'pause' # End of a pause, i.e. where speech resumes
+FEATURE_ONSET = 'onset'
+FEATURE_BEAT = 'beat'
+FEATURE_HIT = 'hit' # Unusually strong onsets (cue hits / accents)
+
+# --- Pause Detection Parameters ---
+PAUSE_HOP_SECONDS = 0.010
+PAUSE_MIN_SECONDS = 0.25
+PAUSE_THRESHOLD_DB = -30.0 # Relative to the loud (95th percentile) level
+ANALYSIS_BLOCK_SECONDS = 30.0 # Audio processed per vectorized step
+ONSET_HOP_LENGTH = 512
+HIT_STD_FACTOR = 2.0
+
+# --- Cepstral Feature Parameters ---
+CEPSTRAL_FFT_SIZE = 512 # ~23 ms at 22050 Hz
+CEPSTRAL_N_MELS = 24
+CEPSTRAL_N_COEFFS = 13
+
+
+def frame_rms_db(samples, sample_rate, hop_seconds=PAUSE_HOP_SECONDS, block_seconds=ANALYSIS_BLOCK_SECONDS):
+    '''Non-overlapping frame RMS in dB, computed block by block to bound memory.'''
+    hop = max(1, int(round(hop_seconds * sample_rate)))
+    n_frames = len(samples) // hop
+    out = np.empty(n_frames, dtype=np.float32)
+    frames_per_block = max(1, int(block_seconds * sample_rate) // hop)
+    for f0 in range(0, n_frames, frames_per_block):
+        f1 = min(n_frames, f0 + frames_per_block)
+        block = np.asarray(samples[f0 * hop:f1 * hop], dtype=np.float32).reshape(f1 - f0, hop)
+        out[f0:f1] = np.sqrt(np.mean(block * block, axis=1))
+    return 20.0 * np.log10(out + 1e-10), hop / sample_rate
+
+
+def _mel_filterbank(sample_rate, n_fft, n_mels, f_min=80.0, f_max=None):
+    '''Triangular mel filter weights, shape (n_mels, n_fft // 2 + 1).'''
+    f_max = min(f_max or sample_rate / 2.0, sample_rate / 2.0)
+    to_mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    from_mel = lambda m: 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+    edges_hz = from_mel(np.linspace(to_mel(f_min), to_mel(f_max), n_mels + 2))
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges_hz[:-2, None], edges_hz[1:-1, None], edges_hz[2:, None]
+    rising = (freqs[None, :] - lower) / np.maximum(center - lower, 1e-6)
+    falling = (upper - freqs[None, :]) / np.maximum(upper - center, 1e-6)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def cepstral_features(samples, sample_rate, hop_seconds=0.02, n_mels=CEPSTRAL_N_MELS,
+                      n_coeffs=CEPSTRAL_N_COEFFS, block_seconds=ANALYSIS_BLOCK_SECONDS):
+    '''MFCC-style features computed block by block with vectorized framing.
+
+    Returns:
+        (ceps, log_energy, frame_seconds): ceps has shape (n_frames, n_coeffs)
+        with the energy coefficient c0 in column 0.
+    '''
+    hop = max(1, int(round(hop_seconds * sample_rate)))
+    n_fft = CEPSTRAL_FFT_SIZE
+    n_frames = max(0, 1 + (len(samples) - n_fft) // hop) if len(samples) >= n_fft else 0
+    ceps = np.empty((n_frames, n_coeffs), dtype=np.float32)
+    log_energy = np.empty(n_frames, dtype=np.float32)
+    if n_frames == 0: return ceps, log_energy, hop / sample_rate
+
+    window = np.hanning(n_fft).astype(np.float32)
+    mel_weights = _mel_filterbank(sample_rate, n_fft, n_mels)
+    k = np.arange(n_mels)
+    dct = np.cos(np.pi / n_mels * (k[None, :] + 0.5) * np.arange(n_coeffs)[:, None]).astype(np.float32)
+
+    frames_per_block = max(1, int(block_seconds * sample_rate) // hop)
+    for f0 in range(0, n_frames, frames_per_block):
+        f1 = min(n_frames, f0 + frames_per_block)
+        segment = np.asarray(samples[f0 * hop:(f1 - 1) * hop + n_fft], dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(segment, n_fft)[::hop][:f1 - f0]
+        power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+        log_mel = np.log(power @ mel_weights.T + 1e-10)
+        ceps[f0:f1] = log_mel @ dct.T
+        log_energy[f0:f1] = np.log(power.sum(axis=1) + 1e-10)
+    return ceps, log_energy, hop / sample_rate
+
+
+def local_peaks(values, min_distance, threshold):
+    '''Indices of values that are the maximum within +/- min_distance and above threshold.'''
+    if len(values) == 0: return np.zeros(0, dtype=np.int64)
+    padded = np.pad(values, min_distance, mode='constant', constant_values=-np.inf)
+    window_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * min_distance + 1).max(axis=1)
+    peaks = np.flatnonzero((values >= window_max) & (values > threshold))
+    if len(peaks) > 1: # Plateaus: keep the first index of equal neighbouring maxima
+        peaks = peaks[np.concatenate(([True], np.diff(peaks) > min_distance))]
+    return peaks
+
+
+def runs_of_true(mask):
+    '''Returns (starts, ends) index arrays of consecutive True runs, ends exclusive.'''
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_pauses(samples, sample_rate, min_pause=PAUSE_MIN_SECONDS, threshold_db=PAUSE_THRESHOLD_DB):
+    '''Finds pauses (low-energy runs) in mono audio.
+
+    Returns a dict of float arrays: 'starts', 'ends' (seconds) and 'depths'
+    (dB below the loud level, larger = quieter pause).
+    '''
+    empty = {'starts': np.zeros(0), 'ends': np.zeros(0), 'depths': np.zeros(0)}
+    if samples is None or len(samples) == 0: return empty
+    rms_db, frame_seconds = frame_rms_db(samples, sample_rate)
+    if len(rms_db) == 0: return empty
+
+    loud_level = float(np.percentile(rms_db, 95))
+    noise_floor = float(np.percentile(rms_db, 5))
+    threshold = min(max(loud_level + threshold_db, noise_floor + 6.0), loud_level - 6.0)
+    starts, ends = runs_of_true(rms_db < threshold)
+    keep = (ends - starts) * frame_seconds >= min_pause
+    starts, ends = starts[keep], ends[keep]
+
+    # Mean level per pause via a cumulative sum (one pass regardless of pause count)
+    csum = np.concatenate(([0.0], np.cumsum(rms_db, dtype=np.float64)))
+    mean_db = (csum[ends] - csum[starts]) / np.maximum(1, ends - starts)
+    return {'starts': starts * frame_seconds, 'ends': ends * frame_seconds, 'depths': loud_level - mean_db}
+
+
+def detect_onsets_and_beats(samples, sample_rate):
+    '''Onset, beat and hit times (seconds) using librosa's onset envelope.'''
+    import librosa # Heavy import, only needed on the analysis worker
+    envelope = librosa.onset.onset_strength(y=samples, sr=sample_rate, hop_length=ONSET_HOP_LENGTH)
+    onset_frames = librosa.onset.onset_detect(onset_envelope=envelope, sr=sample_rate, hop_length=ONSET_HOP_LENGTH)
+    _, beat_frames = librosa.beat.beat_track(onset_envelope=envelope, sr=sample_rate, hop_length=ONSET_HOP_LENGTH)
+
+    to_time = lambda frames: librosa.frames_to_time(np.asarray(frames, dtype=np.int64), sr=sample_rate, hop_length=ONSET_HOP_LENGTH)
+    hits = np.zeros(0)
+    if len(onset_frames):
+        strengths = envelope[onset_frames]
+        hits = to_time(onset_frames[strengths >= strengths.mean() + HIT_STD_FACTOR * strengths.std()])
+    return {FEATURE_ONSET: to_time(onset_frames), FEATURE_BEAT: to_time(beat_frames), FEATURE_HIT: hits}
+
+# END OF FILE analysis/features.py
@@ -0,0 +1,228 @@
+# START OF FILE analysis/fingerprint.py
+import base64
+import zlib
+import numpy as np
+
+# --- Fingerprint Parameters ---
+# The frame length is picked from FP_FRAME_SECONDS per sample rate; fingerprints
+# taken at different rates are resampled onto a common frame grid when compared.
+FP_VERSION = 1
+FP_FRAME_SECONDS = 0.186 # Hop is half a frame
+FP_BAND_EDGES_HZ = np.geomspace(300.0, 3000.0, 17) # 16 bands -> 15 bits per frame
+FP_BITS = len(FP_BAND_EDGES_HZ) - 2
+FP_BLOCK_SECONDS = 30.0 # Amount of audio processed per streaming step
+
+# --- Match Verdicts ---
+MATCH_SAME = "same"
+MATCH_SHIFTED = "same_shifted" # Same audio, different encoding and/or offset
+MATCH_DIFFERENT = "different"
+
+SAME_MAX_BER = 0.02 # Bit error rate for a bit-identical decode
+MATCH_MAX_BER = 0.35 # Above this the audio is considered unrelated
+MIN_OVERLAP_FRACTION = 0.5 # Lags with less overlap are not considered
+
+
+class AudioFingerprint:
+    '''Compact per-frame sub-fingerprints (15 bits each) for one audio track.'''
+
+    def __init__(self, codes, sample_rate, frame_length, hop_length, duration):
+        self.codes = np.asarray(codes, dtype=np.uint16)
+        self.sample_rate = int(sample_rate)
+        self.frame_length = int(frame_length)
+        self.hop_length = int(hop_length)
+        self.duration = float(duration)
+
+    @property
+    def hop_seconds(self):
+        return self.hop_length / self.sample_rate
+
+    def __len__(self):
+        return len(self.codes)
+
+    def to_dict(self):
+        '''Serializes to a JSON-friendly dict (codes are zlib + base64 packed).'''
+        packed = zlib.compress(self.codes.astype('<u2').tobytes(), 9)
+        return {
+            "version": FP_VERSION,
+            "sample_rate": self.sample_rate,
+            "frame_length": self.frame_length,
+            "hop_length": self.hop_length,
+            "bits": FP_BITS,
+            "frames": len(self.codes),
+            "duration": round(self.duration, 3),
+            "data": base64.b64encode(packed).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        '''Rebuilds a fingerprint from to_dict() output. Raises ValueError if invalid.'''
+        if not isinstance(data, dict): raise ValueError("Fingerprint data must be a dictionary.")
+        if data.get("version") != FP_VERSION or data.get("bits") != FP_BITS:
+            raise ValueError(f"Unsupported fingerprint version/bits: {data.get('version')}/{data.get('bits')}")
+        try:
+            raw = zlib.decompress(base64.b64decode(data["data"]))
+            codes = np.frombuffer(raw, dtype='<u2').astype(np.uint16)
+            fp = cls(codes, data["sample_rate"], data["frame_length"], data["hop_length"], data["duration"])
+        except (KeyError, TypeError, zlib.error, ValueError) as e:
+            raise ValueError(f"Corrupt fingerprint data: {e}") from e
+        if len(codes) != data.get("frames", len(codes)):
+            raise ValueError("Fingerprint frame count does not match its data.")
+        return fp
+
+
+class FingerprintBuilder:
+    '''Builds an AudioFingerprint incrementally from consecutive blocks of mono samples.'''
+
+    def __init__(self, sample_rate):
+        self.sample_rate = int(sample_rate)
+        # Power-of-two frames keep the FFT on its fast path (~5x faster than odd sizes)
+        self.frame_length = 1 << max(6, int(round(np.log2(FP_FRAME_SECONDS * self.sample_rate))))
+        self.hop_length = self.frame_length // 2
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+
+        # Map band edges to FFT bins once; reduceat sums each [start, next_start) range
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / self.sample_rate)
+        edges = np.searchsorted(freqs, FP_BAND_EDGES_HZ)
+        edges = np.clip(edges, 1, len(freqs) - len(edges))
+        steps = np.arange(len(edges))
+        edges = np.maximum.accumulate(edges - steps) + steps # Strictly increasing, >= 1 bin per band
+        self._band_starts = edges[:-1]
+        self._band_stop = edges[-1]
+
+        self._carry = np.zeros(0, dtype=np.float32) # Samples not yet covered by a full frame
+        self._prev_diff = None # Band differences of the previous frame
+        self._codes = []
+        self._total_samples = 0
+
+    def feed(self, samples):
+        '''Adds a block of samples; complete frames are fingerprinted immediately.'''
+        samples = np.asarray(samples, dtype=np.float32)
+        self._total_samples += len(samples)
+        buf = np.concatenate((self._carry, samples)) if len(self._carry) else samples
+        if len(buf) < self.frame_length:
+            self._carry = buf.copy()
+            return
+
+        frames = np.lib.stride_tricks.sliding_window_view(buf, self.frame_length)[::self.hop_length]
+        n_frames = len(frames)
+        self._carry = buf[n_frames * self.hop_length:].copy()
+
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        energies = np.add.reduceat(spectrum[:, :self._band_stop], self._band_starts, axis=1)
+        band_diff = energies[:, :-1] - energies[:, 1:] # (n_frames, FP_BITS)
+
+        # Bit = sign of the band difference change relative to the previous frame
+        prev = band_diff[:1] if self._prev_diff is None else self._prev_diff
+        prev_rows = np.vstack((prev, band_diff[:-1]))
+        bits = (band_diff - prev_rows) > 0
+        self._prev_diff = band_diff[-1:]
+
+        weights = (1 << np.arange(FP_BITS)).astype(np.uint16)
+        self._codes.append((bits.astype(np.uint16) * weights).sum(axis=1).astype(np.uint16))
+
+    def finish(self):
+        '''Returns the finished AudioFingerprint (trailing partial frame is dropped).'''
+        codes = np.concatenate(self._codes) if self._codes else np.zeros(0, dtype=np.uint16)
+        duration = self._total_samples / self.sample_rate if self.sample_rate else 0.0
+        return AudioFingerprint(codes, self.sample_rate, self.frame_length, self.hop_length, duration)
+
+
+def compute_fingerprint(samples, sample_rate, block_seconds=FP_BLOCK_SECONDS):
+    '''Fingerprints a mono sample array block by block (bounded temporary memory).'''
+    builder = FingerprintBuilder(sample_rate)
+    block = max(builder.frame_length, int(block_seconds * sample_rate))
+    for start in range(0, len(samples), block):
+        builder.feed(samples[start:start + block])
+    return builder.finish()
+
+
+class FingerprintMatch:
+    '''Result of comparing two fingerprints.'''
+
+    def __init__(self, verdict, bit_error_rate, offset_seconds, overlap_seconds):
+        self.verdict = verdict
+        self.bit_error_rate = bit_error_rate
+        self.offset_seconds = offset_seconds # reference_time = candidate_time + offset
+        self.overlap_seconds = overlap_seconds
+
+    def describe(self):
+        '''Human readable one-line summary for dialogs.'''
+        if self.verdict == MATCH_SAME:
+            return "Same audio."
+        if self.verdict == MATCH_SHIFTED:
+            return (f"Same audio, different encoding/offset "
+                    f"(estimated offset {self.offset_seconds:+.3f}s, bit error rate {self.bit_error_rate:.1%}).")
+        return f"Different audio (best bit error rate {self.bit_error_rate:.1%})."
+
+    def __repr__(self):
+        return (f"FingerprintMatch({self.verdict!r}, ber={self.bit_error_rate:.3f}, "
+                f"offset={self.offset_seconds:.3f}s)")
+
+
+def _codes_to_signs(codes):
+    '''Expands uint16 codes into a (frames, FP_BITS) matrix of +1/-1 values.'''
+    bits = (codes[:, None] >> np.arange(FP_BITS, dtype=np.uint16)) & 1
+    return bits.astype(np.float32) * 2.0 - 1.0
+
+
+def _resample_codes(codes, from_hop_seconds, to_hop_seconds):
+    '''Nearest-frame resampling so two fingerprints share the same frame grid.'''
+    if len(codes) == 0: return codes
+    n_out = int(len(codes) * from_hop_seconds / to_hop_seconds)
+    idx = np.minimum((np.arange(n_out) * to_hop_seconds / from_hop_seconds).round().astype(np.int64), len(codes) - 1)
+    return codes[idx]
+
+
+def compare_fingerprints(reference, candidate, max_offset_seconds=60.0):
+    '''Compares two fingerprints, estimating the time offset between them.
+
+    All lags within max_offset_seconds are scored at once with an FFT
+    cross-correlation of the bit planes, so the cost is O(n log n).
+    '''
+    hop = reference.hop_seconds
+    ref_codes = reference.codes
+    cand_codes = candidate.codes
+    if abs(candidate.hop_seconds - hop) > 1e-6:
+        cand_codes = _resample_codes(cand_codes, candidate.hop_seconds, hop)
+
+    n_ref, n_cand = len(ref_codes), len(cand_codes)
+    if n_ref < 2 or n_cand < 2:
+        return FingerprintMatch(MATCH_DIFFERENT, 0.5, 0.0, 0.0)
+
+    a = _codes_to_signs(ref_codes)
+    b = _codes_to_signs(cand_codes)
+    n_fft = 1 << int(np.ceil(np.log2(n_ref + n_cand)))
+    cross = np.fft.rfft(a, n_fft, axis=0) * np.conj(np.fft.rfft(b, n_fft, axis=0))
+    corr = np.fft.irfft(cross.sum(axis=1), n_fft) # corr[k] = sum_n a[n + k] . b[n]
+
+    lags = np.arange(n_fft)
+    lags[lags >= n_fft // 2] -= n_fft
+    overlap = np.minimum(n_ref - lags, n_cand) - np.maximum(0, -lags)
+    max_lag = int(max_offset_seconds / hop)
+    min_overlap = max(2, int(MIN_OVERLAP_FRACTION * min(n_ref, n_cand)))
+    valid = (np.abs(lags) <= max_lag) & (overlap >= min_overlap)
+    if not np.any(valid):
+        return FingerprintMatch(MATCH_DIFFERENT, 0.5, 0.0, 0.0)
+
+    agreement = np.full(n_fft, -np.inf)
+    agreement[valid] = corr[valid] / (overlap[valid] * FP_BITS)
+    best = int(np.argmax(agreement))
+    ber = float((1.0 - agreement[best]) / 2.0)
+
+    # Parabolic interpolation around the peak for a sub-frame offset estimate
+    frac = 0.0
+    left, right = agreement[best - 1], agreement[(best + 1) % n_fft]
+    if np.isfinite(left) and np.isfinite(right):
+        denom = left - 2 * agreement[best] + right
+        if denom < 0: frac = float(np.clip(0.5 * (left - right) / denom, -0.5, 0.5))
+    offset_seconds = (int(lags[best]) + frac) * hop
+
+    if ber <= SAME_MAX_BER and lags[best] == 0:
+        verdict = MATCH_SAME
+    elif ber <= MATCH_MAX_BER:
+        verdict = MATCH_SHIFTED
+    else:
+        verdict = MATCH_DIFFERENT
+    return FingerprintMatch(verdict, ber, offset_seconds, float(overlap[best] * hop))
+
+# END OF FILE analysis/fingerprint.py
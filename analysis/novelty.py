@@ -0,0 +1,111 @@
+# START OF FILE analysis/novelty.py
+import numpy as np
+from analysis.features import cepstral_features, local_peaks
+
+# --- Novelty Segmentation Parameters ---
+NOVELTY_HOP_SECONDS = 0.05 # Cepstral frame hop before pooling
+NOVELTY_FRAME_SECONDS = 0.5 # Pooled frame length used for the self-similarity matrix
+NOVELTY_SCALES_SECONDS = (60.0, 30.0, 15.0) # Kernel half-widths, coarse to fine
+NOVELTY_THRESHOLD_MADS = 2.0
+
+
+def pooled_features(samples, sample_rate):
+    '''Cepstral features averaged into NOVELTY_FRAME_SECONDS frames, L2-normalized.'''
+    ceps, log_energy, frame_seconds = cepstral_features(samples, sample_rate, hop_seconds=NOVELTY_HOP_SECONDS)
+    per_pool = max(1, int(round(NOVELTY_FRAME_SECONDS / frame_seconds)))
+    n_pooled = len(ceps) // per_pool
+    if n_pooled == 0: return np.zeros((0, ceps.shape[1])), per_pool * frame_seconds
+    features = np.column_stack((ceps[:n_pooled * per_pool, 1:], log_energy[:n_pooled * per_pool, None]))
+    pooled = features.reshape(n_pooled, per_pool, -1).mean(axis=1)
+    pooled = (pooled - pooled.mean(axis=0)) / (pooled.std(axis=0) + 1e-6)
+    pooled /= np.linalg.norm(pooled, axis=1, keepdims=True) + 1e-9
+    return pooled, per_pool * frame_seconds
+
+
+def banded_self_similarity(features, bandwidth):
+    '''Cosine self-similarity restricted to |i - j| <= bandwidth.
+
+    Returns band with band[i, d + bandwidth] = S(i, i + d); entries outside the
+    matrix are 0. Memory and time are O(N * bandwidth) instead of O(N^2).
+    '''
+    n = len(features)
+    band = np.zeros((n, 2 * bandwidth + 1), dtype=np.float32)
+    for d in range(0, min(bandwidth, n - 1) + 1):
+        sims = np.einsum('ij,ij->i', features[:n - d], features[d:])
+        band[:n - d, bandwidth + d] = sims # S(i, i + d)
+        band[d:, bandwidth - d] = sims # S(i, i - d), by symmetry
+    return band
+
+
+def checkerboard_novelty(band, bandwidth, half_width):
+    '''Novelty curve from a Gaussian-tapered checkerboard kernel slid along the diagonal.
+
+    novelty[i] = sum_{a,b} K(a, b) * S(i + a, i + b) with a, b in [-L, L).
+    Each diagonal offset d = b - a is a 1-D correlation of one band column, so
+    only 2L - 1 vectorized convolutions are needed per scale.
+    '''
+    n = len(band)
+    L = half_width
+    offsets = np.arange(-L, L)
+    taper = np.exp(-0.5 * (offsets / (0.5 * L)) ** 2)
+    signs = np.where(offsets < 0, -1.0, 1.0)
+    kernel = np.outer(signs * taper, signs * taper) # +1 within a side, -1 across sides
+    kernel /= np.abs(kernel).sum()
+
+    novelty = np.zeros(n)
+    for d in range(-(2 * L - 1), 2 * L):
+        if abs(d) > bandwidth: continue
+        a_values = offsets[(offsets + d >= -L) & (offsets + d < L)]
+        weights = kernel[a_values + L, a_values + d + L] # K(a, a + d)
+        column = band[:, bandwidth + d].astype(np.float64) # column[j] = S(j, j + d)
+        # novelty[i] += sum_a weights[a] * column[i + a]
+        padded = np.concatenate((np.zeros(L), column, np.zeros(L)))
+        conv = np.convolve(padded, weights[::-1], mode='valid') # length n + 2L - len(a_values) + 1
+        start = int(a_values[0]) + L
+        novelty += conv[start:start + n]
+    return np.maximum(novelty, 0.0)
+
+
+def detect_sections(samples, sample_rate, scales_seconds=NOVELTY_SCALES_SECONDS):
+    '''Multi-scale novelty segmentation.
+
+    Returns a dict with 'scales' (seconds, coarse to fine), 'levels' (boundary
+    times per scale; each level includes the coarser levels' boundaries),
+    'scores' (per boundary in the finest level: 1.0 = top level) and
+    'starts'/'ends'/'labels' for the top-level sections.
+    '''
+    features, frame_seconds = pooled_features(samples, sample_rate)
+    duration = len(samples) / sample_rate if sample_rate else 0.0
+    n = len(features)
+    scales = [s for s in scales_seconds if 4 * int(s / frame_seconds) < n]
+    levels, level_of = [], {}
+    boundaries = np.zeros(0, dtype=np.int64)
+
+    if scales:
+        bandwidth = 2 * int(scales[0] / frame_seconds)
+        band = banded_self_similarity(features, bandwidth)
+        for level, scale in enumerate(scales):
+            L = int(scale / frame_seconds)
+            novelty = checkerboard_novelty(band, bandwidth, L)
+            novelty[:L // 2] = 0.0 # The zero padding past either end reads as a change
+            novelty[n - L // 2:] = 0.0
+            median = np.median(novelty)
+            mad = np.median(np.abs(novelty - median)) + 1e-9
+            peaks = local_peaks(novelty, L, median + NOVELTY_THRESHOLD_MADS * mad)
+            # Nest levels: keep coarser boundaries, add new peaks not already close to one
+            if len(boundaries):
+                nearest = np.min(np.abs(peaks[:, None] - boundaries[None, :]), axis=1) if len(peaks) else peaks
+                peaks = peaks[nearest > L // 2]
+            for p in peaks: level_of[int(p)] = level
+            boundaries = np.sort(np.concatenate((boundaries, peaks)))
+            levels.append(boundaries * frame_seconds)
+
+    top = levels[0] if levels else np.zeros(0)
+    starts = np.concatenate(([0.0], top))
+    scores = np.array([1.0 - level_of[int(b)] / max(1, len(scales)) for b in boundaries])
+    return {'scales': scales, 'levels': levels,
+            'times': boundaries * frame_seconds, 'scores': scores,
+            'starts': starts, 'ends': np.append(starts[1:], duration),
+            'labels': np.arange(len(starts)) % 2}
+
+# END OF FILE analysis/novelty.py
@@ -0,0 +1,124 @@
+# START OF FILE analysis/prosody.py
+import numpy as np
+from analysis.features import ANALYSIS_BLOCK_SECONDS
+
+# --- Pitch Tracking Parameters ---
+PITCH_TARGET_RATE = 4000 # Audio is decimated to roughly this rate before tracking
+PITCH_HOP_SECONDS = 0.01
+PITCH_FRAME_SECONDS = 0.04 # Two periods of the lowest pitch
+PITCH_MIN_HZ = 60.0
+PITCH_MAX_HZ = 400.0
+PITCH_VOICING_THRESHOLD = 0.5 # Min normalized autocorrelation peak for a voiced frame
+PITCH_OCTAVE_TOLERANCE = 0.9 # Shortest lag within this fraction of the best peak wins
+PITCH_SILENCE_DB = -40.0 # Frames this far below the loud level are unvoiced
+
+# --- Sentence Boundary Parameters ---
+RESET_CONTEXT_SECONDS = 1.0 # Voiced speech compared on each side of a pause
+RESET_FULL_SEMITONES = 4.0 # A reset this large scores 1.0
+PAUSE_FULL_DEPTH_DB = 40.0
+PAUSE_FULL_SECONDS = 1.0
+SCORE_WEIGHTS = (0.5, 0.3, 0.2) # Pitch reset, pause depth, pause duration
+
+
+def track_pitch(samples, sample_rate, hop_seconds=PITCH_HOP_SECONDS, block_seconds=ANALYSIS_BLOCK_SECONDS):
+    '''Autocorrelation pitch tracker, vectorized over frames and run block by block.
+
+    Returns:
+        (f0, frame_seconds): f0 in Hz per frame, NaN where unvoiced.
+    '''
+    # Crude decimation by block averaging; enough for a 60-400 Hz fundamental
+    factor = max(1, int(sample_rate // PITCH_TARGET_RATE))
+    rate = sample_rate / factor
+    hop = max(1, int(round(hop_seconds * rate)))
+    frame = int(round(PITCH_FRAME_SECONDS * rate))
+    n_fft = 1 << int(np.ceil(np.log2(2 * frame)))
+    min_lag = max(2, int(rate / PITCH_MAX_HZ))
+    max_lag = min(frame - 1, int(rate / PITCH_MIN_HZ))
+
+    n_decimated = len(samples) // factor
+    n_frames = 1 + (n_decimated - frame) // hop if n_decimated >= frame else 0
+    f0 = np.full(n_frames, np.nan, dtype=np.float32)
+    if n_frames == 0: return f0, hop / rate
+    energy_db = np.empty(n_frames, dtype=np.float32)
+    window = np.hanning(frame).astype(np.float32)
+    window_acf = np.fft.irfft(np.abs(np.fft.rfft(window, n_fft)) ** 2)[:max_lag + 2] # Corrects the taper's lag bias
+
+    frames_per_block = max(1, int(block_seconds * rate) // hop)
+    for f_start in range(0, n_frames, frames_per_block):
+        f_end = min(n_frames, f_start + frames_per_block)
+        s0, s1 = f_start * hop, (f_end - 1) * hop + frame
+        block = np.asarray(samples[s0 * factor:s1 * factor], dtype=np.float32)
+        if factor > 1: block = block.reshape(-1, factor).mean(axis=1)
+        frames = np.lib.stride_tricks.sliding_window_view(block, frame)[::hop][:f_end - f_start]
+        frames = (frames - frames.mean(axis=1, keepdims=True)) * window
+        acf = np.fft.irfft(np.abs(np.fft.rfft(frames, n_fft, axis=1)) ** 2, axis=1)[:, :max_lag + 2]
+        energy = acf[:, 0]
+        energy_db[f_start:f_end] = 10.0 * np.log10(energy + 1e-10)
+        norm = acf / (window_acf / window_acf[0]) / (energy[:, None] + 1e-10)
+
+        # Multiples of the period correlate almost as well as the period itself, so take
+        # the first local maximum that comes close to the best one (avoids octave-down errors)
+        search = norm[:, min_lag:max_lag + 1]
+        best = search.max(axis=1, keepdims=True)
+        is_peak = np.zeros_like(search, dtype=bool)
+        is_peak[:, 1:-1] = (search[:, 1:-1] >= search[:, :-2]) & (search[:, 1:-1] >= search[:, 2:])
+        lags = np.argmax(is_peak & (search >= PITCH_OCTAVE_TOLERANCE * best), axis=1) + min_lag
+        rows = np.arange(len(lags))
+        peak = norm[rows, lags]
+        # Parabolic interpolation around the peak lag for sub-sample resolution
+        left, right = norm[rows, lags - 1], norm[rows, lags + 1]
+        denom = left - 2.0 * peak + right
+        shift = np.where(np.abs(denom) > 1e-9, 0.5 * (left - right) / np.where(denom == 0, 1.0, denom), 0.0)
+        pitch = rate / (lags + np.clip(shift, -0.5, 0.5))
+        f0[f_start:f_end] = np.where(peak >= PITCH_VOICING_THRESHOLD, pitch, np.nan)
+
+    f0[energy_db < np.percentile(energy_db, 95) + PITCH_SILENCE_DB] = np.nan
+    return f0, hop / rate
+
+
+def pitch_resets(f0, frame_seconds, pause_starts, pause_ends, context_seconds=RESET_CONTEXT_SECONDS):
+    '''Mean pitch after each pause minus mean pitch before it, in semitones.
+
+    Uses cumulative sums over voiced frames, so the cost is one pass over the
+    pitch track plus O(1) per pause. NaN where either side has no voiced speech.
+    '''
+    voiced = ~np.isnan(f0)
+    semitones = np.where(voiced, 12.0 * np.log2(np.where(voiced, f0, 1.0) / 100.0), 0.0)
+    csum = np.concatenate(([0.0], np.cumsum(semitones, dtype=np.float64)))
+    count = np.concatenate(([0], np.cumsum(voiced)))
+    n = len(f0)
+    to_frame = lambda t: np.clip(np.round(np.asarray(t) / frame_seconds).astype(np.int64), 0, n)
+    context = int(round(context_seconds / frame_seconds))
+
+    def side_mean(a, b):
+        voiced_count = count[b] - count[a]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(voiced_count >= max(1, context // 5), (csum[b] - csum[a]) / voiced_count, np.nan)
+
+    starts, ends = to_frame(pause_starts), to_frame(pause_ends)
+    before = side_mean(np.maximum(0, starts - context), starts)
+    after = side_mean(ends, np.minimum(n, ends + context))
+    return after - before
+
+
+def sentence_boundaries(samples, sample_rate, pauses):
+    '''Ranks pauses as sentence-boundary candidates from pitch reset, depth and duration.
+
+    Args:
+        pauses: dict from detect_pauses ('starts', 'ends', 'depths').
+    Returns a dict with 'times' (pause ends, where the next sentence starts),
+    'scores' (0..1) and 'resets' (semitones, NaN if unmeasurable).
+    '''
+    starts, ends, depths = (np.asarray(pauses[k], dtype=np.float64) for k in ('starts', 'ends', 'depths'))
+    if len(starts) == 0: return {'times': ends, 'scores': np.zeros(0), 'resets': np.zeros(0)}
+    f0, frame_seconds = track_pitch(samples, sample_rate)
+    resets = pitch_resets(f0, frame_seconds, starts, ends)
+
+    reset_score = np.clip(np.nan_to_num(resets, nan=0.0) / RESET_FULL_SEMITONES, 0.0, 1.0)
+    depth_score = np.clip(depths / PAUSE_FULL_DEPTH_DB, 0.0, 1.0)
+    duration_score = np.clip((ends - starts) / PAUSE_FULL_SECONDS, 0.0, 1.0)
+    w_reset, w_depth, w_duration = SCORE_WEIGHTS
+    scores = w_reset * reset_score + w_depth * depth_score + w_duration * duration_score
+    return {'times': ends, 'scores': scores, 'resets': resets}
+
+# END OF FILE analysis/prosody.py
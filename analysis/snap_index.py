@@ -0,0 +1,96 @@
+# START OF FILE analysis/snap_index.py
+import numpy as np
+
+class SnapIndex:
+    '''Sorted, type-tagged index of analysis feature times for snapping.
+
+    All feature types are merged into one sorted time array with a parallel
+    array of type codes; each type also keeps its own sorted array so
+    type-filtered queries stay O(k log n) for k requested types.
+    '''
+
+    def __init__(self, features=None):
+        self._by_kind = {} # kind name -> sorted float64 array of times
+        self.kind_names = [] # code -> kind name
+        self.times = np.zeros(0, dtype=np.float64)
+        self.kind_codes = np.zeros(0, dtype=np.int16)
+        if features:
+            for kind, times in features.items():
+                self._by_kind[kind] = np.sort(np.asarray(times, dtype=np.float64))
+            self._rebuild()
+
+    def __len__(self):
+        return len(self.times)
+
+    def kinds(self):
+        return list(self._by_kind.keys())
+
+    def times_for(self, kind):
+        return self._by_kind.get(kind, np.zeros(0, dtype=np.float64))
+
+    def set_kind(self, kind, times):
+        '''Replaces all times of one feature type (merged array is rebuilt once).'''
+        self._by_kind[kind] = np.sort(np.asarray(times, dtype=np.float64).ravel())
+        self._rebuild()
+
+    def remove_kind(self, kind):
+        if self._by_kind.pop(kind, None) is not None:
+            self._rebuild()
+
+    def clear(self):
+        self._by_kind.clear()
+        self._rebuild()
+
+    def _rebuild(self):
+        self.kind_names = list(self._by_kind.keys())
+        if not self.kind_names:
+            self.times = np.zeros(0, dtype=np.float64)
+            self.kind_codes = np.zeros(0, dtype=np.int16)
+            return
+        arrays = [self._by_kind[k] for k in self.kind_names]
+        codes = np.concatenate([np.full(len(a), i, dtype=np.int16) for i, a in enumerate(arrays)])
+        times = np.concatenate(arrays)
+        order = np.argsort(times, kind='stable')
+        self.times = times[order]
+        self.kind_codes = codes[order]
+
+    @staticmethod
+    def _nearest_in(times, time_seconds):
+        '''Index of the element closest to time_seconds in a sorted array (or -1).'''
+        n = len(times)
+        if n == 0: return -1
+        i = int(np.searchsorted(times, time_seconds))
+        if i == 0: return 0
+        if i == n: return n - 1
+        return i if (times[i] - time_seconds) < (time_seconds - times[i - 1]) else i - 1
+
+    def nearest(self, time_seconds, window, kinds=None):
+        '''Nearest feature within +/- window seconds.
+
+        Args:
+            kinds (iterable | None): Restrict to these feature types (None = all).
+        Returns:
+            (time, kind) tuple, or None if nothing lies within the window.
+        '''
+        if kinds is None:
+            i = self._nearest_in(self.times, time_seconds)
+            if i < 0 or abs(self.times[i] - time_seconds) > window: return None
+            return float(self.times[i]), self.kind_names[self.kind_codes[i]]
+
+        best = None
+        for kind in kinds:
+            times = self._by_kind.get(kind)
+            if times is None: continue
+            i = self._nearest_in(times, time_seconds)
+            if i < 0: continue
+            dist = abs(times[i] - time_seconds)
+            if dist <= window and (best is None or dist < best[0]):
+                best = (dist, float(times[i]), kind)
+        return (best[1], best[2]) if best else None
+
+    def in_range(self, start_seconds, end_seconds):
+        '''(times, kind_codes) of all features with start <= t < end.'''
+        i0, i1 = np.searchsorted(self.times, [start_seconds, end_seconds])
+        return self.times[i0:i1], self.kind_codes[i0:i1]
+
+# END OF FILE analysis/snap_index.py
@@ -0,0 +1,121 @@
+# START OF FILE analysis/speaker_turns.py
+import numpy as np
+from analysis.features import cepstral_features, local_peaks
+
+# --- Speaker Change Parameters ---
+SPEAKER_HOP_SECONDS = 0.02
+SPEAKER_WINDOW_SECONDS = 2.0 # Statistics window on each side of a candidate point
+SPEAKER_STEP_SECONDS = 0.1 # Candidate spacing
+SPEAKER_MIN_TURN_SECONDS = 3.0 # Minimum distance between two changes
+SPEAKER_THRESHOLD_MADS = 3.0 # Peak threshold: median + k * MAD of the distance curve
+SPEAKER_VOICED_DB = -25.0 # Frames this far below the loud level are ignored
+SPEAKER_CLUSTER_DISTANCE = 0.6 # Max z-scored distance for a segment to join a speaker
+SPEAKER_MAX_SPEAKERS = 8
+
+
+def _windowed_stats(csum_x, csum_x2, csum_n, starts, ends):
+    '''Mean/variance of voiced frames in [start, end) from cumulative sums, vectorized.'''
+    count = (csum_n[ends] - csum_n[starts])[:, None]
+    safe = np.maximum(count, 1.0)
+    mean = (csum_x[ends] - csum_x[starts]) / safe
+    var = (csum_x2[ends] - csum_x2[starts]) / safe - mean * mean
+    return mean, np.maximum(var, 1e-3), count[:, 0]
+
+
+def speaker_change_curve(features, voiced, window_frames, step_frames):
+    '''Symmetric KL divergence between diagonal Gaussians left/right of each candidate.
+
+    Uses cumulative sums, so the whole curve costs O(frames * dims) with no
+    pairwise similarity matrix.
+    Returns (candidate_frame_indices, distances).
+    '''
+    n = len(features)
+    w = voiced.astype(np.float64)[:, None]
+    x = features.astype(np.float64) * w
+    zero = np.zeros((1, features.shape[1]))
+    csum_x = np.concatenate((zero, np.cumsum(x, axis=0)))
+    csum_x2 = np.concatenate((zero, np.cumsum(x * features, axis=0)))
+    csum_n = np.concatenate(([0.0], np.cumsum(voiced.astype(np.float64))))
+
+    centers = np.arange(window_frames, n - window_frames + 1, step_frames)
+    if len(centers) == 0: return centers, np.zeros(0)
+    mean_l, var_l, n_l = _windowed_stats(csum_x, csum_x2, csum_n, centers - window_frames, centers)
+    mean_r, var_r, n_r = _windowed_stats(csum_x, csum_x2, csum_n, centers, centers + window_frames)
+
+    diff2 = (mean_l - mean_r) ** 2
+    kl = 0.5 * np.sum(var_l / var_r + var_r / var_l - 2.0 + diff2 * (1.0 / var_l + 1.0 / var_r), axis=1)
+    # Need enough voiced frames on both sides for the statistics to mean anything
+    kl[(n_l < 0.3 * window_frames) | (n_r < 0.3 * window_frames)] = 0.0
+    return centers, kl
+
+
+def _label_segments(features, voiced, bounds):
+    '''Greedy single-pass clustering of segment means into speaker labels.'''
+    labels = np.zeros(len(bounds) - 1, dtype=np.int16)
+    centroids, weights = [], []
+    for i in range(len(bounds) - 1):
+        seg_mask = voiced[bounds[i]:bounds[i + 1]]
+        seg = features[bounds[i]:bounds[i + 1]][seg_mask]
+        if len(seg) == 0: # Silent segment: inherit previous label
+            labels[i] = labels[i - 1] if i else 0
+            continue
+        mean = seg.mean(axis=0)
+        if centroids:
+            dists = np.sqrt(np.mean((np.array(centroids) - mean) ** 2, axis=1))
+            best = int(np.argmin(dists))
+            if dists[best] <= SPEAKER_CLUSTER_DISTANCE or len(centroids) >= SPEAKER_MAX_SPEAKERS:
+                total = weights[best] + len(seg)
+                centroids[best] = (centroids[best] * weights[best] + mean * len(seg)) / total
+                weights[best] = total
+                labels[i] = best
+                continue
+        centroids.append(mean)
+        weights.append(len(seg))
+        labels[i] = len(centroids) - 1
+    return labels
+
+
+def detect_speaker_turns(samples, sample_rate):
+    '''Finds speaker changes in mono audio in roughly linear time.
+
+    Returns a dict with 'starts', 'ends', 'labels' (one entry per speaker
+    segment) and 'change_times', 'change_scores' (0..1) for each turn.
+    '''
+    ceps, log_energy, frame_seconds = cepstral_features(samples, sample_rate, hop_seconds=SPEAKER_HOP_SECONDS)
+    duration = len(samples) / sample_rate if sample_rate else 0.0
+    empty = {'starts': np.array([0.0]), 'ends': np.array([duration]), 'labels': np.zeros(1, dtype=np.int16),
+             'change_times': np.zeros(0), 'change_scores': np.zeros(0)}
+    window_frames = int(SPEAKER_WINDOW_SECONDS / frame_seconds)
+    if len(ceps) < 4 * window_frames: return empty
+
+    # Spectral shape only (drop c0); z-score over voiced frames so dimensions weigh equally
+    energy_db = log_energy * (10.0 / np.log(10.0))
+    voiced = energy_db > np.percentile(energy_db, 95) + SPEAKER_VOICED_DB
+    features = ceps[:, 1:]
+    ref = features[voiced] if np.any(voiced) else features
+    features = (features - ref.mean(axis=0)) / (ref.std(axis=0) + 1e-6)
+
+    step_frames = max(1, int(SPEAKER_STEP_SECONDS / frame_seconds))
+    centers, distances = speaker_change_curve(features, voiced, window_frames, step_frames)
+    if len(distances) == 0: return empty
+    median = np.median(distances)
+    mad = np.median(np.abs(distances - median)) + 1e-9
+    min_gap = max(1, int(SPEAKER_MIN_TURN_SECONDS / (step_frames * frame_seconds)))
+    peaks = local_peaks(distances, min_gap, median + SPEAKER_THRESHOLD_MADS * mad)
+
+    # Label the raw segments, then keep only boundaries where the speaker label changes
+    bounds = np.concatenate(([0], centers[peaks], [len(features)]))
+    labels = _label_segments(features, voiced, bounds)
+    keep = np.concatenate(([True], labels[1:] != labels[:-1]))
+    seg_starts = bounds[:-1][keep]
+    labels = labels[keep]
+    kept_peaks = peaks[keep[1:]]
+
+    starts = seg_starts * frame_seconds
+    ends = np.append(starts[1:], duration)
+    scores = distances[kept_peaks]
+    scores = scores / scores.max() if len(scores) and scores.max() > 0 else scores
+    return {'starts': starts, 'ends': ends, 'labels': labels,
+            'change_times': starts[1:], 'change_scores': scores}
+
+# END OF FILE analysis/speaker_turns.py
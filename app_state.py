@@ -1,6 +1,12 @@
 # START OF FILE app_state.py
 import os
 import numpy as np
+from analysis.snap_index import SnapIndex
+from keyframes.store import KeyframeStore
+from keyframes.history import EditHistory
+from keyframes.export import DEFAULT_EXPORT_FORMATS
+from keyframes.lint import TimingLinter
+from keyframes.slide_index import SlideUsageIndex
 
 class AppState:
     '''Centralized class to hold and manage application state.'''
@@ -17,6 +23,8 @@ class AppState:
         self.playback_speed = 1.0 # Currently visual only for Pygame playback
         self._playback_start_offset = 0.0 # Time where current playback segment started
         self._last_update_tick = 0 # For manual time tracking during playback
+        self.audio_fingerprint = None # analysis.fingerprint.AudioFingerprint of the loaded audio
+        self.project_file = None # Path of the open/last saved project (None if unsaved)
 
         # Slide related state
         self.slides_directory = None
@@ -26,8 +34,20 @@ class AppState:
         self.loaded_slide_photo = None # Tkinter PhotoImage (cache, IMPORTANT ref)
 
         # Keyframe related state
-        self.keyframes = [] # List of dicts: {'time': float, 'slideIndex': int}
+        self.keyframes = KeyframeStore() # Sorted; items behave like {'time': float, 'slideIndex': int} (any slide, repeats allowed)
         self.selected_keyframe_index = -1
+        self.edit_history = EditHistory() # Undo/redo of keyframe edits
+        self.lint = TimingLinter(self.keyframes) # Timing findings per keyframe, kept current on every edit
+        self.slide_usage = SlideUsageIndex(self.keyframes) # slide -> keyframes showing it, kept current on every edit
+        self.export_formats = list(DEFAULT_EXPORT_FORMATS) # Formats picked in the last export
+
+        # Audio analysis state
+        self.analysis = {} # Analysis artifacts by name (e.g. 'pauses')
+        self.keyframe_candidates = {} # source -> {'times': array, 'scores': array (0..1)}
+        self.snap_index = SnapIndex() # Feature times that keyframes can snap to
+        self.snap_enabled = False
+        self.snap_window = 0.15 # Max snap distance in seconds
+        self.snap_kinds = None # Feature types to snap to (None = all)
 
         # UI / Interaction State
         # self.waveform_zoom_level = 1.0 # Removed
@@ -48,8 +68,14 @@ class AppState:
         self.current_position = 0.0
         self._playback_start_offset = 0.0
         self._last_update_tick = 0
-        self.keyframes = []
+        self.audio_fingerprint = None
+        self.project_file = None
+        self.keyframes.clear()
         self.selected_keyframe_index = -1
+        self.edit_history.clear()
+        self.analysis = {}
+        self.keyframe_candidates = {}
+        self.snap_index = SnapIndex()
         # self.dragging_keyframe_index = -1 # Removed
         # Don't reset create_keyframe_at_zero here
 
@@ -0,0 +1,211 @@
+# START OF FILE handlers/analysis_handler.py
+import numpy as np
+from analysis.features import detect_pauses, detect_onsets_and_beats, FEATURE_PAUSE
+from analysis.speaker_turns import detect_speaker_turns
+from analysis.novelty import detect_sections
+from analysis.prosody import sentence_boundaries
+from analysis.audio_classes import classify_audio, AudioRegions, CLASS_MUSIC
+
+FEATURE_SPEAKER = 'speaker' # Snap kind / candidate source for speaker turns
+FEATURE_SECTION = 'section' # Snap kind / candidate source for novelty section boundaries
+FEATURE_SENTENCE = 'sentence' # Candidate source for pauses ranked by pitch reset
+SENTENCE_MIN_SCORE = 0.6 # Default cut-off when adding sentence-start keyframes
+AUTOMATIC_STAGES = ('pauses', 'audio_classes', 'sentences') # What analyze_audio() produces; cached only once all are in
+
+
+class AnalysisHandler:
+    '''Runs audio feature analysis in the background and maintains the snap index.'''
+
+    def __init__(self, app_state, update_callback, task_runner):
+        self.state = app_state
+        self.update_ui = update_callback
+        self.tasks = task_runner
+        self._generation = 0 # Bumped per analysis run; stale results are dropped
+        self._raw_candidates = {} # source -> (times, scores) before music regions are excluded
+
+    def _require_audio(self):
+        '''True if decoded audio is available for analysis; sets a status message otherwise.'''
+        if self.state.has_audio() and self.state.audio_data is not None and np.any(self.state.audio_data):
+            return True
+        self.state.status_message = "Load an audio file to analyze."
+        self.update_ui(status=True)
+        return False
+
+    def analyze_audio(self):
+        '''Starts background feature extraction for the loaded audio.'''
+        if not self._require_audio(): return False
+
+        self._generation += 1
+        generation = self._generation
+        self.state.snap_index.clear()
+        self.state.analysis.clear()
+        self.state.keyframe_candidates.clear()
+        self._raw_candidates.clear()
+        self.state.status_message = "Analyzing audio features in background..."
+        self.update_ui(status=True, analysis=True)
+        print("Starting background audio analysis...")
+        self.tasks.submit(self._compute_base_features, self.state.audio_data, self.state.sample_rate,
+                          on_done=lambda result: self._on_features_ready(generation, result),
+                          on_error=lambda error: self._on_analysis_error(generation, error))
+        return True
+
+    @staticmethod
+    def _compute_base_features(samples, sample_rate):
+        '''Worker: pauses, speech/music/silence regions, onsets, beats and hits for one audio array.'''
+        pauses = detect_pauses(samples, sample_rate)
+        audio_classes = classify_audio(samples, sample_rate)
+        features = {FEATURE_PAUSE: pauses['ends']}
+        try:
+            features.update(detect_onsets_and_beats(samples, sample_rate))
+        except Exception as e: # Keep pauses even if librosa's onset/beat tracking fails
+            print(f"Warning: Onset/beat detection failed: {e}")
+        return {'pauses': pauses, 'audio_classes': audio_classes, 'features': features}
+
+    def _is_current(self, generation):
+        return generation == self._generation and self.state.has_audio()
+
+    def _on_features_ready(self, generation, result):
+        if not self._is_current(generation):
+            print("Discarding stale audio analysis result.")
+            return
+        self.state.analysis['pauses'] = result['pauses']
+        self.state.analysis['audio_classes'] = result['audio_classes']
+        for source, (times, scores) in list(self._raw_candidates.items()): # Re-filter with the new regions
+            self._set_candidates(source, times, scores)
+        for kind, times in result['features'].items():
+            self.state.snap_index.set_kind(kind, times)
+        counts = ", ".join(f"{len(self.state.snap_index.times_for(k))} {k}s" for k in self.state.snap_index.kinds())
+        music_seconds = AudioRegions.from_dict(result['audio_classes']).total_seconds(CLASS_MUSIC)
+        if music_seconds > 0: counts += f"; {music_seconds:.0f}s of music excluded from suggestions"
+        self.state.status_message = f"Audio analysis finished: {counts}. Ranking pauses by pitch reset..."
+        print(self.state.status_message)
+        self.update_ui(status=True, analysis=True)
+        # The pitch pass only needs the pauses, so rank them right away in the background
+        self.tasks.submit(sentence_boundaries, self.state.audio_data, self.state.sample_rate, result['pauses'],
+                          on_done=lambda ranked: self._on_sentences_ready(generation, ranked),
+                          on_error=lambda error: self._on_analysis_error(generation, error))
+
+    def _on_sentences_ready(self, generation, result):
+        if not self._is_current(generation): return
+        self.state.analysis['sentences'] = result
+        self._set_candidates(FEATURE_SENTENCE, result['times'], result['scores'])
+        strong = int(np.count_nonzero(result['scores'] >= SENTENCE_MIN_SCORE))
+        self.state.status_message = (f"Ranked {len(result['times'])} pauses: {strong} likely sentence starts "
+                                     f"(score >= {SENTENCE_MIN_SCORE:.1f}).")
+        print(self.state.status_message)
+        self.update_ui(status=True, analysis=True)
+
+    def _on_analysis_error(self, generation, error):
+        if not self._is_current(generation): return
+        print(f"Audio analysis failed: {error}")
+        self.state.status_message = f"Audio analysis failed: {error}"
+        self.update_ui(status=True)
+
+    def detect_speaker_turns(self):
+        '''Starts background speaker-change detection for the loaded audio.'''
+        if not self._require_audio(): return False
+        generation = self._generation
+        self.state.status_message = "Detecting speaker turns in background..."
+        self.update_ui(status=True)
+        self.tasks.submit(detect_speaker_turns, self.state.audio_data, self.state.sample_rate,
+                          on_done=lambda result: self._on_speaker_turns_ready(generation, result),
+                          on_error=lambda error: self._on_analysis_error(generation, error))
+        return True
+
+    def _on_speaker_turns_ready(self, generation, result):
+        if not self._is_current(generation): return
+        self.state.analysis['speaker_turns'] = result
+        self._set_candidates(FEATURE_SPEAKER, result['change_times'], result['change_scores'])
+        num_speakers = len(np.unique(result['labels']))
+        self.state.status_message = (f"Found {len(result['change_times'])} speaker turns "
+                                     f"({num_speakers} distinct speaker(s)).")
+        print(self.state.status_message)
+        self.update_ui(status=True, analysis=True)
+
+    def detect_sections(self):
+        '''Starts background multi-scale novelty segmentation for the loaded audio.'''
+        if not self._require_audio(): return False
+        generation = self._generation
+        self.state.status_message = "Detecting sections in background..."
+        self.update_ui(status=True)
+        self.tasks.submit(detect_sections, self.state.audio_data, self.state.sample_rate,
+                          on_done=lambda result: self._on_sections_ready(generation, result),
+                          on_error=lambda error: self._on_analysis_error(generation, error))
+        return True
+
+    def _on_sections_ready(self, generation, result):
+        if not self._is_current(generation): return
+        self.state.analysis['sections'] = result
+        self._set_candidates(FEATURE_SECTION, result['times'], result['scores'])
+        per_level = " / ".join(str(len(level)) for level in result['levels'])
+        self.state.status_message = (f"Found {len(result['starts'])} top-level sections "
+                                     f"(boundaries per scale: {per_level or 'none'}).")
+        print(self.state.status_message)
+        self.update_ui(status=True, analysis=True)
+
+    def _set_candidates(self, source, times, scores):
+        '''Publishes keyframe candidates from one source (also made snappable).
+
+        Candidates inside music regions are left out; the unfiltered lists are
+        kept so they can be re-filtered when the regions change.
+        '''
+        times = np.asarray(times, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        self._raw_candidates[source] = (times, scores)
+        keep = self._outside_music(times)
+        self.state.keyframe_candidates[source] = {'times': times[keep], 'scores': scores[keep]}
+        self.state.snap_index.set_kind(source, times[keep])
+
+    def _outside_music(self, times):
+        '''Boolean mask of times that do not fall inside a music region.'''
+        audio_classes = self.state.analysis.get('audio_classes')
+        if not audio_classes: return np.ones(len(times), dtype=bool)
+        return AudioRegions.from_dict(audio_classes).labels_at(times) != CLASS_MUSIC
+
+    def candidate_times(self, source, min_score=0.0):
+        '''Candidate times from one source with score >= min_score.'''
+        candidates = self.state.keyframe_candidates.get(source)
+        if not candidates: return np.zeros(0)
+        return candidates['times'][candidates['scores'] >= min_score]
+
+    @staticmethod
+    def artifacts_complete(artifacts):
+        '''True if saved artifacts hold every automatic analysis stage (else re-analyze rather than restore).'''
+        analysis = (artifacts or {}).get('analysis') or {}
+        return all(stage in analysis for stage in AUTOMATIC_STAGES)
+
+    def export_artifacts(self):
+        '''Analysis results as nested dicts/arrays, for saving in a project file; None until analyze_audio() has finished.'''
+        if not all(stage in self.state.analysis for stage in AUTOMATIC_STAGES): return None
+        return {'analysis': dict(self.state.analysis),
+                'candidates': {source: {'times': times, 'scores': scores}
+                               for source, (times, scores) in self._raw_candidates.items()},
+                'snap': {kind: self.state.snap_index.times_for(kind) for kind in self.state.snap_index.kinds()}}
+
+    def restore_artifacts(self, artifacts):
+        '''Installs previously saved analysis results instead of re-analyzing (drops any analysis in flight).'''
+        self._generation += 1
+        self.state.snap_index.clear()
+        self.state.keyframe_candidates.clear()
+        self._raw_candidates.clear()
+        self.state.analysis = dict(artifacts.get('analysis', {}))
+        for kind, times in artifacts.get('snap', {}).items():
+            self.state.snap_index.set_kind(kind, times)
+        for source, candidates in artifacts.get('candidates', {}).items():
+            self._set_candidates(source, candidates['times'], candidates['scores'])
+        self.state.status_message = f"Loaded cached analysis: {len(self.state.snap_index)} features."
+        print(self.state.status_message)
+        self.update_ui(status=True, analysis=True)
+
+    def toggle_snapping(self):
+        '''Turns snapping of new/moved keyframes to analysis features on or off.'''
+        self.state.snap_enabled = not self.state.snap_enabled
+        if self.state.snap_enabled:
+            available = len(self.state.snap_index)
+            detail = f"{available} features" if available else "no features analyzed yet"
+            self.state.status_message = f"Snapping enabled (+/-{self.state.snap_window:.2f}s, {detail})."
+        else:
+            self.state.status_message = "Snapping disabled."
+        self.update_ui(status=True)
+
+# END OF FILE handlers/analysis_handler.py
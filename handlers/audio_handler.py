@@ -4,6 +4,7 @@ import pygame
 import librosa
 import numpy as np
 from tkinter import messagebox
+from analysis.fingerprint import compute_fingerprint
 # Ensure utils is importable
 try:
     from utils import DEFAULT_SAMPLE_RATE_TARGET, MAX_WAVEFORM_SAMPLES, format_time
@@ -71,6 +72,15 @@ class AudioHandler:
 
             print(f"Audio loaded. Duration: {self.state.audio_duration:.3f}s, Sample Rate: {self.state.sample_rate}")
 
+            # Fingerprint the decoded samples so keyframe files can be bound to this audio
+            if np.any(self.state.audio_data):
+                try:
+                    self.state.audio_fingerprint = compute_fingerprint(self.state.audio_data, self.state.sample_rate)
+                    print(f"Audio fingerprint computed ({len(self.state.audio_fingerprint)} frames).")
+                except Exception as fp_err:
+                    print(f"Warning: Could not compute audio fingerprint: {fp_err}")
+                    self.state.audio_fingerprint = None
+
             # No waveform data needed anymore
 
             if self.mixer_initialized:
@@ -81,7 +91,7 @@ class AudioHandler:
             self.state.status_message = f"Loaded audio: {self.state.get_audio_basename()}"
             # Trigger main UI update AFTER loading is complete
             # Include timeline_keyframes to ensure it redraws with the new duration/markers
-            self.update_ui(time=True, status=True, file_paths=True, keyframes=True, timeline_keyframes=True)
+            self.update_ui(time=True, status=True, file_paths=True, keyframes=True, timeline_keyframes=True, analysis=True)
             return True
 
         except Exception as e:
@@ -92,7 +102,7 @@ class AudioHandler:
             self.state.status_message = "Error loading audio."
             messagebox.showerror("Error", f"Failed to load audio file '{os.path.basename(file_path)}':\\n{e}")
             # Include timeline_keyframes to ensure it redraws in error state
-            self.update_ui(time=True, status=True, file_paths=True, keyframes=True, timeline_keyframes=True)
+            self.update_ui(time=True, status=True, file_paths=True, keyframes=True, timeline_keyframes=True, analysis=True)
             return False
 
 
@@ -274,7 +284,7 @@ class AudioHandler:
                  if self.state.is_playing:
                       self._start_internal_playback_tracking()
                  self.state.status_message = f"Visual playback speed set to {speed:.2f}x"
-                 self.update_ui(status=True)
+                 self.update_ui(status=True, speed=True)
 
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid speed value: {speed_str}\\n{e}")
@@ -33,16 +33,21 @@ class EventHandler:
             '<space>': lambda e: self.audio_h.toggle_playback(),
             '<Left>': lambda e: self.audio_h.skip_time(-SKIP_TIME_SECONDS),
             '<Right>': lambda e: self.audio_h.skip_time(SKIP_TIME_SECONDS),
-            '<k>': lambda e: self.keyframe_h.add_keyframe(self.audio_h.get_current_playback_position()),
+            '<k>': lambda e: self.keyframe_h.add_keyframe(self.audio_h.get_current_playback_position(), snap=True),
             '<Delete>': lambda e: self.keyframe_h.delete_keyframe(self.state.selected_keyframe_index),
             '<BackSpace>': lambda e: self.keyframe_h.delete_keyframe(self.state.selected_keyframe_index),
             '<Home>': lambda e: self.audio_h.seek(0),
             '<End>': lambda e: self.audio_h.seek(self.state.audio_duration) if self.state.has_audio() else None,
             '<Control-e>': lambda e: self.edit_selected_keyframe_time(),
+            '<Control-g>': self._get_command('toggle_snap'),
+            '<Control-z>': lambda e: self.keyframe_h.undo(),
+            '<Control-y>': lambda e: self.keyframe_h.redo(),
+            '<Control-Z>': lambda e: self.keyframe_h.redo(), # Ctrl+Shift+Z
              '<Control-s>': self._get_command('export_keyframes'),
              '<Control-o>': self._get_command('open_audio'),
              '<Control-l>': self._get_command('select_slides'),
              '<Control-i>': self._get_command('import_keyframes'),
+             '<F5>': self._get_command('rescan_slides'),
         }
 
     def _get_command(self, cmd_key):
@@ -87,6 +92,9 @@ class EventHandler:
                      timeline_instance = self.timeline_canvas.master # Get the TimelineCanvas frame instance
                      if hasattr(timeline_instance, '_on_click'):
                          self.timeline_canvas.bind("<Button-1>", timeline_instance._on_click)
+                         # Slide preview while hovering the filmstrip lane
+                         self.timeline_canvas.bind("<Motion>", timeline_instance._on_hover)
+                         self.timeline_canvas.bind("<Leave>", timeline_instance._on_leave)
                      else:
                           print("ERROR: TimelineCanvas instance missing _on_click method.")
 
@@ -147,11 +155,13 @@ class EventHandler:
         kf_index = self.state.selected_keyframe_index
         current_kf = self.state.keyframes[kf_index]
         current_time_str = f"{current_kf['time']:.3f}"
+        nearest_feature = self._describe_nearest_feature(current_kf['time'])
 
         new_time_str = simpledialog.askstring(
             "Edit Keyframe Time",
             f"Enter new time (in seconds) for Keyframe {kf_index + 1}:"
-            f"\nCurrent time: {format_time(current_kf['time'])}",
+            f"\nCurrent time: {format_time(current_kf['time'])}"
+            + (f"\n{nearest_feature}" if nearest_feature else ""),
             initialvalue=current_time_str, parent=self.root
         )
 
@@ -169,7 +179,7 @@ class EventHandler:
                     if not messagebox.askyesno("Confirm Edit", "The first keyframe is usually at 0.0s. Move it?", parent=self.root):
                          return
 
-                self.keyframe_h.update_keyframe_time(kf_index, new_time)
+                self.keyframe_h.update_keyframe_time(kf_index, new_time, snap=True) # No-op unless snapping is on (Ctrl+G)
 
             except ValueError:
                 messagebox.showerror("Invalid Input", "Invalid time format.\nPlease enter a number (e.g., 12.345).", parent=self.root)
@@ -181,5 +191,98 @@ class EventHandler:
                  if self.keyframes_listbox.winfo_exists(): self.keyframes_listbox.focus_set()
              except tk.TclError: pass
 
+    # --- Bulk Edit Dialogs ---
+    def _ask_numbers(self, title, prompt, initial, count):
+        '''Asks for `count` comma-separated numbers; returns a list of floats or None if cancelled/invalid.'''
+        if not self.root or not self.root.winfo_exists(): return None
+        if not self.state.has_audio():
+            messagebox.showwarning(title, "Cannot edit keyframes without loaded audio.", parent=self.root)
+            return None
+        answer = simpledialog.askstring(title, prompt, initialvalue=initial, parent=self.root)
+        if answer is None: return None
+        try:
+            values = [float(part) for part in answer.replace(';', ',').split(',') if part.strip()]
+            if len(values) != count: raise ValueError(f"expected {count} value(s), got {len(values)}")
+            return values
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", f"Could not read the values:\n{e}", parent=self.root)
+            return None
+
+    def _selected_time_or_playhead(self):
+        if 0 <= self.state.selected_keyframe_index < len(self.state.keyframes):
+            return self.state.keyframes.time_at(self.state.selected_keyframe_index)
+        return self.state.current_position
+
+    def ripple_shift_dialog(self):
+        '''Prompts for a time and shift, then ripples all later keyframes.'''
+        values = self._ask_numbers("Ripple Shift",
+            "Shift every keyframe at or after a time.\n"
+            "Enter: time (s), shift (s). A negative shift closes the gap before the time\n"
+            "(keyframes inside the gap are removed).",
+            f"{self._selected_time_or_playhead():.3f}, 0.000", 2)
+        if values: self.keyframe_h.ripple_shift(*values)
+
+    def scale_range_dialog(self):
+        '''Prompts for a source and target range, then re-times the keyframes inside it.'''
+        values = self._ask_numbers("Scale Time Range",
+            "Re-time keyframes from one range onto another.\n"
+            "Enter: start (s), end (s), new start (s), new end (s).",
+            f"0.000, {self.state.audio_duration:.3f}, 0.000, {self.state.audio_duration:.3f}", 4)
+        if values: self.keyframe_h.scale_range(*values)
+
+    def delete_range_dialog(self):
+        '''Prompts for a range and deletes the keyframes inside it.'''
+        start = self._selected_time_or_playhead()
+        values = self._ask_numbers("Delete Time Range",
+            "Delete all keyframes from start (inclusive) to end (exclusive).\nEnter: start (s), end (s).",
+            f"{start:.3f}, {min(start + 10.0, self.state.audio_duration):.3f}", 2)
+        if values: self.keyframe_h.delete_range(*values)
+
+    def quantize_dialog(self):
+        '''Prompts for a frame rate and snaps every keyframe to the nearest frame.'''
+        values = self._ask_numbers("Quantize to Frames", "Round all keyframe times to the nearest frame.\nEnter: frames per second.", "30", 1)
+        if not values: return
+        if values[0] <= 0:
+            messagebox.showerror("Invalid Input", "Frames per second must be positive.", parent=self.root)
+            return
+        self.keyframe_h.quantize_to_fps(values[0])
+
+    # --- Slide Assignment Dialogs ---
+    def _ask_slide_number(self, title, prompt, initial):
+        '''Asks for a 1-based slide number; returns the 0-based slide index or None.'''
+        answer = simpledialog.askinteger(title, prompt, initialvalue=initial, minvalue=1, parent=self.root)
+        return answer - 1 if answer is not None else None
+
+    def set_keyframe_slide_dialog(self):
+        '''Prompts for the slide the selected keyframe shows (slides may be shown by several keyframes).'''
+        if not self.root or not self.root.winfo_exists(): return
+        index = self.state.selected_keyframe_index
+        if not (0 <= index < len(self.state.keyframes)):
+            messagebox.showinfo("Set Slide", "Please select a keyframe in the list first.", parent=self.root)
+            return
+        current = self.state.keyframes.slide_at(index)
+        prompt = f"Slide number for keyframe {index + 1} at {format_time(self.state.keyframes.time_at(index))}:"
+        if self.state.has_slides(): prompt += f"\n({len(self.state.slide_files)} slides loaded)"
+        slide = self._ask_slide_number("Set Slide", prompt, max(current, 0) + 1)
+        if slide is not None: self.keyframe_h.set_keyframe_slide(index, slide)
+
+    def find_slide_dialog(self):
+        '''Prompts for a slide and jumps to the next keyframe that shows it.'''
+        if not self.root or not self.root.winfo_exists(): return
+        if not self.state.has_keyframes():
+            messagebox.showinfo("Find Slide", "There are no keyframes yet.", parent=self.root)
+            return
+        prompt = "Jump to the next keyframe showing slide number:"
+        if self.state.has_slides(): prompt += f"\n({self.state.slide_usage.summary(len(self.state.slide_files))})"
+        initial = self.state.current_slide_index + 1 if self.state.current_slide_index >= 0 else 1
+        slide = self._ask_slide_number("Find Slide", prompt, initial)
+        if slide is not None and self.keyframe_h.select_next_use_of_slide(slide):
+            self.audio_h.seek(self.state.keyframes.time_at(self.state.selected_keyframe_index))
+
+    def _describe_nearest_feature(self, time_seconds, window=1.0):
+        '''Hint text naming the closest analysis feature to a time ('' if none is near).'''
+        hit = self.state.snap_index.nearest(time_seconds, window, self.state.snap_kinds)
+        return f"Nearest {hit[1]}: {format_time(hit[0])}" if hit else ""
+
 
 # END OF FILE handlers/event_handler.py
\ No newline at end of file
@@ -2,55 +2,141 @@
 import json
 import os
 from tkinter import simpledialog, messagebox
+import numpy as np
+from keyframes import bulk
+from keyframes.store import to_ms
+from keyframes.io import read_keyframe_file
+from keyframes.export import compute_segments, write_exports, DEFAULT_EXPORT_FORMATS
+from analysis.fingerprint import AudioFingerprint, compare_fingerprints, MATCH_DIFFERENT, MATCH_SHIFTED
 # Ensure utils is importable
 try:
-    from utils import format_time, clamp
+    from utils import format_time, clamp, FINGERPRINT_FILE_SUFFIX
 except ImportError:
     print("ERROR: Cannot import from utils.py in keyframe_handler. Ensure it's accessible.")
     # Define fallbacks
     def format_time(s): return f"{s:.3f}s"
     def clamp(v, mn, mx): return max(mn, min(v, mx))
+    FINGERPRINT_FILE_SUFFIX = '.audiofp.json'
 
 class KeyframeHandler:
     '''Handles keyframe creation, deletion, modification, import, and export.'''
 
-    def __init__(self, app_state, update_callback):
+    def __init__(self, app_state, update_callback, task_runner=None):
         self.state = app_state
         self.update_ui = update_callback
+        self.tasks = task_runner # Background exports; None exports on the calling thread
+        self._export_running = False
 
-    def add_keyframe(self, time_seconds):
-        '''Adds a new keyframe at the specified time.'''
+    def add_keyframe(self, time_seconds, snap=False):
+        '''Adds a new keyframe at the specified time (optionally snapped to a feature).'''
         if not self.state.has_audio():
             messagebox.showinfo("Info", "Please load an audio file first.")
             return False
 
+        snapped_kind = None
+        if snap: time_seconds, snapped_kind = self._snap_time(time_seconds)
         time_seconds = clamp(time_seconds, 0, self.state.audio_duration)
         time_seconds = round(time_seconds, 3)
 
         min_distance = 0.010
-        for kf in self.state.keyframes:
-            if abs(kf['time'] - time_seconds) < min_distance:
-                self.state.status_message = f"Keyframe already exists near {format_time(time_seconds)}"
-                self.update_ui(status=True)
-                existing_index = self.find_keyframe_index(kf['time'])
-                if existing_index != -1:
-                     self.select_keyframe(existing_index)
-                return False
-
-        new_keyframe = {'time': time_seconds, 'slideIndex': -1}
-        self.state.keyframes.append(new_keyframe)
-        self._sort_and_update_indices()
+        new_index, inserted = self.state.keyframes.add(time_seconds, self._next_slide_for(time_seconds), min_distance)
+        if not inserted:
+            self.state.status_message = f"Keyframe already exists near {format_time(time_seconds)}"
+            self.update_ui(status=True)
+            self.select_keyframe(new_index)
+            return False
 
+        self._validate_selection()
+        self.state.edit_history.record_insert("Add keyframe", [self.state.keyframes.time_ms_at(new_index)],
+                                              [self.state.keyframes.slide_at(new_index)])
         self.state.status_message = f"Added keyframe at {format_time(time_seconds)}"
-        new_index = self.find_keyframe_index(time_seconds)
-        if new_index != -1:
-            self.state.selected_keyframe_index = new_index
-            # Update list, timeline, selection, status
-            self.update_ui(keyframes=True, timeline_keyframes=True, status=True, keyframes_list_selection=True)
-        else:
-             print(f"Warning: Could not re-find keyframe just added at {time_seconds:.3f}s after sorting.")
-             self.update_ui(keyframes=True, timeline_keyframes=True, status=True)
+        if snapped_kind: self.state.status_message += f" (snapped to {snapped_kind})"
+        self.state.selected_keyframe_index = new_index
+        # Update list, timeline, selection, status
+        self.update_ui(keyframes=True, timeline_keyframes=True, status=True, keyframes_list_selection=True)
+        return True
+
+    def add_keyframes(self, times_seconds, source="candidates"):
+        '''Adds several keyframes at once (one sort, one UI refresh). Near-duplicates are skipped.'''
+        if not self.state.has_audio():
+            messagebox.showinfo("Info", "Please load an audio file first.")
+            return 0
+
+        min_distance = 0.010
+        new_times = sorted({round(clamp(float(t), 0, self.state.audio_duration), 3) for t in times_seconds})
+        accepted = []
+        for t in new_times:
+            if accepted and t - accepted[-1] < min_distance: continue
+            if self.state.keyframes.nearest(t, tolerance=min_distance - 0.001) != -1: continue
+            accepted.append(t)
+
+        if accepted:
+            selected = self.state.selected_keyframe_index
+            selected_time = self.state.keyframes.time_at(selected) if 0 <= selected < len(self.state.keyframes) else None
+            accepted_ms = np.array([int(round(t * 1000)) for t in accepted], dtype=np.int64)
+            accepted_slides = self._next_slides_for(accepted_ms)
+            self.state.keyframes.extend(accepted, accepted_slides)
+            self.state.edit_history.record_insert(f"Add keyframes from {source}", accepted_ms, accepted_slides)
+            self.state.selected_keyframe_index = self.find_keyframe_index(selected_time) if selected_time is not None else -1
+            self._validate_selection()
+        added = len(accepted)
+        skipped = len(new_times) - added
+        self.state.status_message = f"Added {added} keyframe(s) from {source}"
+        if skipped: self.state.status_message += f" ({skipped} already had a keyframe nearby)"
+        print(self.state.status_message)
+        self.update_ui(keyframes=True, timeline_keyframes=True, status=True, keyframes_list_selection=True, current_slide=True)
+        return added
+
+    # --- Bulk operations (one vectorized pass, one history entry, one UI refresh each) ---
+    def ripple_shift(self, at_seconds, delta_seconds):
+        '''Shifts all keyframes at/after a time; a negative shift closes the gap before it.'''
+        new_ms, keep = bulk.ripple_shift(self.state.keyframes.times_ms(), to_ms(at_seconds), to_ms(delta_seconds),
+                                         to_ms(self.state.audio_duration))
+        return self._apply_bulk(f"Ripple shift by {delta_seconds:+.3f}s from {format_time(at_seconds)}", new_ms, keep)
+
+    def scale_range(self, start_seconds, end_seconds, new_start_seconds, new_end_seconds):
+        '''Linearly re-times keyframes in [start, end] onto [new_start, new_end].'''
+        new_ms, keep = bulk.scale_range(self.state.keyframes.times_ms(), to_ms(start_seconds), to_ms(end_seconds),
+                                        to_ms(new_start_seconds), to_ms(new_end_seconds))
+        return self._apply_bulk(f"Scale {format_time(start_seconds)}-{format_time(end_seconds)}", new_ms, keep)
+
+    def delete_range(self, start_seconds, end_seconds):
+        '''Deletes keyframes in [start, end) (the initial keyframe at 0.0s is kept).'''
+        new_ms, keep = bulk.delete_range(self.state.keyframes.times_ms(), to_ms(start_seconds), to_ms(end_seconds))
+        return self._apply_bulk(f"Delete {format_time(start_seconds)}-{format_time(end_seconds)}", new_ms, keep)
+
+    def quantize_to_fps(self, fps, start_seconds=None, end_seconds=None):
+        '''Rounds keyframe times (optionally within a range) to the nearest video frame.'''
+        new_ms, keep = bulk.quantize(self.state.keyframes.times_ms(), float(fps),
+                                     to_ms(start_seconds) if start_seconds is not None else None,
+                                     to_ms(end_seconds) if end_seconds is not None else None)
+        return self._apply_bulk(f"Quantize to {fps:g} fps", new_ms, keep)
+
+    def _apply_bulk(self, label, new_ms, keep):
+        '''Applies a bulk re-timing result as a single store edit and history entry.'''
+        if not self.state.has_audio():
+            messagebox.showinfo("Info", "Please load an audio file first.")
+            return False
+        store = self.state.keyframes
+        old_ms, slides = store.times_ms(), store.slides()
+        new_ms = np.clip(new_ms, 0, to_ms(self.state.audio_duration))
+        keep = bulk.resolve_collisions(old_ms, new_ms, keep)
+        changed = ~keep | (new_ms != old_ms)
+        added = changed & keep
+        num_deleted = int(np.count_nonzero(~keep))
+        num_moved = int(np.count_nonzero(added))
+        if not np.any(changed):
+            self.state.status_message = f"{label}: no keyframes affected."
+            self.update_ui(status=True)
+            return False
 
+        store.apply_change(old_ms[changed], new_ms[added], slides[added], slides[changed])
+        self.state.edit_history.record(label, old_ms[changed], slides[changed], new_ms[added], slides[added])
+        self.state.selected_keyframe_index = -1
+        self._validate_selection()
+        self.state.status_message = f"{label}: {num_moved} keyframe(s) re-timed, {num_deleted} removed."
+        print(self.state.status_message)
+        self.update_ui(keyframes=True, timeline_keyframes=True, keyframes_list_selection=True, status=True, current_slide=True)
         return True
 
     def delete_keyframe(self, index):
@@ -72,25 +158,29 @@ class KeyframeHandler:
             messagebox.showwarning("Delete Warning", "Cannot delete the initial keyframe at 0.0 seconds.")
             return False
 
-        deleted_time = self.state.keyframes[index]['time']
+        deleted_time = self.state.keyframes.time_at(index)
         print(f"Deleting keyframe at index {index}, time {format_time(deleted_time)}")
-        del self.state.keyframes[index]
+        self.state.edit_history.record_delete("Delete keyframe", [self.state.keyframes.time_ms_at(index)],
+                                              [self.state.keyframes.slide_at(index)])
+        self.state.keyframes.delete(index)
 
         self.state.selected_keyframe_index = -1
-        self._sort_and_update_indices()
+        self._validate_selection()
 
         self.state.status_message = f"Deleted keyframe at {format_time(deleted_time)}"
         # Update list, timeline, selection, status
         self.update_ui(keyframes=True, timeline_keyframes=True, keyframes_list_selection=True, status=True)
         return True
 
-    def update_keyframe_time(self, index, new_time_seconds):
+    def update_keyframe_time(self, index, new_time_seconds, snap=False):
         '''Updates the time of a specific keyframe and re-sorts.'''
         if not (0 <= index < len(self.state.keyframes)):
             print(f"Error: update_keyframe_time called with invalid index {index}")
             return False
 
-        original_time = self.state.keyframes[index]['time']
+        snapped_kind = None
+        if snap: new_time_seconds, snapped_kind = self._snap_time(new_time_seconds)
+        original_time = self.state.keyframes.time_at(index)
         new_time_seconds = clamp(new_time_seconds, 0, self.state.audio_duration)
         new_time_seconds = round(new_time_seconds, 3)
 
@@ -98,13 +188,13 @@ class KeyframeHandler:
 
         min_distance = 0.001
         if index > 0:
-             prev_kf_time = self.state.keyframes[index - 1]['time']
+             prev_kf_time = self.state.keyframes.time_at(index - 1)
              if new_time_seconds <= prev_kf_time:
                   new_time_seconds = prev_kf_time + min_distance
                   print(f"Clamping time to maintain minimum distance from previous keyframe.")
 
         if index < len(self.state.keyframes) - 1:
-             next_kf_time = self.state.keyframes[index + 1]['time']
+             next_kf_time = self.state.keyframes.time_at(index + 1)
              if new_time_seconds >= next_kf_time:
                   new_time_seconds = next_kf_time - min_distance
                   print(f"Clamping time to maintain minimum distance from next keyframe.")
@@ -115,42 +205,164 @@ class KeyframeHandler:
         if abs(new_time_seconds - original_time) < 0.0005: return False
 
         print(f"Updating keyframe {index} time from {original_time:.3f} to {new_time_seconds:.3f}")
-        self.state.keyframes[index]['time'] = new_time_seconds
-        self._sort_and_update_indices()
-
-        current_selected_index = self.find_keyframe_index(new_time_seconds)
-        if current_selected_index != -1:
-            if self.state.selected_keyframe_index != current_selected_index:
-                 print(f"Keyframe {index} moved to index {current_selected_index} after sort.")
-                 self.state.selected_keyframe_index = current_selected_index
-                 self.update_ui(keyframes_list_selection=True)
-        else:
-             print(f"Warning: Could not find keyframe at {new_time_seconds:.3f} after update/sort.")
-             self.state.selected_keyframe_index = -1
+        old_ms, slide_index = self.state.keyframes.time_ms_at(index), self.state.keyframes.slide_at(index)
+        current_selected_index = self.state.keyframes.move(index, new_time_seconds)
+        self._validate_selection()
+        self.state.edit_history.record_move("Move keyframe", old_ms, self.state.keyframes.time_ms_at(current_selected_index),
+                                            slide_index)
+        if self.state.selected_keyframe_index != current_selected_index:
+             print(f"Keyframe {index} moved to index {current_selected_index}.")
+             self.state.selected_keyframe_index = current_selected_index
              self.update_ui(keyframes_list_selection=True)
 
         self.state.status_message = f"Updated keyframe {self.state.selected_keyframe_index + 1} time to {format_time(new_time_seconds)}"
+        if snapped_kind: self.state.status_message += f" (snapped to {snapped_kind})"
         # Update timeline and status. List updated on release if dragging.
         self.update_ui(timeline_keyframes=True, status=True)
         return True
 
-    def _sort_and_update_indices(self):
-        '''Sorts keyframes by time, updates slideIndex, and tries to preserve selection.'''
-        selected_object_id = None
-        if 0 <= self.state.selected_keyframe_index < len(self.state.keyframes):
-             try: selected_object_id = id(self.state.keyframes[self.state.selected_keyframe_index])
-             except IndexError: self.state.selected_keyframe_index = -1
+    def undo(self):
+        '''Reverts the most recent keyframe edit.'''
+        return self._step_history(undo=True)
+
+    def redo(self):
+        '''Re-applies the most recently undone keyframe edit.'''
+        return self._step_history(undo=False)
+
+    def _step_history(self, undo):
+        history = self.state.edit_history
+        verb = "Undo" if undo else "Redo"
+        try:
+            delta = history.undo(self.state.keyframes) if undo else history.redo(self.state.keyframes)
+        except ValueError as e: # Keyframes no longer match the recorded edit
+            print(f"{verb} failed, clearing edit history: {e}")
+            history.clear()
+            self.state.status_message = f"{verb} failed: edit history was out of date and has been cleared."
+            self.update_ui(status=True)
+            return False
+        if delta is None:
+            self.state.status_message = f"Nothing to {verb.lower()}."
+            self.update_ui(status=True)
+            return False
+
+        self._validate_selection()
+        # Select the keyframe a single-keyframe edit landed on, if any
+        landed = delta.removed_ms if undo else delta.added_ms
+        self.state.selected_keyframe_index = self.find_keyframe_index(landed[0] / 1000.0) if len(landed) == 1 else -1
+        self.state.status_message = f"{verb}: {delta.label}"
+        print(self.state.status_message)
+        self.update_ui(keyframes=True, timeline_keyframes=True, keyframes_list_selection=True, status=True, current_slide=True)
+        return True
+
+    def _snap_time(self, time_seconds):
+        '''Returns (time, feature_kind) snapped to the nearest feature, or (time, None).'''
+        if not self.state.snap_enabled or not self.state.snap_index:
+            return time_seconds, None
+        hit = self.state.snap_index.nearest(time_seconds, self.state.snap_window, self.state.snap_kinds)
+        return hit if hit is not None else (time_seconds, None)
+
+    def _validate_selection(self):
+        '''Clears the selection if an edit left it out of range (the store keeps keyframes sorted).'''
+        if not (0 <= self.state.selected_keyframe_index < len(self.state.keyframes)):
+            self.state.selected_keyframe_index = -1
+
+    def _next_slide_for(self, time_seconds):
+        '''Slide for a new keyframe: the one after the slide shown at that time (slide 0 before any keyframe).'''
+        previous = self.state.keyframes.index_at_or_before(time_seconds)
+        return self.state.keyframes.slide_at(previous) + 1 if previous != -1 else 0
+
+    def _next_slides_for(self, new_times_ms):
+        '''Vectorized _next_slide_for for sorted new times: new keyframes in one gap get consecutive slides.'''
+        times, slides = self.state.keyframes.times_ms(), self.state.keyframes.slides()
+        previous = np.searchsorted(times, new_times_ms, side='right') - 1
+        base = np.where(previous >= 0, slides[np.maximum(previous, 0)] + 1, 0) if len(times) else np.zeros(len(previous), dtype=np.int64)
+        rank = np.arange(len(previous)) - np.searchsorted(previous, previous, side='left')
+        return (base + rank).astype(np.int64)
+
+    # --- Slide assignment ---
+    def set_keyframe_slide(self, index, slide_index):
+        '''Points one keyframe at a slide (0-based); other keyframes keep theirs.'''
+        store = self.state.keyframes
+        if not (0 <= index < len(store)):
+            self.state.status_message = "No keyframe selected."
+            self.update_ui(status=True)
+            return False
+        if slide_index < 0:
+            messagebox.showerror("Invalid Slide", "Slide numbers start at 1.")
+            return False
+        old_slide = store.slide_at(index)
+        if slide_index == old_slide: return False
+        time_ms = store.time_ms_at(index)
+        store.set_slide(index, slide_index)
+        self.state.edit_history.record("Set keyframe slide", [time_ms], [old_slide], [time_ms], [slide_index])
+        self.state.status_message = f"Keyframe {index + 1} now shows slide {slide_index + 1}"
+        if self.state.has_slides() and slide_index >= len(self.state.slide_files):
+            self.state.status_message += f" (only {len(self.state.slide_files)} slides are loaded)"
+        self.update_ui(keyframes=True, timeline_keyframes=True, keyframes_list_selection=True, status=True, current_slide=True)
+        return True
+
+    def renumber_slides(self):
+        '''Assigns slides 1, 2, 3... to the keyframes in time order (the old positional mapping).'''
+        store = self.state.keyframes
+        if not store: return False
+        times_ms, old_slides = store.times_ms(), store.slides()
+        if np.array_equal(old_slides, np.arange(len(store))):
+            self.state.status_message = "Slides already follow keyframe order."
+            self.update_ui(status=True)
+            return False
+        store.renumber_slides()
+        self.state.edit_history.record("Renumber slides", times_ms, old_slides, times_ms, store.slides())
+        self.state.status_message = f"Renumbered slides for {len(store)} keyframes."
+        self.update_ui(keyframes=True, timeline_keyframes=True, keyframes_list_selection=True, status=True, current_slide=True)
+        return True
 
-        self.state.keyframes.sort(key=lambda kf: kf['time'])
+    def merge_similar_slide_keyframes(self, similar):
+        '''Merges runs of consecutive keyframes whose slides are near-duplicates (e.g. animation builds).
+
+        similar(a, b) tells whether slides a and b look the same. Each run
+        keeps its first keyframe's time and shows its last slide (the complete
+        build); the rest of the run is removed. One history entry.
+        '''
+        store = self.state.keyframes
+        times_ms, slides = store.times_ms(), store.slides()
+        removed, added_ms, added_slides = [], [], []
+        start = 0
+        for i in range(1, len(store) + 1):
+            if i < len(store) and similar(int(slides[i - 1]), int(slides[i])): continue
+            if i - start > 1:
+                removed.extend(range(start, i))
+                added_ms.append(times_ms[start])
+                added_slides.append(slides[i - 1])
+            start = i
+        if not removed:
+            self.state.status_message = "No consecutive keyframes show near-duplicate slides."
+            self.update_ui(status=True)
+            return False
 
-        new_selected_index = -1
-        for i, kf in enumerate(self.state.keyframes):
-            kf['slideIndex'] = i
-            if selected_object_id is not None and id(kf) == selected_object_id:
-                 new_selected_index = i
+        store.apply_change(times_ms[removed], added_ms, added_slides, slides[removed])
+        self.state.edit_history.record("Merge keyframes of near-duplicate slides", times_ms[removed], slides[removed],
+                                       added_ms, added_slides)
+        self.state.selected_keyframe_index = -1
+        self._validate_selection()
+        self.state.status_message = (f"Merged {len(removed)} keyframes into {len(added_ms)} "
+                                     f"({len(removed) - len(added_ms)} removed).")
+        print(self.state.status_message)
+        self.update_ui(keyframes=True, timeline_keyframes=True, keyframes_list_selection=True, status=True, current_slide=True)
+        return True
 
-        if self.state.selected_keyframe_index != new_selected_index:
-            self.state.selected_keyframe_index = new_selected_index
+    def select_next_use_of_slide(self, slide_index):
+        '''Selects and seeks to the next keyframe (after the playhead, wrapping) that shows a slide.'''
+        usage = self.state.slide_usage
+        time_ms = usage.next_use(slide_index, int(round(self.state.current_position * 1000)))
+        if time_ms is None:
+            self.state.status_message = f"Slide {slide_index + 1} is not shown by any keyframe."
+            self.update_ui(status=True)
+            return False
+        self.select_keyframe(usage.keyframe_at(slide_index, time_ms)) # Not just any keyframe at that time
+        self.state.status_message = (f"Slide {slide_index + 1} at {format_time(time_ms / 1000.0)} "
+                                     f"(shown {usage.count(slide_index)}x)")
+        self.update_ui(status=True)
+        return True
 
 
     def select_keyframe(self, index):
@@ -165,7 +377,7 @@ class KeyframeHandler:
             self.state.selected_keyframe_index = index
             if index != -1:
                 try:
-                     kf_time = self.state.keyframes[index]['time']
+                     kf_time = self.state.keyframes.time_at(index)
                      self.state.status_message = f"Selected keyframe {index + 1} at {format_time(kf_time)}"
                 except IndexError:
                      self.state.status_message = "Selection error."
@@ -180,12 +392,7 @@ class KeyframeHandler:
 
     def find_keyframe_index(self, time_seconds):
         '''Finds the index of a keyframe exactly matching the time (within tolerance).'''
-        if not self.state.keyframes: return -1
-        tolerance = 0.0005
-        for i, kf in enumerate(self.state.keyframes):
-            if abs(kf['time'] - time_seconds) < tolerance:
-                return i
-        return -1
+        return self.state.keyframes.find(time_seconds, tolerance=0.0005)
 
 
     def get_formatted_keyframes(self):
@@ -195,86 +402,87 @@ class KeyframeHandler:
             return ["No keyframes defined"]
 
         num_keyframes = len(self.state.keyframes)
-        try: max_slide_num_width = len(str(num_keyframes)) if num_keyframes > 0 else 1
-        except: max_slide_num_width = 1
-
-        for i, kf in enumerate(self.state.keyframes):
-            time_str = format_time(kf['time'])
-            slide_num = i + 1
-            slide_num_str = f"{slide_num:<{max_slide_num_width}}"
-            formatted.append(f"Slide {slide_num_str}: {time_str}")
+        keyframes = self.state.keyframes
+        lint = self.state.lint
+        usage = self.state.slide_usage
+        max_slide_num_width = len(str(max(keyframes.slides().max() + 1, 1)))
+        for i in range(num_keyframes):
+            time_str = format_time(keyframes.time_at(i))
+            slide = keyframes.slide_at(i)
+            slide_num_str = f"{slide + 1:<{max_slide_num_width}}"
+            repeat = f"  (x{usage.count(slide)})" if usage.count(slide) > 1 else ""
+            finding = f"  ! {lint.describe(i)}" if lint.flags_at(i) else ""
+            formatted.append(f"Slide {slide_num_str}: {time_str}{repeat}{finding}")
         return formatted
 
 
-    def export_keyframes(self, file_path):
-        '''Exports keyframes to a JSON file in the specified format.'''
+    def export_keyframes(self, file_path, formats=None):
+        '''Exports keyframes to the selected formats on a background worker.
+
+        Segments are computed here from a snapshot of the store; the files are
+        written by keyframes.export, each to a temp file renamed into place.
+        '''
         if not self.state.has_keyframes():
             messagebox.showinfo("Export Info", "No keyframes to export.")
             return False
+        if self._export_running:
+            messagebox.showinfo("Export Info", "An export is already running.")
+            return False
 
         audio_available = self.state.has_audio()
         if not audio_available:
              messagebox.showwarning("Export Warning", "Audio not loaded or has zero duration. Last keyframe duration may be inaccurate (calculated as 0).")
 
-        try:
-            export_data = []
-            num_keyframes = len(self.state.keyframes)
-            if num_keyframes == 0:
-                 messagebox.showinfo("Export Info", "No keyframes to export.")
-                 return False
-
-            sorted_keyframes = sorted(self.state.keyframes, key=lambda kf: kf['time'])
-
-            for i in range(num_keyframes):
-                kf = sorted_keyframes[i]
-                start_time = kf['time']
-                if i < num_keyframes - 1: end_time = sorted_keyframes[i + 1]['time']
-                else: end_time = self.state.audio_duration if audio_available and self.state.audio_duration > 0 else start_time
-                duration = max(0, end_time - start_time)
-                duration = round(duration, 3)
-                image_number = kf['slideIndex'] + 1
-                actual_image_name = self.state.get_slide_filename_for_index(kf['slideIndex'])
-                image_name = actual_image_name if actual_image_name != "N/A" else f"{image_number}.png"
-                export_data.append({"image_number": image_number, "image_name": image_name, "Duration": duration})
-
-            print(f"Exporting {len(export_data)} keyframes to {file_path}")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2)
-
-            text_path = os.path.splitext(file_path)[0] + '.txt'
-            try:
-                 print(f"Writing text summary to {text_path}")
-                 with open(text_path, 'w', encoding='utf-8') as f_txt:
-                      f_txt.write(f"Audio File: {self.state.get_audio_basename()}\\n")
-                      f_txt.write(f"Total Duration: {format_time(self.state.audio_duration) if audio_available else 'N/A'}\\n")
-                      f_txt.write(f"Slides Folder: {self.state.get_slides_basename()}\\n")
-                      f_txt.write("-" * 30 + "\\n")
-                      f_txt.write(f"Exported {len(export_data)} Keyframes/Segments:\\n\\n")
-                      total_calc_duration = 0
-                      for item_index, item in enumerate(export_data):
-                           kf_time = sorted_keyframes[item_index]['time']
-                           f_txt.write(f"#{item_index + 1}\\n")
-                           f_txt.write(f"  Slide: {item['image_name']} (Number: {item['image_number']})\\n")
-                           f_txt.write(f"  Appears at: {format_time(kf_time)}\\n")
-                           f_txt.write(f"  Duration: {item['Duration']:.3f}s\\n\\n")
-                           total_calc_duration += item['Duration']
-                      f_txt.write("-" * 30 + "\\n")
-                      f_txt.write(f"Sum of durations: {total_calc_duration:.3f}s\\n")
-            except Exception as txt_err: print(f"Warning: Could not write text summary file '{text_path}': {txt_err}")
-
-            self.state.status_message = f"Exported {len(export_data)} keyframes to {os.path.basename(file_path)}"
-            self.update_ui(status=True)
-            messagebox.showinfo("Export Successful", f"Exported {len(export_data)} keyframes to:\\n{file_path}\\n(and .txt summary)")
+        formats = list(formats or DEFAULT_EXPORT_FORMATS)
+        end_ms = to_ms(self.state.audio_duration) if audio_available else 0
+        segments = compute_segments(self.state.keyframes.times_ms(), self.state.keyframes.slides(), end_ms, list(self.state.slide_files))
+        meta = {'audio_name': self.state.get_audio_basename(),
+                'total_duration': format_time(self.state.audio_duration) if audio_available else 'N/A',
+                'slides_name': self.state.get_slides_basename()}
+        extra_files = {}
+        if self.state.audio_fingerprint is not None:
+            fp_path = os.path.splitext(file_path)[0] + FINGERPRINT_FILE_SUFFIX
+            extra_files[fp_path] = json.dumps({"audio_file": self.state.get_audio_basename(),
+                                               "fingerprint": self.state.audio_fingerprint.to_dict()})
+
+        count = len(segments['starts_ms'])
+        print(f"Exporting {count} keyframes to {file_path} ({', '.join(formats)})")
+        self.state.status_message = f"Exporting {count} keyframes..."
+        self.update_ui(status=True)
+        if self.tasks is None: # No worker pool: export inline
+            try: self._on_export_done(file_path, count, write_exports(file_path, formats, segments, meta, extra_files))
+            except Exception as e: self._on_export_error(e)
             return True
 
-        except Exception as e:
-            import traceback
-            print("Export Error Traceback:")
-            traceback.print_exc()
-            self.state.status_message = "Keyframe export failed."
-            self.update_ui(status=True)
-            messagebox.showerror("Export Error", f"Failed to export keyframes:\\n{e}")
-            return False
+        self._export_running = True
+        self.tasks.submit(write_exports, file_path, formats, segments, meta, extra_files, self._post_export_progress,
+                          on_done=lambda paths: self._on_export_done(file_path, count, paths),
+                          on_error=self._on_export_error)
+        return True
+
+    def _post_export_progress(self, done, total):
+        '''Worker: forwards export progress to the Tk thread.'''
+        self.tasks.post(self._show_export_progress, done, total)
+
+    def _show_export_progress(self, done, total):
+        if not self._export_running: return
+        self.state.status_message = f"Exporting keyframes... {done}/{total}"
+        self.update_ui(status=True)
+
+    def _on_export_done(self, file_path, count, paths):
+        self._export_running = False
+        self.state.status_message = f"Exported {count} keyframes to {os.path.basename(file_path)}"
+        self.update_ui(status=True)
+        names = "\n".join(os.path.basename(p) for p in paths)
+        messagebox.showinfo("Export Successful", f"Exported {count} keyframes to {os.path.dirname(file_path) or '.'}:\n{names}")
+        print(f"Export finished: {len(paths)} file(s) written.")
+
+    def _on_export_error(self, error):
+        self._export_running = False
+        print(f"Export failed: {error}")
+        self.state.status_message = "Keyframe export failed."
+        self.update_ui(status=True)
+        messagebox.showerror("Export Error", f"Failed to export keyframes (no files were replaced):\n{error}")
 
 
     def import_keyframes(self, file_path):
@@ -285,60 +493,53 @@ class KeyframeHandler:
 
         try:
             print(f"Attempting to import keyframes from: {file_path}")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                imported_data = json.load(f)
+            imported = read_keyframe_file(file_path) # Streams and validates; errors name the failing item
+            new_times_ms = imported['times_ms']
+            new_slides = imported['image_numbers'] - 1 # Each item names its slide; repeats are allowed
+            total_duration_from_import = int(imported['durations_ms'].sum()) / 1000.0
+            if imported['negative_durations']:
+                print(f"Warning: {imported['negative_durations']} item(s) had negative durations. Using 0.")
+            repeated = len(new_slides) - len(np.unique(new_slides))
+            if repeated: print(f"Note: {repeated} imported item(s) show a slide that an earlier item already shows.")
 
-            if not isinstance(imported_data, list): raise ValueError("Invalid format: JSON root should be a list.")
-            if not imported_data: raise ValueError("Import file is empty or contains no keyframe data.")
-
-            new_keyframes = []
-            current_time = 0.0
-            total_duration_from_import = 0.0
             slide_match_warning_details = ""
-            num_imported = len(imported_data)
             num_slides = len(self.state.slide_files)
-
-            if self.state.has_slides() and num_imported != num_slides:
-                 slide_match_warning_details = (f"\\n\\nWarning: File has {num_imported} segments, "
-                                                f"but {num_slides} slides are loaded. "
-                                                f"Slide assignments may be offset.")
-
-            for i, item in enumerate(imported_data):
-                if not isinstance(item, dict): raise ValueError(f"Invalid format: Item {i+1} is not a dictionary.")
-                req_keys = ["image_number", "image_name", "Duration"]
-                if not all(k in item for k in req_keys):
-                     missing = [k for k in req_keys if k not in item]
-                     raise ValueError(f"Invalid format: Item {i+1} missing required key(s): {', '.join(missing)}")
-
-                try:
-                     duration = float(item["Duration"])
-                     image_number = int(item["image_number"])
-                except (ValueError, TypeError) as type_err: raise ValueError(f"Invalid data type in item {i+1}: {type_err}") from type_err
-
-                if duration < 0:
-                     print(f"Warning: Item {i+1} has negative duration ({duration:.3f}s). Using 0.")
-                     duration = 0
-
-                kf_time = round(current_time, 3)
-                slide_index = i
-
-                if image_number != (i + 1):
-                     print(f"Note: Imported item {i+1} has image_number {image_number}, expected {i+1} based on order.")
-
-                new_keyframes.append({'time': kf_time, 'slideIndex': slide_index})
-                current_time += duration
-                total_duration_from_import += duration
+            out_of_range = int(np.count_nonzero((new_slides < 0) | (new_slides >= num_slides)))
+
+            if self.state.has_slides() and out_of_range:
+                 slide_match_warning_details = (f"\n\nWarning: {out_of_range} imported segment(s) refer to slides "
+                                                f"beyond the {num_slides} loaded slides.")
+
+            # Fingerprint check (if the file was exported with a sidecar) supersedes the duration check
+            fingerprint_match = self._check_audio_fingerprint(file_path)
+            if fingerprint_match is not None:
+                if fingerprint_match.verdict == MATCH_DIFFERENT:
+                    if not messagebox.askyesno("Audio Mismatch",
+                            "These keyframes appear to belong to a different recording.\n"
+                            f"{fingerprint_match.describe()}\n\nImport anyway?"):
+                        self.state.status_message = "Import cancelled (audio mismatch)."
+                        self.update_ui(status=True)
+                        print("Import cancelled: fingerprint mismatch.")
+                        return False
+                elif fingerprint_match.verdict == MATCH_SHIFTED and abs(fingerprint_match.offset_seconds) >= 0.05:
+                    if messagebox.askyesno("Audio Offset Detected",
+                            f"{fingerprint_match.describe()}\n\n"
+                            f"Shift imported keyframes by {fingerprint_match.offset_seconds:+.3f}s "
+                            f"to line up with the loaded audio?"):
+                        new_times_ms, new_slides = self._shift_keyframes(new_times_ms, new_slides, fingerprint_match.offset_seconds)
 
             duration_diff = abs(total_duration_from_import - self.state.audio_duration)
             duration_warning_details = ""
-            if self.state.has_audio() and duration_diff > 0.5:
+            # A confirmed fingerprint match makes the coarse duration comparison redundant
+            same_audio_confirmed = fingerprint_match is not None and fingerprint_match.verdict != MATCH_DIFFERENT
+            if self.state.has_audio() and duration_diff > 0.5 and not same_audio_confirmed:
                  duration_warning_details = (
                      f"\\n\\nWarning: Imported duration ({format_time(total_duration_from_import)}) "
                      f"differs significantly from audio duration ({format_time(self.state.audio_duration)}). "
                      f"Timings relative to audio end may be inaccurate."
                  )
 
-            confirm_msg = f"Replace {len(self.state.keyframes)} existing keyframe(s) with {len(new_keyframes)} imported keyframe(s)?"
+            confirm_msg = f"Replace {len(self.state.keyframes)} existing keyframe(s) with {len(new_times_ms)} imported keyframe(s)?"
             confirm_msg += slide_match_warning_details
             confirm_msg += duration_warning_details
 
@@ -349,14 +550,17 @@ class KeyframeHandler:
                     print("Import cancelled by user.")
                     return False
 
-            print(f"Replacing {len(self.state.keyframes)} keyframes with {len(new_keyframes)} imported.")
-            self.state.keyframes = new_keyframes
+            print(f"Replacing {len(self.state.keyframes)} keyframes with {len(new_times_ms)} imported.")
+            old_times_ms, old_slides = self.state.keyframes.times_ms(), self.state.keyframes.slides()
+            self.state.keyframes.load_ms(new_times_ms, new_slides)
+            self.state.edit_history.record("Import keyframes", old_times_ms, old_slides,
+                                           self.state.keyframes.times_ms(), self.state.keyframes.slides())
             self.state.selected_keyframe_index = -1
 
-            self.state.status_message = f"Imported {len(new_keyframes)} keyframes from {os.path.basename(file_path)}"
+            self.state.status_message = f"Imported {len(new_times_ms)} keyframes from {os.path.basename(file_path)}"
             # Update UI fully after import - includes timeline now
             self.update_ui(keyframes=True, timeline_keyframes=True, status=True, keyframes_list_selection=True, current_slide=True)
-            messagebox.showinfo("Import Successful", f"Successfully imported {len(new_keyframes)} keyframes.")
+            messagebox.showinfo("Import Successful", f"Successfully imported {len(new_times_ms)} keyframes.")
             print("Import successful.")
             return True
 
@@ -387,5 +591,35 @@ class KeyframeHandler:
             messagebox.showerror("Import Error", f"An unexpected error occurred during import:\\n{e}")
             return False
 
+    def _check_audio_fingerprint(self, file_path):
+        '''Compares the fingerprint sidecar of a keyframe file against the loaded audio.
+
+        Returns a FingerprintMatch, or None if either fingerprint is unavailable.
+        '''
+        fp_path = os.path.splitext(file_path)[0] + FINGERPRINT_FILE_SUFFIX
+        if self.state.audio_fingerprint is None or not os.path.isfile(fp_path):
+            return None
+        try:
+            with open(fp_path, 'r', encoding='utf-8') as f_fp:
+                file_fingerprint = AudioFingerprint.from_dict(json.load(f_fp).get("fingerprint"))
+            match = compare_fingerprints(self.state.audio_fingerprint, file_fingerprint)
+            print(f"Audio fingerprint check against {os.path.basename(fp_path)}: {match}")
+            return match
+        except Exception as e:
+            print(f"Warning: Could not check audio fingerprint '{fp_path}': {e}")
+            return None
+
+    def _shift_keyframes(self, times_ms, slides, offset_seconds):
+        '''Shifts sorted keyframe times by an offset, keeping at most one keyframe clamped to 0.0s.'''
+        shifted = times_ms + to_ms(offset_seconds)
+        keep = shifted <= to_ms(self.state.audio_duration)
+        at_or_before_start = np.flatnonzero(keep & (shifted <= 0))
+        if len(at_or_before_start): # Only the last keyframe at/before the start stays (at 0.0s)
+            keep[:at_or_before_start[-1]] = False
+            shifted[at_or_before_start[-1]] = 0
+        if not np.any(keep): return times_ms, slides
+        print(f"Shifted {int(np.count_nonzero(keep))} imported keyframes by {offset_seconds:+.3f}s.")
+        return shifted[keep], slides[keep]
+
 
 # END OF FILE handlers/keyframe_handler.py
\ No newline at end of file
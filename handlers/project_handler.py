@@ -0,0 +1,188 @@
+# START OF FILE handlers/project_handler.py
+import os
+from tkinter import messagebox
+from project_file import (ProjectFile, ProjectFileError, write_project, describe_file, slides_digest,
+                          PROJECT_VERSION, SECTION_ANALYSIS, SECTION_SLIDES)
+
+
+class ProjectHandler:
+    '''Saves and opens project files (audio/slide references, keyframes, cached analysis).
+
+    Hashing and writing run on the task runner. Opening loads the keyframes
+    right away; the cached analysis and the slide hashes are read afterwards
+    in the background.
+    '''
+
+    def __init__(self, app_state, update_callback, task_runner, audio_handler, slide_handler, analysis_handler):
+        self.state = app_state
+        self.update_ui = update_callback
+        self.tasks = task_runner
+        self.audio_h = audio_handler
+        self.slide_h = slide_handler
+        self.analysis_h = analysis_handler
+        self._known_files = {} # path -> last describe_file() entry, so unchanged files are not re-hashed
+        self._save_running = False
+
+    # --- Save ---
+    def save_project(self, file_path):
+        '''Snapshots the session on the Tk thread, then hashes and writes it in the background.'''
+        if not self.state.has_audio():
+            messagebox.showinfo("Save Project", "Load an audio file before saving a project.")
+            return False
+        if self._save_running:
+            messagebox.showinfo("Save Project", "A project save is already running.")
+            return False
+
+        meta = {
+            'version': PROJECT_VERSION,
+            'audio': {'path': os.path.abspath(self.state.audio_file),
+                      'relative_path': self._relative(self.state.audio_file, file_path),
+                      'duration': self.state.audio_duration},
+            'slides': {'directory': os.path.abspath(self.state.slides_directory) if self.state.slides_directory else None,
+                       'relative_directory': self._relative(self.state.slides_directory, file_path),
+                       'count': len(self.state.slide_files)},
+            'view': {'selected_keyframe_index': self.state.selected_keyframe_index,
+                     'position': self.state.current_position,
+                     'playback_speed': self.state.playback_speed,
+                     'snap_enabled': self.state.snap_enabled,
+                     'snap_window': self.state.snap_window,
+                     'export_formats': list(self.state.export_formats)},
+        }
+        times_ms, slides = self.state.keyframes.times_ms(), self.state.keyframes.slides()
+        artifacts = self.analysis_h.export_artifacts()
+        slide_files = list(self.state.slide_files)
+
+        self._save_running = True
+        self.state.status_message = f"Saving project {os.path.basename(file_path)}..."
+        self.update_ui(status=True)
+        self.tasks.submit(self._write, file_path, meta, times_ms, slides, artifacts, slide_files,
+                          on_done=lambda result: self._on_saved(file_path, result),
+                          on_error=self._on_save_error)
+        return True
+
+    @staticmethod
+    def _relative(path, project_path):
+        if not path: return None
+        try: return os.path.relpath(path, os.path.dirname(os.path.abspath(project_path)))
+        except ValueError: return None # Different drive on Windows
+
+    def _write(self, file_path, meta, times_ms, slides, artifacts, slide_files):
+        '''Worker: content hashes (reusing unchanged ones) and the atomic write.'''
+        audio_entry = describe_file(meta['audio']['path'], self._known_files.get(meta['audio']['path']))
+        slide_entries = [describe_file(path, self._known_files.get(path)) for path in slide_files]
+        meta['audio'].update(size=audio_entry['size'], mtime=audio_entry['mtime'], sha256=audio_entry['sha256'])
+        meta['slides']['digest'] = slides_digest(slide_entries) if slide_entries else None
+        write_project(file_path, meta, times_ms, slides, artifacts, slide_entries)
+        return dict(zip([meta['audio']['path']] + slide_files, [audio_entry] + slide_entries))
+
+    def _on_saved(self, file_path, hashed_files):
+        self._save_running = False
+        self._known_files.update(hashed_files)
+        self.state.project_file = file_path
+        self.state.status_message = f"Project saved: {os.path.basename(file_path)}"
+        print(self.state.status_message)
+        self.update_ui(status=True)
+
+    def _on_save_error(self, error):
+        self._save_running = False
+        print(f"Project save failed: {error}")
+        self.state.status_message = "Project save failed."
+        self.update_ui(status=True)
+        messagebox.showerror("Save Project", f"Failed to save project (existing file left unchanged):\n{error}")
+
+    # --- Open ---
+    def open_project(self, file_path):
+        '''Opens a project: audio, keyframes and view state now; analysis and slide checks in the background.'''
+        try:
+            project = ProjectFile(file_path)
+        except (OSError, ProjectFileError) as e:
+            messagebox.showerror("Open Project", f"Could not open project:\n{e}")
+            return False
+
+        meta = project.meta
+        audio_path = self._resolve(meta.get('audio', {}), 'path', 'relative_path', file_path, os.path.isfile)
+        if not audio_path:
+            messagebox.showerror("Open Project", f"The project's audio file was not found:\n{meta.get('audio', {}).get('path')}")
+            return False
+        if not self.audio_h.load_audio(audio_path): return False
+
+        slides_dir = self._resolve(meta.get('slides', {}), 'directory', 'relative_directory', file_path, os.path.isdir)
+        if slides_dir: self.slide_h.load_slides(slides_dir)
+        elif meta.get('slides', {}).get('directory'):
+            print(f"Warning: Project slides folder not found: {meta['slides']['directory']}")
+
+        self.state.keyframes.load_ms(project.times_ms, project.slides)
+        self.state.edit_history.clear()
+        view = meta.get('view', {})
+        selected = view.get('selected_keyframe_index', -1)
+        self.state.selected_keyframe_index = selected if 0 <= selected < len(self.state.keyframes) else -1
+        self.state.snap_enabled = bool(view.get('snap_enabled', self.state.snap_enabled))
+        self.state.snap_window = float(view.get('snap_window', self.state.snap_window))
+        self.state.export_formats = list(view.get('export_formats', self.state.export_formats))
+        speed = view.get('playback_speed')
+        if isinstance(speed, (int, float)) and speed > 0: self.audio_h.set_playback_speed(f"{speed}x")
+        self.state.project_file = file_path
+        self.update_ui(timeline_keyframes=True, keyframes=True, keyframes_list_selection=True, current_slide=True)
+        self.audio_h.seek(float(view.get('position', 0.0)))
+
+        self.state.status_message = f"Opened project {os.path.basename(file_path)} ({len(self.state.keyframes)} keyframes)."
+        self.update_ui(status=True)
+        # Heavy sections: reuse the cached analysis only if the audio is byte-identical
+        self.tasks.submit(self._load_cached_analysis, project, audio_path, meta.get('audio', {}),
+                          on_done=lambda result: self._on_cached_analysis(audio_path, result),
+                          on_error=lambda error: self._on_cached_analysis_error(audio_path, error))
+        if slides_dir and project.has_section(SECTION_SLIDES):
+            self.tasks.submit(self._check_slides, project, list(self.state.slide_files),
+                              on_done=self._on_slides_checked, on_error=lambda e: print(f"Slide check failed: {e}"))
+        return True
+
+    @staticmethod
+    def _resolve(entry, absolute_key, relative_key, project_path, exists):
+        '''The stored absolute path if it exists, else the path relative to the project file.'''
+        if entry.get(absolute_key) and exists(entry[absolute_key]): return entry[absolute_key]
+        if entry.get(relative_key):
+            candidate = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(project_path)), entry[relative_key]))
+            if exists(candidate): return candidate
+        return None
+
+    def _load_cached_analysis(self, project, audio_path, audio_meta):
+        '''Worker: returns (artifacts or None, reason).'''
+        if not project.has_section(SECTION_ANALYSIS): return None, "no cached analysis in project"
+        entry = describe_file(audio_path, audio_meta)
+        self._known_files[os.path.abspath(audio_path)] = entry
+        if entry['sha256'] != audio_meta.get('sha256'): return None, "audio file changed since the project was saved"
+        return project.load_analysis(), None
+
+    def _on_cached_analysis(self, audio_path, result):
+        if self.state.audio_file != audio_path: return # Another file was opened meanwhile
+        artifacts, reason = result
+        if artifacts is not None and not self.analysis_h.artifacts_complete(artifacts):
+            artifacts, reason = None, "cached analysis is incomplete"
+        if artifacts is None:
+            print(f"Re-analyzing audio: {reason}.")
+            self.analysis_h.analyze_audio()
+        else:
+            self.analysis_h.restore_artifacts(artifacts)
+
+    def _on_cached_analysis_error(self, audio_path, error):
+        if self.state.audio_file != audio_path: return
+        print(f"Could not load cached analysis ({error}); re-analyzing.")
+        self.analysis_h.analyze_audio()
+
+    def _check_slides(self, project, slide_files):
+        '''Worker: compares the slide folder with the hashes stored in the project.'''
+        stored = {entry['name']: entry for entry in project.load_slide_entries() or []}
+        current = [describe_file(path, stored.get(os.path.basename(path))) for path in slide_files]
+        self._known_files.update(zip(slide_files, current))
+        changed = sum(1 for entry in current if stored.get(entry['name'], {}).get('sha256') != entry['sha256'])
+        missing = len(set(stored) - {entry['name'] for entry in current})
+        return changed, missing
+
+    def _on_slides_checked(self, result):
+        changed, missing = result
+        if not changed and not missing: return
+        self.state.status_message = (f"Slides differ from the saved project: {changed} new/changed, {missing} missing.")
+        print(self.state.status_message)
+        self.update_ui(status=True)
+
+# END OF FILE handlers/project_handler.py
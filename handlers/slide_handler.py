@@ -1,21 +1,57 @@
 import os
-import glob
+import time
 from tkinter import messagebox
 from PIL import Image, ImageTk, UnidentifiedImageError
+from keyframes.schedule import SlideSchedule
+from slides.image_cache import SlideImageCache, slide_cache_key
+from slides.prefetch import SlidePrefetcher, PREFETCH_AHEAD
+from slides.decode import decode_slide, is_slide_file, fit_size
+from slides.renditions import RenditionCache, container_path
+from slides.folder_scan import SlideListing, scan_slide_folder, diff_listings
+from slides.verify import SlideVerifier, HEALTH_ERROR, HEALTH_WARNING, HEALTH_EXTENSION
+from slides.phash import SlideHasher, PHASH_EXTENSION
 # Ensure utils is importable
 try:
-    from utils import natural_sort_key
+    from utils import SLIDE_CACHE_DIR
 except ImportError:
     print("ERROR: Cannot import from utils.py in slide_handler. Ensure it's accessible.")
     # Define fallback
-    def natural_sort_key(s): return s # Basic fallback
+    SLIDE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".audio_keyframe_editor", "slide_cache")
+
+RENDITION_BUILD_CONCURRENCY = 2 # Rendition builds running at once (leaves room in the background lane for prefetches)
+SLIDE_RESCAN_INTERVAL = 0.4 # Seconds between background checks of the loaded slide folder (a change lands within two)
 
 class SlideHandler:
     '''Handles loading and managing slide images.'''
 
-    def __init__(self, app_state, update_callback):
+    def __init__(self, app_state, update_callback, task_runner=None):
         self.state = app_state
         self.update_ui = update_callback
+        self.schedule = SlideSchedule() # Rebuilt lazily when the keyframes change
+        self.image_cache = SlideImageCache() # Display-ready slides by (path, mtime, width, height)
+        # Upcoming slides are decoded on workers ahead of their transition (no prefetching without a runner)
+        self.prefetcher = SlidePrefetcher(self.image_cache, task_runner, self.render_slide) if task_runner else None
+        self._display_size = None # Viewer size of the last display, the size prefetches render at
+        self._prefetch_marker = None # (keyframe index, keyframes version, size) of the last prefetch request
+        # Timeline filmstrip/hover thumbnails: same cache, own queue so they never hold up playback prefetches
+        self.thumbnailer = SlidePrefetcher(self.image_cache, task_runner, self.render_slide, max_in_flight=2) if task_runner else None
+        # High-quality renders of slides the viewer is showing as a quick stand-in (see get_slide_quick)
+        self.refiner = SlidePrefetcher(self.image_cache, task_runner, self.render_slide, max_in_flight=2) if task_runner else None
+        self.tasks = task_runner
+        self.renditions = None # RenditionCache of the loaded folder (opened in the background)
+        self._rendition_generation = 0 # Bumped when the folder changes; older build results are dropped
+        self._rendition_queue = [] # Slides still to build, next one last
+        self._rendition_active = 0
+        self._rendition_progress = None # [built, failed, total] while a build pass runs
+        self._listing = None # slides.folder_scan.SlideListing of the loaded folder
+        self._rescan_running = False
+        self._last_rescan = 0.0 # time.monotonic() of the last background rescan
+        self._rescan_error = None # Last rescan error message (printed once)
+        self._previous_scan = None # Listing of the last background rescan, to tell settled files from ones being written
+        # Integrity check of every slide after each scan (header/CRC; full decode on request)
+        self.verifier = SlideVerifier(task_runner, self._on_health_report) if task_runner else None
+        # Perceptual hashes for near-duplicate detection, computed from the renditions once they are built
+        self.hasher = SlideHasher(task_runner, self._on_hash_index) if task_runner else None
 
     def load_slides(self, folder_path):
         '''Loads slide image paths from a folder.'''
@@ -26,33 +62,31 @@ class SlideHandler:
         try:
             print(f"Attempting to load slides from: {folder_path}")
             previous_dir = self.state.slides_directory
+            if self.image_cache.hits or self.image_cache.misses: print(f"Slide image cache: {self.image_cache.describe()}")
+            self.image_cache.clear()
+            if self.prefetcher: self.prefetcher.reset()
+            if self.thumbnailer: self.thumbnailer.reset()
+            if self.refiner: self.refiner.reset()
+            self._prefetch_marker = None
+            self.close_renditions()
+            if self.verifier: self.verifier.cancel()
+            if self.hasher: self.hasher.cancel()
             self.state.reset_slide_state() # Clear previous slides
             self.state.slides_directory = folder_path
 
-            # Find all png files in the folder (case-insensitive)
-            slide_files_found = []
-            for pattern in ["*.png", "*.PNG"]:
-                 # Use os.path.join for cross-platform compatibility
-                 search_pattern = os.path.join(folder_path, pattern)
-                 found = glob.glob(search_pattern)
-                 # Filter out potential directories if any match the pattern (unlikely for .png)
-                 slide_files_found.extend([f for f in found if os.path.isfile(f)])
-
-
-            # Remove duplicates and sort naturally based on filename
-            if slide_files_found:
-                # Use a set for uniqueness then sort
-                unique_files = sorted(list(set(slide_files_found)), key=lambda x: natural_sort_key(os.path.basename(x)))
-                self.state.slide_files = unique_files
-                print(f"Found {len(self.state.slide_files)} unique PNG files.")
+            # Find all slide images (PNG, JPEG, WebP) in the folder (one scandir pass, natural sort order)
+            self._listing = scan_slide_folder(folder_path)
+            if self._listing.paths:
+                self.state.slide_files = list(self._listing.paths)
+                print(f"Found {len(self.state.slide_files)} unique slide images.")
             else:
                  self.state.slide_files = [] # Ensure it's an empty list
-                 print("No PNG files found in the selected directory.")
+                 print("No slide images found in the selected directory.")
 
 
             if not self.state.slide_files:
                 messagebox.showwarning("No Slides Found",
-                                       f"No PNG files found directly in the selected folder:\n{folder_path}")
+                                       f"No slide images (PNG, JPEG, WebP) found directly in the selected folder:\n{folder_path}")
                 # Keep folder path selected, but no slides loaded
                 self.state.status_message = f"Selected folder: {self.state.get_slides_basename()} (No slides found)"
                 # Update UI to show empty state
@@ -66,6 +100,8 @@ class SlideHandler:
             self.state.current_slide_index = 0
 
             self.state.status_message = f"Loaded {len(self.state.slide_files)} slides from {self.state.get_slides_basename()}"
+            self._start_renditions(folder_path)
+            self.verify_slides()
             # Update slide display, file paths in UI, and status bar
             # Trigger 'slides' update which handles finding and showing the correct initial slide
             self.update_ui(slides=True, file_paths=True, status=True)
@@ -85,7 +121,7 @@ class SlideHandler:
             return False
 
     def _validate_slide_numbering(self):
-        '''Checks if slide filenames seem to follow the 1.png, 2.png... convention.'''
+        '''Checks if slide filenames seem to follow the 1.png, 2.png... convention (any supported extension).'''
         if not self.state.slide_files: return
         expected_number = 1
         mismatch_found = False
@@ -93,23 +129,23 @@ class SlideHandler:
         for i, slide_path in enumerate(self.state.slide_files):
             basename = os.path.basename(slide_path)
             name_part, ext = os.path.splitext(basename)
-            if ext.lower() == '.png':
+            if is_slide_file(basename):
                 try:
                     file_number = int(name_part)
                     if file_number != expected_number:
-                        details.append(f"  - Expected '{expected_number}.png', found '{basename}' at position {i+1}")
+                        details.append(f"  - Expected '{expected_number}{ext}', found '{basename}' at position {i+1}")
                         mismatch_found = True
                         # Don't break, report all mismatches? Let's just flag first.
                         break
                     expected_number += 1
                 except ValueError:
                     # Filename is not purely numeric
-                    details.append(f"  - Expected '{expected_number}.png', found non-numeric name '{basename}' at position {i+1}")
+                    details.append(f"  - Expected '{expected_number}{ext}', found non-numeric name '{basename}' at position {i+1}")
                     mismatch_found = True
                     break
             else:
-                 # Should not happen due to glob pattern, but safety check
-                 details.append(f"  - Found non-PNG file? '{basename}' at position {i+1}")
+                 # Should not happen due to the scan filter, but safety check
+                 details.append(f"  - Found non-image file? '{basename}' at position {i+1}")
                  mismatch_found = True
                  break
 
@@ -146,33 +182,25 @@ class SlideHandler:
 
         slide_path = self.state.slide_files[index]
 
-        # --- Load and Resize ---
+        # --- Load and Resize (or reuse a cached rendition) ---
         try:
-            # print(f"Loading and resizing slide {index}: {slide_path} for target {target_width}x{target_height}")
-            image = Image.open(slide_path)
-            # Convert to RGBA *after* loading to handle various PNG modes (e.g., P, LA)
-            image = image.convert("RGBA")
-
-            img_width, img_height = image.size
-            if img_width <= 0 or img_height <= 0:
-                 raise ValueError("Image has zero or negative dimensions")
-
-            # Calculate resize ratio
-            ratio = min(target_width / img_width, target_height / img_height)
-            ratio = max(0.001, ratio) # Prevent zero ratio
-
-            new_width = max(1, int(img_width * ratio))
-            new_height = max(1, int(img_height * ratio))
-
-            # Resize using LANCZOS for best quality downscaling
-            resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            # Convert to Tkinter PhotoImage
-            photo = ImageTk.PhotoImage(resized_image)
+            self._display_size = (target_width, target_height)
+            cache_key = slide_cache_key(slide_path, target_width, target_height)
+            cached = self.image_cache.get(cache_key)
+            if cached is not None:
+                resized_image, photo = cached
+            else:
+                # A prefetch of this slide may already be running: wait for it rather than decoding twice
+                resized_image = self.prefetcher.take(cache_key) if self.prefetcher else None
+                if resized_image is None:
+                    # print(f"Loading and resizing slide {index}: {slide_path} for target {target_width}x{target_height}")
+                    resized_image = self.render_slide(slide_path, target_width, target_height)
+                # Convert to Tkinter PhotoImage
+                photo = ImageTk.PhotoImage(resized_image)
+                self.image_cache.put(cache_key, resized_image, photo)
 
-            # --- Update Cache ---
             # Store the results (photo reference is essential)
-            # self.state.loaded_slide_image = resized_image # Cache PIL image (optional)
+            self.state.loaded_slide_image = resized_image
             self.state.loaded_slide_photo = photo # MUST cache Tk PhotoImage
 
             return resized_image, photo # Return both PIL and Tk image
@@ -199,6 +227,327 @@ class SlideHandler:
         self.state.loaded_slide_photo = None
         return None, None
 
+    def get_slide_quick(self, index, target_width, target_height):
+        '''Whatever can be shown at once: (PIL image, PhotoImage, is_final), or (None, None, False).
+
+        An exact cache hit is final. Otherwise the nearest size already cached
+        for the slide, or else its persistent renditions, is scaled with a
+        bilinear filter as a stand-in; refine_slide then renders the
+        high-quality version. Stand-ins are never cached. Nothing here decodes
+        the full-size file; if no stand-in exists the caller falls back to
+        get_slide_for_display.
+        '''
+        slide_path = self.state.get_slide_path_for_index(index)
+        if slide_path is None or target_width <= 1 or target_height <= 1: return None, None, False
+        self._display_size = (target_width, target_height)
+        try:
+            cache_key = slide_cache_key(slide_path, target_width, target_height)
+            cached = self.image_cache.get(cache_key)
+            if cached is not None:
+                image, photo = cached
+                final = True
+            else:
+                nearest = self.image_cache.nearest(slide_path, cache_key[1], target_width, target_height)
+                size = fit_size(nearest[0].width, nearest[0].height, target_width, target_height) if nearest else None
+                if nearest is not None and size == nearest[0].size:
+                    image, photo = nearest # Same fitted size: the refined render would be identical
+                    final = True
+                else:
+                    if nearest is not None: image = nearest[0].resize(size, Image.Resampling.BILINEAR)
+                    elif self.renditions is not None: image = self.renditions.best_for(slide_path, target_width, target_height, fast=True)
+                    else: image = None
+                    if image is None: return None, None, False
+                    photo = ImageTk.PhotoImage(image)
+                    final = False
+        except (OSError, ValueError) as e:
+            print(f"Quick display of slide {index + 1} failed: {e}")
+            return None, None, False
+        self.state.loaded_slide_image = image
+        self.state.loaded_slide_photo = photo # MUST keep the Tk PhotoImage referenced
+        return image, photo, final
+
+    def refine_slide(self, index, target_width, target_height):
+        '''Queues the high-quality render of a slide shown as a stand-in; refiner.on_ready reports it.'''
+        slide_path = self.state.get_slide_path_for_index(index)
+        if slide_path is not None and self.refiner: self.refiner.request([slide_path], target_width, target_height)
+
+    def get_slide_thumbnail(self, index, box_width, box_height):
+        '''Cached PhotoImage of slide `index` fitted to box_width x box_height, or None.
+
+        Never decodes on the calling (Tk) thread: a missing thumbnail is queued
+        on the thumbnailer, whose on_ready callback tells the caller to redraw.
+        '''
+        slide_path = self.state.get_slide_path_for_index(index)
+        if slide_path is None: return None
+        try: cache_key = slide_cache_key(slide_path, box_width, box_height)
+        except OSError: return None
+        cached = self.image_cache.get(cache_key)
+        if cached is not None: return cached[1]
+        if self.thumbnailer: self.thumbnailer.request([slide_path], box_width, box_height)
+        return None
+
+    def render_slide(self, slide_path, target_width, target_height):
+        '''Returns the slide fitted to target_width x target_height (safe on worker threads).
+
+        Scales down the smallest cached rendition that is large enough; falls
+        back to a reduced-size decode of the file (see slides.decode).
+        '''
+        renditions = self.renditions
+        if renditions is not None:
+            try:
+                image = renditions.best_for(slide_path, target_width, target_height)
+                if image is not None: return image
+            except (OSError, ValueError) as e:
+                print(f"Slide cache read failed for {os.path.basename(slide_path)}: {e}")
+        return decode_slide(slide_path, target_width, target_height)
+
+    # --- Persistent renditions (slides.renditions) ---
+    def close_renditions(self):
+        self._rendition_generation += 1
+        self._rendition_queue = []
+        self._rendition_active = 0
+        self._rendition_progress = None
+        if self.renditions is not None:
+            cache, self.renditions = self.renditions, None
+            cache.close()
+
+    def _start_renditions(self, folder_path):
+        '''Opens the folder's rendition container and builds missing/outdated renditions in the background.'''
+        if self.tasks is None: return
+        generation, listing = self._rendition_generation, self._listing
+        slide_files = list(self.state.slide_files)
+        self.tasks.submit(self._open_renditions, folder_path, slide_files,
+                          on_done=lambda result: self._on_renditions_opened(generation, listing, slide_files, result),
+                          on_error=lambda error: self._on_renditions_unavailable(generation, error))
+
+    @staticmethod
+    def _open_renditions(folder_path, slide_files):
+        '''Worker: opens (scans) the container and lists the slides it has no current entry for.'''
+        cache = RenditionCache(container_path(SLIDE_CACHE_DIR, folder_path))
+        return cache, cache.stale(slide_files)
+
+    def _on_renditions_unavailable(self, generation, error):
+        print(f"Slide cache unavailable: {error}")
+        if generation == self._rendition_generation: self.hash_slides() # From the slide files instead
+
+    def _on_renditions_opened(self, generation, listing, slide_files, result):
+        cache, stale = result
+        if generation != self._rendition_generation: # Another folder was loaded meanwhile
+            cache.close()
+            return
+        self.renditions = cache
+        if listing is not self._listing: # The folder changed while the container was opening
+            slide_files = list(self.state.slide_files)
+            stale = cache.stale(slide_files)
+        print(f"Slide cache: {len(slide_files) - len(stale)} slide(s) up to date, {len(stale)} to build.")
+        self._rendition_queue = stale[::-1]
+        self._rendition_progress = [0, 0, len(stale)]
+        for _ in range(RENDITION_BUILD_CONCURRENCY): self._build_next_rendition(generation)
+
+    def _queue_renditions(self, paths):
+        '''Builds renditions for added/re-exported slides (after the initial pass, or appended to it).'''
+        if self.renditions is None or not paths: return # Not open yet: opening checks the current slide list
+        self._rendition_queue[:0] = paths[::-1] # Built after anything already queued
+        if self._rendition_progress is None:
+            self._rendition_progress = [0, 0, len(paths)]
+            for _ in range(RENDITION_BUILD_CONCURRENCY): self._build_next_rendition(self._rendition_generation)
+        else:
+            self._rendition_progress[2] += len(paths)
+
+    def _build_next_rendition(self, generation):
+        cache = self.renditions
+        if not self._rendition_queue:
+            if self._rendition_active == 0 and cache is not None: self._on_renditions_built(generation)
+            return
+        path = self._rendition_queue.pop()
+        self._rendition_active += 1
+        self.tasks.submit(cache.build, path,
+                          on_done=lambda _: self._on_rendition_done(generation, path, None),
+                          on_error=lambda error: self._on_rendition_done(generation, path, error), background=True)
+
+    def _on_rendition_done(self, generation, path, error):
+        if generation != self._rendition_generation: return
+        self._rendition_active -= 1
+        if error is None: self._rendition_progress[0] += 1
+        else:
+            self._rendition_progress[1] += 1
+            print(f"Slide cache: could not build renditions for {os.path.basename(path)}: {error}")
+        self._build_next_rendition(generation)
+
+    def _on_renditions_built(self, generation):
+        '''All builds for this folder finished: report, and compact the container if it is mostly garbage.'''
+        if generation != self._rendition_generation or self._rendition_progress is None: return # Already reported
+        built, failed, total = self._rendition_progress
+        self._rendition_progress = None
+        if total > 0:
+            self.state.status_message = f"Slide previews ready ({built} built" + (f", {failed} failed)" if failed else ")")
+            print(self.state.status_message)
+            self.update_ui(status=True)
+        self.hash_slides() # Hashes are computed from the thumbnails just built
+        cache, slide_files = self.renditions, list(self.state.slide_files)
+        if cache.needs_compaction(slide_files):
+            self.tasks.submit(cache.compact, slide_files, on_error=lambda error: print(f"Slide cache compaction failed: {error}"),
+                              background=True)
+
+
+    # --- Folder changes (slides.folder_scan) ---
+    def poll_folder_changes(self):
+        '''Rescans the loaded folder on a worker, at most every SLIDE_RESCAN_INTERVAL seconds.
+
+        Called from the main window's periodic update; changes are applied by
+        apply_listing without reloading (keyframes and edit history stay).
+        '''
+        if self._listing is None or self.tasks is None or self._rescan_running: return
+        now = time.monotonic()
+        if now - self._last_rescan < SLIDE_RESCAN_INTERVAL: return
+        self._last_rescan = now
+        self._rescan_running = True
+        listing = self._listing
+        self.tasks.submit(scan_slide_folder, listing.folder,
+                          on_done=lambda new_listing: self._on_rescanned(listing, new_listing),
+                          on_error=self._on_rescan_failed)
+
+    def _on_rescanned(self, listing, new_listing):
+        '''Applies the changes that have settled: removals at once, new and re-exported files once
+        their size and mtime are the same in two consecutive scans (no longer being written).'''
+        self._rescan_running = False
+        self._rescan_error = None
+        previous, self._previous_scan = self._previous_scan, new_listing
+        if listing is not self._listing: return # Reloaded or already updated meanwhile
+        if previous is None or previous.folder != new_listing.folder: previous = None
+        added, removed, modified = diff_listings(listing, new_listing)
+        if not (added or removed or modified): return
+        entries = dict(new_listing.entries)
+        for name in added + modified:
+            if previous is not None and previous.entries.get(name) == entries[name]: continue # Settled
+            if name in listing.entries: entries[name] = listing.entries[name] # Keep the old version for now
+            else: del entries[name]
+        self.apply_listing(new_listing if entries == new_listing.entries else SlideListing(new_listing.folder, entries))
+
+    def _on_rescan_failed(self, error):
+        self._rescan_running = False
+        if str(error) != self._rescan_error:
+            self._rescan_error = str(error)
+            print(f"Slide folder rescan failed: {error}")
+
+    def rescan_slides(self):
+        '''Menu command: rescans the slide folder now and applies any changes.'''
+        if self._listing is None:
+            messagebox.showinfo("Rescan Slides", "No slides folder is loaded.")
+            return False
+        try:
+            new_listing = scan_slide_folder(self._listing.folder)
+        except OSError as e:
+            messagebox.showerror("Rescan Slides", f"Cannot read the slides folder:\n{e}")
+            return False
+        if not self.apply_listing(new_listing):
+            self.state.status_message = f"Slides folder unchanged ({len(new_listing)} slides)"
+            self.update_ui(status=True)
+        return True
+
+    def apply_listing(self, new_listing):
+        '''Switches to a new listing of the loaded folder, keeping keyframes and history. True if it changed.
+
+        Keyframes keep their slide numbers (slides are numbered by file order,
+        as in saved projects). Cached images of removed or re-exported files
+        are dropped, and their renditions are rebuilt in the background.
+        '''
+        added, removed, modified = diff_listings(self._listing, new_listing)
+        if not (added or removed or modified): return False
+        self._listing = new_listing
+        folder = new_listing.folder
+        for name in removed + modified: self.image_cache.discard_path(os.path.join(folder, name))
+        if self.prefetcher: self.prefetcher.reset()
+        if self.thumbnailer: self.thumbnailer.reset()
+        if self.refiner: self.refiner.reset()
+        self._prefetch_marker = None
+        self.state.slide_files = list(new_listing.paths)
+        if not self.state.slide_files: self.state.current_slide_index = -1
+        self._queue_renditions([os.path.join(folder, name) for name in added + modified])
+        self.verify_slides() # Unchanged slides are answered from the health cache
+
+        changes = [f"{len(names)} {label}" for names, label in ((added, "added"), (removed, "removed"), (modified, "updated")) if names]
+        self.state.status_message = f"Slides folder changed: {', '.join(changes)} ({len(new_listing)} slides)"
+        print(self.state.status_message)
+        self.update_ui(slides=True, status=True)
+        return True
+
+    # --- Slide verification (slides.verify) ---
+    def verify_slides(self, full=False):
+        '''Checks every loaded slide in the background; full=True also decodes each one.'''
+        if self.verifier is None or not self.state.has_slides(): return False
+        cache_path = container_path(SLIDE_CACHE_DIR, self.state.slides_directory, HEALTH_EXTENSION)
+        self.verifier.start(self.state.slide_files, cache_path, full=full)
+        if full:
+            self.state.status_message = f"Decoding {len(self.state.slide_files)} slides to check them..."
+            self.update_ui(status=True)
+        return True
+
+    def _on_health_report(self, report):
+        problems = report.counts.get(HEALTH_ERROR, 0) + report.counts.get(HEALTH_WARNING, 0)
+        if problems or report.full:
+            self.state.status_message = report.summary() + (" (Edit -> Slides -> Slide Health Report)" if problems else "")
+        self.update_ui(status=True, slide_health=True)
+
+    def slide_problem(self, index):
+        '''Problem text the last verification found for slide index ("" if none or not checked).'''
+        report = self.verifier.report if self.verifier else None
+        return report.status_of(index)[1] if report else ""
+
+    # --- Near-duplicate slides (slides.phash) ---
+    def hash_slides(self):
+        '''Hashes every loaded slide in the background (slides already in the hash cache are reused).'''
+        if self.hasher is None or not self.state.has_slides(): return False
+        cache_path = container_path(SLIDE_CACHE_DIR, self.state.slides_directory, PHASH_EXTENSION)
+        self.hasher.start(self.state.slide_files, self.renditions, cache_path)
+        return True
+
+    def _on_hash_index(self, index):
+        groups = index.groups()
+        if groups:
+            self.state.status_message = (f"{sum(len(group) for group in groups)} slides look like near-duplicates "
+                                         f"of another slide (Edit -> Slides -> Near-Duplicate Slides)")
+            self.update_ui(status=True)
+
+    def near_duplicate_groups(self):
+        '''Groups of near-duplicate slide indices from the last hash pass, or None if no pass has finished.'''
+        index = self.hasher.index if self.hasher else None
+        return index.groups() if index is not None else None
+
+    def slides_similar(self, a, b):
+        '''True if slides a and b are the same slide or near-duplicates by the last hash pass.'''
+        if a == b: return True
+        index = self.hasher.index if self.hasher else None
+        return index is not None and index.similar(a, b)
+
+    def prefetch_for_time(self, time_seconds):
+        '''Queues background renders of the slides around time_seconds.
+
+        Order: the next PREFETCH_AHEAD scheduled slides, the slide of the
+        previous keyframe (skipping back), then the deck neighbours of the
+        current slide (browsing after a seek). Cheap to call every playback
+        tick: nothing is recomputed until the active keyframe, the keyframes
+        or the viewer size change.
+        '''
+        if self.prefetcher is None or self._display_size is None or not self.state.has_slides(): return
+        self.schedule.sync(self.state.keyframes)
+        index = self.schedule.keyframe_index_at(time_seconds)
+        marker = (index, self.state.keyframes.version, self._display_size)
+        if marker == self._prefetch_marker: return
+        self._prefetch_marker = marker
+
+        current = self.schedule.slide_at(time_seconds) if index != -1 else 0
+        wanted = self.schedule.upcoming_slides(index, PREFETCH_AHEAD) if index != -1 else []
+        if index > 0: wanted.append(self.schedule.slide_at_keyframe(index - 1))
+        wanted += [current + 1, current - 1]
+        num_slides = len(self.state.slide_files)
+        paths, seen = [], {current}
+        for slide in wanted:
+            if 0 <= slide < num_slides and slide not in seen:
+                seen.add(slide)
+                paths.append(self.state.slide_files[slide])
+        self.prefetcher.request(paths, *self._display_size)
+
 
     def find_slide_index_for_time(self, time_seconds):
          '''Determines which slide's index (0-based) should be displayed at a given time.'''
@@ -209,29 +558,11 @@ class SlideHandler:
              # If slides exist but no keyframes, always show the first slide
              return 0
 
-         # Keyframes are sorted by time. Find the last keyframe whose time is <= current time.
-         target_kf_index = -1 # Index in the keyframes list
-         for i, kf in enumerate(self.state.keyframes):
-              # Use a small epsilon for comparison robustness? Maybe not needed if times are rounded.
-              if time_seconds >= kf['time'] - 0.0001: # Allow time to be exactly on keyframe
-                  target_kf_index = i
-              else:
-                  # We've passed the time, the previous keyframe's index is correct.
-                  break # Exit loop early
-
-         # If time is before the very first keyframe, use the first keyframe's slide
-         if target_kf_index == -1:
-              target_kf_index = 0
-
-
-         # Get the slideIndex associated with the determined keyframe
-         # This slideIndex directly corresponds to the intended slide file order (0-based)
-         # Protect against missing 'slideIndex' key just in case
-         try:
-             target_slide_index = self.state.keyframes[target_kf_index].get('slideIndex', 0)
-         except IndexError:
-              print(f"Error: target_kf_index {target_kf_index} out of bounds for keyframes.")
-              return 0 # Default to first slide on error
+         # Last keyframe at or before the time (the first keyframe's slide before that).
+         # The schedule's cursor makes consecutive playback ticks O(1); seeks use a binary search.
+         self.schedule.sync(self.state.keyframes)
+         target_kf_index = self.schedule.keyframe_index_at(time_seconds)
+         target_slide_index = self.schedule.slide_at(time_seconds)
 
 
          # Ensure the target_slide_index is valid for the number of *loaded* slides
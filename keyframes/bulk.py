@@ -0,0 +1,69 @@
+# START OF FILE keyframes/bulk.py
+'''Vectorized bulk re-timing of keyframe time arrays.
+
+Every operation takes the store's sorted int64 millisecond times and returns
+(new_ms, keep): the new time for each keyframe (aligned with the input) and
+a mask of keyframes that survive. The caller turns that into one store edit.
+'''
+import numpy as np
+
+
+def ripple_shift(times_ms, at_ms, delta_ms, end_ms):
+    '''Shifts every keyframe at or after at_ms by delta_ms.
+
+    A negative delta closes the gap [at_ms + delta_ms, at_ms): keyframes inside
+    it are removed. Keyframes pushed past end_ms are removed.
+    '''
+    new_ms = times_ms.copy()
+    later = times_ms >= at_ms
+    new_ms[later] += delta_ms
+    keep = new_ms <= end_ms
+    if delta_ms < 0: keep &= ~((times_ms >= at_ms + delta_ms) & (times_ms < at_ms))
+    return new_ms, keep
+
+
+def scale_range(times_ms, start_ms, end_ms, new_start_ms, new_end_ms):
+    '''Linearly maps keyframes in [start_ms, end_ms] onto [new_start_ms, new_end_ms].'''
+    new_ms = times_ms.copy()
+    inside = (times_ms >= start_ms) & (times_ms <= end_ms)
+    if end_ms > start_ms:
+        scale = (new_end_ms - new_start_ms) / float(end_ms - start_ms)
+        new_ms[inside] = np.round(new_start_ms + (times_ms[inside] - start_ms) * scale).astype(np.int64)
+    else:
+        new_ms[inside] = new_start_ms
+    return new_ms, np.ones(len(times_ms), dtype=bool)
+
+
+def delete_range(times_ms, start_ms, end_ms, protect_zero=True):
+    '''Removes keyframes in [start_ms, end_ms) (the initial keyframe at 0 stays if protect_zero).'''
+    keep = (times_ms < start_ms) | (times_ms >= end_ms)
+    if protect_zero: keep |= times_ms == 0
+    return times_ms.copy(), keep
+
+
+def quantize(times_ms, fps, start_ms=None, end_ms=None):
+    '''Rounds keyframe times (optionally only those in [start_ms, end_ms]) to the nearest frame at fps.'''
+    new_ms = times_ms.copy()
+    inside = np.ones(len(times_ms), dtype=bool)
+    if start_ms is not None: inside &= times_ms >= start_ms
+    if end_ms is not None: inside &= times_ms <= end_ms
+    frames = np.round(times_ms[inside] * (fps / 1000.0))
+    new_ms[inside] = np.round(frames * (1000.0 / fps)).astype(np.int64)
+    return new_ms, np.ones(len(times_ms), dtype=bool)
+
+
+def resolve_collisions(times_ms, new_ms, keep):
+    '''Drops moved keyframes that would land on the same millisecond as another kept one.
+
+    Unmoved keyframes win over moved ones. Returns the updated keep mask.
+    '''
+    keep = keep.copy()
+    index = np.flatnonzero(keep)
+    if len(index) < 2: return keep
+    moved = (new_ms[index] != times_ms[index]).astype(np.int8)
+    order = index[np.lexsort((moved, new_ms[index]))] # By new time, unmoved first on ties
+    duplicate = np.concatenate(([False], np.diff(new_ms[order]) == 0))
+    keep[order[duplicate & (new_ms[order] != times_ms[order])]] = False
+    return keep
+
+# END OF FILE keyframes/bulk.py
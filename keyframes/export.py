@@ -0,0 +1,237 @@
+# START OF FILE keyframes/export.py
+'''Keyframe export: segments are computed once and streamed to every selected format.
+
+Each output is written to a temporary file next to its target. Only after
+every file has been written are they renamed into place with os.replace, so
+a failure never leaves a half-written export behind.
+'''
+import csv
+import json
+import os
+import tempfile
+import numpy as np
+
+EXPORT_PROGRESS_EVERY = 5000 # Segments between progress callbacks
+
+FORMAT_JSON = 'json'
+FORMAT_TXT = 'txt'
+FORMAT_CSV = 'csv'
+FORMAT_SRT = 'srt'
+FORMAT_VTT = 'vtt'
+FORMAT_FFCONCAT = 'ffconcat'
+DEFAULT_EXPORT_FORMATS = (FORMAT_JSON, FORMAT_TXT)
+
+
+def compute_segments(times_ms, slides, end_ms, slide_paths):
+    '''Builds the export segments from the store's arrays.
+
+    Segment i starts at keyframe i and lasts until keyframe i + 1 (the last
+    one until end_ms). slide_paths maps slide index -> file path; slides
+    without a file are named "<number>.png" like the original exporter.
+    '''
+    starts = np.asarray(times_ms, dtype=np.int64)
+    slides = np.asarray(slides, dtype=np.int64)
+    ends = np.append(starts[1:], max(int(end_ms), int(starts[-1]) if len(starts) else 0))
+    durations = np.maximum(ends - starts, 0)
+    numbers = slides + 1
+    paths = [slide_paths[s] if 0 <= s < len(slide_paths) else None for s in slides.tolist()]
+    names = [os.path.basename(p) if p else f"{n}.png" for p, n in zip(paths, numbers.tolist())]
+    return {'starts_ms': starts, 'durations_ms': durations, 'image_numbers': numbers,
+            'image_names': names, 'image_paths': paths}
+
+
+def _timestamp(ms, separator):
+    hours, rest = divmod(int(ms), 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+def _format_time(ms):
+    minutes, rest = divmod(int(ms), 60000)
+    return f"{minutes:02d}:{rest // 1000:02d}.{rest % 1000:03d}"
+
+
+class _Writer:
+    '''One output format: begin(), row() per segment, end().'''
+    label = ""
+    suffix = ""
+
+    def __init__(self, f, meta):
+        self.f = f
+        self.meta = meta
+
+    def begin(self, count): pass
+    def row(self, i, start_ms, duration_ms, number, name, path): pass
+    def end(self): pass
+
+
+class _JsonWriter(_Writer):
+    '''The original export format: a list of {image_number, image_name, Duration}, indent=2.'''
+    label = "JSON segment list (.json)"
+    suffix = ".json"
+
+    def begin(self, count):
+        self.f.write("[" if count else "[]")
+
+    def row(self, i, start_ms, duration_ms, number, name, path):
+        self.f.write(f'{"," if i else ""}\n  {{\n    "image_number": {number},\n    "image_name": {json.dumps(name)},\n'
+                     f'    "Duration": {json.dumps(duration_ms / 1000.0) if duration_ms else "0"}\n  }}') # The original wrote int 0
+
+    def end(self):
+        if self.meta['count']: self.f.write("\n]")
+
+
+class _TextWriter(_Writer):
+    label = "Text summary (.txt)"
+    suffix = ".txt"
+
+    def begin(self, count):
+        self.f.write(f"Audio File: {self.meta['audio_name']}\n"
+                     f"Total Duration: {self.meta['total_duration']}\n"
+                     f"Slides Folder: {self.meta['slides_name']}\n"
+                     + "-" * 30 + f"\nExported {count} Keyframes/Segments:\n\n")
+
+    def row(self, i, start_ms, duration_ms, number, name, path):
+        self.f.write(f"#{i + 1}\n  Slide: {name} (Number: {number})\n"
+                     f"  Appears at: {_format_time(start_ms)}\n  Duration: {duration_ms / 1000.0:.3f}s\n\n")
+
+    def end(self):
+        self.f.write("-" * 30 + f"\nSum of durations: {self.meta['sum_ms'] / 1000.0:.3f}s\n")
+
+
+class _CsvWriter(_Writer):
+    label = "Spreadsheet (.csv)"
+    suffix = ".csv"
+
+    def begin(self, count):
+        self.csv = csv.writer(self.f, lineterminator="\n")
+        self.csv.writerow(["index", "start", "end", "duration", "image_number", "image_name"])
+
+    def row(self, i, start_ms, duration_ms, number, name, path):
+        self.csv.writerow([i + 1, f"{start_ms / 1000.0:.3f}", f"{(start_ms + duration_ms) / 1000.0:.3f}",
+                           f"{duration_ms / 1000.0:.3f}", number, name])
+
+
+class _SrtWriter(_Writer):
+    label = "SRT chapters (.srt)"
+    suffix = ".srt"
+
+    def row(self, i, start_ms, duration_ms, number, name, path):
+        self.f.write(f"{i + 1}\n{_timestamp(start_ms, ',')} --> {_timestamp(start_ms + duration_ms, ',')}\n"
+                     f"Slide {number}: {name}\n\n")
+
+
+class _VttWriter(_Writer):
+    label = "WebVTT chapters (.vtt)"
+    suffix = ".vtt"
+
+    def begin(self, count):
+        self.f.write("WEBVTT\n\n")
+
+    def row(self, i, start_ms, duration_ms, number, name, path):
+        self.f.write(f"{i + 1}\n{_timestamp(start_ms, '.')} --> {_timestamp(start_ms + duration_ms, '.')}\n"
+                     f"Slide {number}: {name}\n\n")
+
+
+class _FfconcatWriter(_Writer):
+    '''ffmpeg concat demuxer list: one image per segment with its duration.'''
+    label = "ffmpeg concat list (.ffconcat)"
+    suffix = ".ffconcat"
+
+    @staticmethod
+    def _quote(path):
+        return "'" + path.replace("\\", "/").replace("'", "'\\''") + "'"
+
+    def begin(self, count):
+        self.f.write("ffconcat version 1.0\n")
+        self.last = None
+
+    def row(self, i, start_ms, duration_ms, number, name, path):
+        self.last = self._quote(path or name)
+        self.f.write(f"file {self.last}\nduration {duration_ms / 1000.0:.3f}\n")
+
+    def end(self):
+        if self.last: self.f.write(f"file {self.last}\n") # The demuxer ignores the last duration unless the file repeats
+
+
+EXPORT_FORMATS = {
+    FORMAT_JSON: _JsonWriter, FORMAT_TXT: _TextWriter, FORMAT_CSV: _CsvWriter,
+    FORMAT_SRT: _SrtWriter, FORMAT_VTT: _VttWriter, FORMAT_FFCONCAT: _FfconcatWriter,
+}
+
+
+def output_paths(base_path, formats):
+    '''Target path per format: base_path without extension + the format's suffix.
+
+    JSON keeps the name chosen in the save dialog as typed, unless that name
+    ends in another format's suffix (e.g. "talk.txt"), which would make both
+    formats write the same file: then JSON gets stem + ".json" too.
+    '''
+    stem, extension = os.path.splitext(base_path)
+    other_suffixes = {writer.suffix for fmt, writer in EXPORT_FORMATS.items() if fmt != FORMAT_JSON}
+    json_path = stem + _JsonWriter.suffix if extension.lower() in other_suffixes else base_path
+    return {fmt: json_path if fmt == FORMAT_JSON else stem + EXPORT_FORMATS[fmt].suffix for fmt in formats}
+
+
+def _open_temp(target):
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(target), dir=os.path.dirname(target) or ".")
+    return open(fd, 'w', encoding='utf-8', newline=''), temp_path
+
+
+def _commit_temp_files(pending):
+    '''Flushes, fsyncs and closes each temp file, then renames them all into place.'''
+    for f, _, _ in pending:
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+    for _, temp_path, target in pending:
+        os.replace(temp_path, target)
+
+
+def _discard_temp_files(pending):
+    for f, temp_path, _ in pending:
+        try: f.close()
+        except OSError: pass
+        try: os.remove(temp_path)
+        except OSError: pass
+
+
+def write_exports(base_path, formats, segments, meta, extra_files=None, progress=None):
+    '''Writes the selected formats in one pass over the segments.
+
+    meta holds 'audio_name', 'total_duration' and 'slides_name' for the text
+    summary. extra_files maps target path -> text written with the same
+    atomic rename (e.g. the audio fingerprint sidecar). progress(done, total)
+    is called every EXPORT_PROGRESS_EVERY segments. Returns the written paths.
+    '''
+    count = len(segments['starts_ms'])
+    meta = dict(meta, count=count, sum_ms=int(segments['durations_ms'].sum()))
+    targets = output_paths(base_path, formats)
+    pending, writers = [], []
+    try:
+        for fmt, target in targets.items():
+            f, temp_path = _open_temp(target)
+            pending.append((f, temp_path, target))
+            writers.append(EXPORT_FORMATS[fmt](f, meta))
+        for writer in writers: writer.begin(count)
+
+        rows = zip(segments['starts_ms'].tolist(), segments['durations_ms'].tolist(),
+                   segments['image_numbers'].tolist(), segments['image_names'], segments['image_paths'])
+        for i, (start_ms, duration_ms, number, name, path) in enumerate(rows):
+            for writer in writers: writer.row(i, start_ms, duration_ms, number, name, path)
+            if progress and (i + 1) % EXPORT_PROGRESS_EVERY == 0: progress(i + 1, count)
+
+        for writer in writers: writer.end()
+        for target, text in (extra_files or {}).items():
+            f, temp_path = _open_temp(target)
+            pending.append((f, temp_path, target))
+            f.write(text)
+        _commit_temp_files(pending)
+    except BaseException:
+        _discard_temp_files(pending)
+        raise
+    if progress: progress(count, count)
+    return [target for _, _, target in pending]
+
+# END OF FILE keyframes/export.py
@@ -0,0 +1,114 @@
+# START OF FILE keyframes/history.py
+import time
+from collections import deque
+import numpy as np
+
+HISTORY_MAX_ENTRIES = 500
+HISTORY_MAX_BYTES = 64 * 1024 * 1024
+HISTORY_COALESCE_SECONDS = 1.0 # Moves of the same keyframe closer together than this merge
+ENTRY_OVERHEAD_BYTES = 200 # Rough per-entry cost of the Python objects around the arrays
+
+
+class EditDelta:
+    '''One reversible keyframe edit: remove these (time, slide) pairs, add those.
+
+    Insert, delete, move and bulk edits are all the same shape, so the inverse
+    is just the two sides swapped.
+    '''
+    __slots__ = ('label', 'removed_ms', 'removed_slides', 'added_ms', 'added_slides', 'timestamp')
+
+    def __init__(self, label, removed_ms, removed_slides, added_ms, added_slides):
+        self.label = label
+        self.removed_ms = np.asarray(removed_ms, dtype=np.int64)
+        self.removed_slides = np.asarray(removed_slides, dtype=np.int64)
+        self.added_ms = np.asarray(added_ms, dtype=np.int64)
+        self.added_slides = np.asarray(added_slides, dtype=np.int64)
+        self.timestamp = time.monotonic()
+
+    @property
+    def nbytes(self):
+        return (ENTRY_OVERHEAD_BYTES + self.removed_ms.nbytes + self.removed_slides.nbytes
+                + self.added_ms.nbytes + self.added_slides.nbytes)
+
+    def is_single_move(self):
+        return len(self.removed_ms) == 1 and len(self.added_ms) == 1
+
+    def apply(self, store):
+        store.apply_change(self.removed_ms, self.added_ms, self.added_slides, self.removed_slides)
+
+    def revert(self, store):
+        store.apply_change(self.added_ms, self.removed_ms, self.removed_slides, self.added_slides)
+
+
+class EditHistory:
+    '''Undo/redo stacks of EditDelta entries, capped by entry count and bytes.'''
+
+    def __init__(self, max_entries=HISTORY_MAX_ENTRIES, max_bytes=HISTORY_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+
+    def __len__(self): return len(self._undo)
+    def can_undo(self): return bool(self._undo)
+    def can_redo(self): return bool(self._redo)
+    def undo_label(self): return self._undo[-1].label if self._undo else None
+    def redo_label(self): return self._redo[-1].label if self._redo else None
+    @property
+    def bytes_used(self): return self._bytes
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    def record(self, label, removed_ms=(), removed_slides=(), added_ms=(), added_slides=()):
+        '''Records an edit that has already been applied to the store.'''
+        delta = EditDelta(label, removed_ms, removed_slides, added_ms, added_slides)
+        if len(delta.removed_ms) == 0 and len(delta.added_ms) == 0: return
+        self._redo.clear()
+
+        last = self._undo[-1] if self._undo else None
+        if (last is not None and delta.is_single_move() and last.is_single_move() and last.label == label
+                and last.added_ms[0] == delta.removed_ms[0] and last.added_slides[0] == delta.removed_slides[0]
+                and delta.timestamp - last.timestamp < HISTORY_COALESCE_SECONDS):
+            # Same keyframe moved again right away (dragging/nudging): extend the previous move
+            last.added_ms, last.added_slides = delta.added_ms, delta.added_slides
+            last.timestamp = delta.timestamp
+            return
+
+        self._undo.append(delta)
+        self._bytes += delta.nbytes
+        while self._undo and (len(self._undo) > self.max_entries or self._bytes > self.max_bytes):
+            self._bytes -= self._undo.popleft().nbytes
+
+    def record_insert(self, label, times_ms, slides):
+        self.record(label, added_ms=times_ms, added_slides=slides)
+
+    def record_delete(self, label, times_ms, slides):
+        self.record(label, removed_ms=times_ms, removed_slides=slides)
+
+    def record_move(self, label, old_ms, new_ms, slide):
+        self.record(label, [old_ms], [slide], [new_ms], [slide])
+
+    def undo(self, store):
+        '''Reverts the latest edit on the store; returns the EditDelta (None if nothing to undo).'''
+        if not self._undo: return None
+        delta = self._undo.pop()
+        self._bytes -= delta.nbytes
+        delta.revert(store)
+        self._redo.append(delta)
+        return delta
+
+    def redo(self, store):
+        '''Re-applies the latest undone edit; returns the EditDelta (None if nothing to redo).'''
+        if not self._redo: return None
+        delta = self._redo.pop()
+        delta.apply(store)
+        delta.timestamp = 0.0 # Never coalesce into a redone entry
+        self._undo.append(delta)
+        self._bytes += delta.nbytes
+        return delta
+
+# END OF FILE keyframes/history.py
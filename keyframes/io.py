@@ -0,0 +1,110 @@
+# START OF FILE keyframes/io.py
+import json
+import numpy as np
+
+IMPORT_CHUNK_BYTES = 1 << 20 # Read size while streaming a keyframe file
+REQUIRED_KEYS = ("image_number", "image_name", "Duration")
+
+
+class KeyframeFileError(ValueError):
+    '''Invalid keyframe file; `item` is the 1-based position of the offending entry (None if not item-specific).'''
+
+    def __init__(self, message, item=None):
+        super().__init__(f"Item {item}: {message}" if item is not None else message)
+        self.item = item
+
+
+def iter_json_array(file_obj, chunk_bytes=IMPORT_CHUNK_BYTES):
+    '''Yields the elements of a top-level JSON array one at a time without loading the whole file.'''
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = file_obj.read(chunk_bytes)
+        if not chunk: eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n": pos += 1
+            if pos < len(buffer) or eof: return
+            fill()
+
+    fill()
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[': raise KeyframeFileError("Invalid format: JSON root should be a list.")
+    pos += 1
+    item = 0
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer): raise KeyframeFileError("unexpected end of file (missing ']')", item + 1)
+        if buffer[pos] == ']': return
+        if item > 0:
+            if buffer[pos] != ',': raise KeyframeFileError(f"expected ',' or ']' but found {buffer[pos]!r}", item + 1)
+            pos += 1
+            skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number or literal cut off at the chunk boundary decodes "successfully": make sure it ended
+                if end >= len(buffer) and not eof:
+                    fill()
+                    continue
+                break
+            except json.JSONDecodeError as e:
+                if eof: raise KeyframeFileError(f"invalid JSON ({e.msg})", item + 1) from e
+                fill()
+        pos = end
+        item += 1
+        yield value
+
+
+def read_keyframe_file(file_path):
+    '''Streams an exported keyframe JSON file into arrays.
+
+    Start times are rebuilt with an exact cumulative sum over integer
+    milliseconds, so there is no drift over long files.
+    Returns a dict with 'times_ms', 'durations_ms', 'image_numbers' (int64
+    arrays) and 'negative_durations' (count of durations clamped to 0).
+    Raises KeyframeFileError naming the failing item.
+    '''
+    raw_durations, raw_numbers = [], []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for position, item in enumerate(iter_json_array(f), start=1):
+            if type(item) is not dict: raise KeyframeFileError("not a dictionary", position)
+            if len(item.keys() & REQUIRED_KEYS) != len(REQUIRED_KEYS):
+                missing = [k for k in REQUIRED_KEYS if k not in item]
+                raise KeyframeFileError(f"missing required key(s): {', '.join(missing)}", position)
+            raw_durations.append(item["Duration"])
+            raw_numbers.append(item["image_number"])
+    if not raw_durations: raise KeyframeFileError("Import file is empty or contains no keyframe data.")
+
+    durations = _bulk_convert(raw_durations, np.float64, "Duration")
+    image_numbers = _bulk_convert(raw_numbers, np.int64, "image_number")
+    durations_ms = np.round(durations * 1000.0).astype(np.int64)
+    negative = durations_ms < 0
+    durations_ms[negative] = 0
+    times_ms = np.concatenate(([0], np.cumsum(durations_ms)[:-1])).astype(np.int64)
+    return {'times_ms': times_ms, 'durations_ms': durations_ms, 'image_numbers': image_numbers,
+            'negative_durations': int(np.count_nonzero(negative))}
+
+
+def _bulk_convert(values, dtype, key):
+    '''Converts a column in one numpy call; only on failure is it scanned to report the bad item.'''
+    def valid(array, n): return array.shape == (n,) and bool(np.all(np.isfinite(array)))
+    try:
+        result = np.array(values, dtype=dtype)
+        if valid(result, len(values)): return result
+    except (ValueError, TypeError, OverflowError):
+        pass
+    for position, value in enumerate(values, start=1):
+        try:
+            if not valid(np.array([value], dtype=dtype), 1): raise ValueError(value)
+        except (ValueError, TypeError, OverflowError):
+            raise KeyframeFileError(f"invalid {key} value {value!r}", position) from None
+    raise KeyframeFileError(f"invalid {key} column")
+
+# END OF FILE keyframes/io.py
@@ -0,0 +1,470 @@
+# START OF FILE keyframes/journal.py
+'''Append-only autosave journal of keyframe store operations.
+
+The journal observes a KeyframeStore (see its `observers`). Each operation is one
+binary record (op, payload length, CRC32, payload) appended to the journal
+file; fsync happens in batches from tick(). Every COMPACT_EVERY_OPS
+operations the store is written out as a snapshot and the journal restarts.
+
+Snapshot and journal both carry an epoch. Compaction builds the snapshot
+for epoch E+1 on the Tk thread and has a worker write and sync it. Until the
+worker is done, records go both to the journal of epoch E and to a new
+journal for E+1 (session.journal.next), which replaces the journal once the
+snapshot is durable. A crash before the snapshot lands leaves snapshot and
+journal at E. A crash after it leaves the old journal at E, which is
+skipped, and the next journal at E+1, which is replayed. A torn record at
+the end of the journal fails its CRC and replay stops there.
+
+Every running instance journals into its own directory under the autosave
+root and holds an exclusive lock on the session.lock file in it. The OS
+releases the lock when the process exits or crashes. So on startup, a session
+whose lock can be taken belonged to an instance that did not close cleanly,
+and a locked one belongs to an instance that is still running.
+'''
+import json
+import os
+import shutil
+import struct
+import time
+import zlib
+from bisect import bisect_right
+import numpy as np
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_FILE = "session.snapshot"
+JOURNAL_FILE = "session.journal"
+JOURNAL_NEXT_FILE = "session.journal.next" # Journal of the next epoch while a compaction is being written
+LOCK_FILE = "session.lock"
+SNAPSHOT_MAGIC = b"AKFS"
+JOURNAL_MAGIC = b"AKFJ"
+FORMAT_VERSION = 1
+
+FSYNC_BATCH_OPS = 256 # Sync once this many records are pending...
+FSYNC_INTERVAL_SECONDS = 1.0 # ...or once the oldest pending record is this old
+COMPACT_EVERY_OPS = 20000
+COMPACT_MAX_BYTES = 16 * 1024 * 1024
+
+OP_INSERT = 1 # time_ms, slide
+OP_DELETE = 2 # index
+OP_SET_SLIDE = 3 # index, slide
+OP_CHANGE = 4 # removed_ms[], added_ms[], added_slides[], removed_slides[] (KeyframeStore.apply_change; older journals lack removed_slides)
+OP_LOAD = 5 # times_ms[], slides[] (full replace)
+OP_CLEAR = 6
+OP_RENUMBER = 7
+OP_META = 8 # JSON session metadata (audio file, slides folder, ...)
+
+_FILE_HEADER = struct.Struct("<4sHI") # magic, version, epoch
+_RECORD_HEADER = struct.Struct("<BII") # op, payload length, crc32(payload)
+_SNAPSHOT_COUNTS = struct.Struct("<II") # meta bytes, keyframe count
+_PAIR = struct.Struct("<qq")
+_ONE = struct.Struct("<q")
+_COUNTS = struct.Struct("<III")
+
+
+def _int64(values): return np.asarray(values, dtype=np.int64)
+
+
+class SessionLock:
+    '''Exclusive, non-blocking lock on a session directory's lock file (released by the OS if the process dies).'''
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, LOCK_FILE)
+        self._file = None
+
+    @property
+    def held(self): return self._file is not None
+
+    def acquire(self):
+        '''True if the lock is now held by this process; False if another process holds it.'''
+        if self._file is not None: return True
+        f = open(self.path, 'a+b')
+        try:
+            if fcntl is not None: fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n".encode('ascii')) # For people looking at the directory; the lock is what counts
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close() # Closing drops the lock
+            self._file = None
+
+
+class KeyframeJournal:
+    '''Journals the operations of one KeyframeStore into a directory of its own under `root`.'''
+
+    def __init__(self, root, task_runner=None):
+        self.root = root
+        self.directory = os.path.join(root, f"{os.getpid()}-{time.time_ns():x}") # Created and locked by start()
+        self._lock = SessionLock(self.directory)
+        self.tasks = task_runner # fsyncs and snapshot writes run here if given, so the Tk thread never waits on the disk
+        self.store = None
+        self.meta = {}
+        self.epoch = 0
+        self._file = None
+        self._pending = 0
+        self._oldest_pending = 0.0
+        self._ops_since_snapshot = 0
+        self._bytes_since_snapshot = 0
+        self._compaction = None # Compaction whose snapshot a worker is writing (see _begin_compaction)
+
+    @property
+    def active(self): return self._file is not None
+    @property
+    def snapshot_path(self): return os.path.join(self.directory, SNAPSHOT_FILE)
+    @property
+    def journal_path(self): return os.path.join(self.directory, JOURNAL_FILE)
+    @property
+    def next_journal_path(self): return os.path.join(self.directory, JOURNAL_NEXT_FILE)
+
+    # --- Session lifecycle ---
+    def start(self, store, meta):
+        '''Begins journaling `store` from its current contents.'''
+        self.stop()
+        os.makedirs(self.directory, exist_ok=True)
+        if not self._lock.acquire(): raise OSError(f"Autosave directory is locked by another process: {self.directory}")
+        self.store = store
+        self.meta = dict(meta)
+        self.epoch = 0
+        self._compact()
+        store.observers.append(self)
+
+    def stop(self, discard=False):
+        '''Flushes and closes the journal; discard=True also deletes the session files (clean exit).'''
+        if self.store is not None and self in self.store.observers: self.store.observers.remove(self)
+        self.store = None
+        if self._compaction is not None: self._abandon_compaction()
+        if self._file is not None:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except (OSError, ValueError) as e: print(f"Warning: Could not sync autosave journal: {e}")
+            self._file.close()
+            self._file = None
+        if discard: remove_session(self.directory, self._lock)
+
+    def update_meta(self, **changes):
+        self.meta.update(changes)
+        self._append(OP_META, json.dumps(self.meta).encode('utf-8'))
+
+    def tick(self):
+        '''Called periodically: syncs pending records in batches and compacts when the journal is large.'''
+        if self._file is None: return
+        if self._compaction is None and (self._ops_since_snapshot >= COMPACT_EVERY_OPS
+                                         or self._bytes_since_snapshot >= COMPACT_MAX_BYTES):
+            self._begin_compaction()
+        if self._pending and (self._pending >= FSYNC_BATCH_OPS or time.monotonic() - self._oldest_pending >= FSYNC_INTERVAL_SECONDS):
+            self._pending = 0
+            for f in self._journal_files():
+                f.flush()
+                # The worker gets its own descriptor: compaction or stop() may close the file (and its number be reused) first
+                fd = os.dup(f.fileno())
+                if self.tasks is None or self.tasks.submit(self._fsync, fd) is None: self._fsync(fd)
+
+    def _journal_files(self):
+        return [self._file] if self._compaction is None else [self._file, self._compaction['file']]
+
+    @staticmethod
+    def _fsync(fd):
+        '''Syncs and closes a descriptor duplicated from the journal file.'''
+        try: os.fsync(fd)
+        except OSError as e: print(f"Warning: Autosave journal fsync failed: {e}")
+        finally: os.close(fd)
+
+    def _snapshot(self, epoch):
+        '''The store and metadata as snapshot file bytes (including the trailing CRC).'''
+        meta = json.dumps(self.meta).encode('utf-8')
+        times, slides = self.store.times_ms(), self.store.slides()
+        snapshot = (_FILE_HEADER.pack(SNAPSHOT_MAGIC, FORMAT_VERSION, epoch)
+                    + _SNAPSHOT_COUNTS.pack(len(meta), len(times)) + meta + times.tobytes() + slides.tobytes())
+        return snapshot + struct.pack("<I", zlib.crc32(snapshot)), len(times)
+
+    def _compact(self):
+        '''Writes the snapshot of the next epoch and an empty journal for it, inline (session start, no runner).'''
+        self.epoch += 1
+        snapshot, count = self._snapshot(self.epoch)
+        _write_atomic(self.snapshot_path, snapshot)
+
+        if self._file is not None: self._file.close()
+        _write_atomic(self.journal_path, _FILE_HEADER.pack(JOURNAL_MAGIC, FORMAT_VERSION, self.epoch))
+        self._file = open(self.journal_path, 'ab')
+        _remove_file(self.next_journal_path) # Left by a compaction abandoned in an earlier session
+        self._pending = 0
+        self._ops_since_snapshot = 0
+        self._bytes_since_snapshot = 0
+        print(f"Autosave snapshot written ({count} keyframes, epoch {self.epoch}).")
+
+    def _begin_compaction(self):
+        '''Starts the next epoch without waiting on the disk: a worker writes the snapshot, _on_compacted switches over.'''
+        if self.tasks is None:
+            self._compact()
+            return
+        epoch = self.epoch + 1
+        snapshot, count = self._snapshot(epoch)
+        next_file = open(self.next_journal_path, 'wb')
+        next_file.write(_FILE_HEADER.pack(JOURNAL_MAGIC, FORMAT_VERSION, epoch))
+        next_file.flush()
+        compaction = {'epoch': epoch, 'file': next_file, 'fd': os.dup(next_file.fileno()), 'count': count, 'ops': 0, 'bytes': 0}
+        compaction['future'] = self.tasks.submit(_write_snapshot, self.snapshot_path, snapshot, compaction['fd'],
+                                                 on_done=lambda _: self._on_compacted(compaction),
+                                                 on_error=lambda error: self._on_compaction_failed(compaction, error))
+        if compaction['future'] is None: # Runner shut down: do it inline
+            os.close(compaction['fd'])
+            next_file.close()
+            self._compact()
+            return
+        self._compaction = compaction
+
+    def _on_compacted(self, compaction):
+        '''Snapshot of the new epoch is durable: its journal becomes the journal.'''
+        if compaction is not self._compaction: return # Abandoned by stop()
+        self._compaction = None
+        self._file.close()
+        compaction['file'].close() # Reopened after the rename (an open file cannot be renamed on Windows)
+        os.replace(self.next_journal_path, self.journal_path)
+        self._file = open(self.journal_path, 'ab')
+        self.epoch = compaction['epoch']
+        self._ops_since_snapshot = compaction['ops']
+        self._bytes_since_snapshot = compaction['bytes']
+        print(f"Autosave snapshot written ({compaction['count']} keyframes, epoch {self.epoch}).")
+
+    def _on_compaction_failed(self, compaction, error):
+        if compaction is not self._compaction: return
+        self._compaction = None
+        compaction['file'].close()
+        _remove_file(self.next_journal_path)
+        self._ops_since_snapshot = 0 # The old journal stays valid; try again after another full interval
+        self._bytes_since_snapshot = 0
+        print(f"Warning: Could not write autosave snapshot: {error}")
+
+    def _abandon_compaction(self):
+        '''stop() during a compaction: waits for a snapshot write already running, so it cannot land in a later session.'''
+        compaction, self._compaction = self._compaction, None
+        if compaction['future'].cancel():
+            os.close(compaction['fd'])
+            compaction['file'].close()
+            _remove_file(self.next_journal_path) # Snapshot still at the old epoch: the journal has everything
+            return
+        try: compaction['future'].result()
+        except Exception: pass # The old journal is intact either way
+        try:
+            compaction['file'].flush()
+            os.fsync(compaction['file'].fileno()) # Needed if the snapshot of its epoch made it to disk
+        except (OSError, ValueError) as e: print(f"Warning: Could not sync autosave journal: {e}")
+        compaction['file'].close()
+
+    # --- Store observer interface ---
+    def _append(self, op, payload=b""):
+        if self._file is None: return
+        record = _RECORD_HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload
+        self._file.write(record)
+        if self._compaction is not None: # Also belongs to the epoch being written
+            self._compaction['file'].write(record)
+            self._compaction['ops'] += 1
+            self._compaction['bytes'] += len(record)
+        if not self._pending: self._oldest_pending = time.monotonic()
+        self._pending += 1
+        self._ops_since_snapshot += 1
+        self._bytes_since_snapshot += _RECORD_HEADER.size + len(payload)
+
+    def on_insert(self, time_ms, slide, index): self._append(OP_INSERT, _PAIR.pack(time_ms, slide))
+    def on_delete(self, index, time_ms, slide): self._append(OP_DELETE, _ONE.pack(index))
+    def on_set_slide(self, index, slide, previous_slide): self._append(OP_SET_SLIDE, _PAIR.pack(index, slide))
+    def on_clear(self): self._append(OP_CLEAR)
+    def on_renumber(self, previous_slides): self._append(OP_RENUMBER)
+
+    def on_change(self, removed_ms, added_ms, added_slides, removed_slides):
+        removed_ms, added_ms, added_slides = _int64(removed_ms), _int64(added_ms), _int64(added_slides)
+        self._append(OP_CHANGE, _COUNTS.pack(len(removed_ms), len(added_ms), len(added_slides))
+                     + removed_ms.tobytes() + added_ms.tobytes() + added_slides.tobytes() + _int64(removed_slides).tobytes())
+
+    def on_load(self, times_ms, slides):
+        times_ms, slides = _int64(times_ms), _int64(slides)
+        self._append(OP_LOAD, _COUNTS.pack(len(times_ms), len(slides), 0) + times_ms.tobytes() + slides.tobytes())
+
+
+def _write_snapshot(path, data, journal_fd):
+    '''Worker: syncs the next epoch's journal header, then writes the snapshot that makes it current.'''
+    try: os.fsync(journal_fd)
+    finally: os.close(journal_fd)
+    _write_atomic(path, data)
+
+
+def _remove_file(path):
+    try: os.remove(path)
+    except FileNotFoundError: pass
+    except OSError as e: print(f"Warning: Could not remove '{path}': {e}")
+
+
+def _write_atomic(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def has_session(directory):
+    return os.path.exists(os.path.join(directory, SNAPSHOT_FILE))
+
+
+def discard_session(directory):
+    for name in (SNAPSHOT_FILE, JOURNAL_FILE, JOURNAL_NEXT_FILE):
+        try: os.remove(os.path.join(directory, name))
+        except FileNotFoundError: pass
+        except OSError as e: print(f"Warning: Could not remove autosave file '{name}': {e}")
+
+
+def remove_session(directory, lock):
+    '''Deletes a session's files, releases its lock and removes its directory.'''
+    discard_session(directory)
+    lock.release()
+    if _is_instance_dir(directory):
+        shutil.rmtree(directory, ignore_errors=True) # The lock file can only be deleted once closed (Windows)
+    else: # Session written directly into the root by an older version: keep the directory
+        try: os.remove(lock.path)
+        except OSError: pass
+
+
+def _is_instance_dir(directory):
+    pid, _, stamp = os.path.basename(directory).partition('-')
+    return pid.isdigit() and bool(stamp)
+
+
+def claim_orphaned_sessions(root):
+    '''Sessions under root left behind by instances that are no longer running, newest first.
+
+    Returns [(directory, SessionLock)] with each lock held by this process, so
+    another instance starting at the same time cannot claim the same session.
+    Sessions of running instances (lock held elsewhere) are skipped.
+    '''
+    try: directories = [os.path.join(root, name) for name in os.listdir(root)]
+    except OSError: return []
+    directories = [d for d in directories if os.path.isdir(d) and _is_instance_dir(d)] + [root] # root: older versions
+    claimed = []
+    for directory in directories:
+        lock = SessionLock(directory)
+        if not has_session(directory):
+            if directory == root or not os.path.exists(lock.path): continue # Owner may still be starting up
+            try: stale = lock.acquire() # Empty directory of a dead instance; left alone if its owner is alive
+            except OSError: continue
+            if stale: remove_session(directory, lock)
+            continue
+        try:
+            if not lock.acquire(): continue
+            claimed.append((os.path.getmtime(os.path.join(directory, SNAPSHOT_FILE)), directory, lock))
+        except OSError: lock.release()
+    claimed.sort(key=lambda item: item[0], reverse=True)
+    return [(directory, lock) for _, directory, lock in claimed]
+
+
+def _read_snapshot(path):
+    with open(path, 'rb') as f: data = f.read()
+    if len(data) < _FILE_HEADER.size + _SNAPSHOT_COUNTS.size + 4: raise ValueError("Autosave snapshot is truncated.")
+    body, (crc,) = data[:-4], struct.unpack("<I", data[-4:])
+    if zlib.crc32(body) != crc: raise ValueError("Autosave snapshot is corrupt (checksum mismatch).")
+    magic, version, epoch = _FILE_HEADER.unpack_from(body)
+    if magic != SNAPSHOT_MAGIC or version != FORMAT_VERSION: raise ValueError("Not an autosave snapshot of this version.")
+    meta_len, count = _SNAPSHOT_COUNTS.unpack_from(body, _FILE_HEADER.size)
+    pos = _FILE_HEADER.size + _SNAPSHOT_COUNTS.size
+    meta = json.loads(body[pos:pos + meta_len].decode('utf-8'))
+    pos += meta_len
+    times = np.frombuffer(body, dtype='<i8', count=count, offset=pos)
+    slides = np.frombuffer(body, dtype='<i8', count=count, offset=pos + 8 * count)
+    return epoch, meta, times, slides
+
+
+def read_session(directory, store):
+    '''Loads the snapshot into `store` and replays the journal on top.
+
+    Returns (meta, operations_replayed, complete) where complete is False
+    if the journal ended in a torn or corrupt record. Raises ValueError if
+    the snapshot itself cannot be read.
+    '''
+    epoch, meta, times, slides = _read_snapshot(os.path.join(directory, SNAPSHOT_FILE))
+    store.load_ms(times, slides)
+    data = _read_journal(os.path.join(directory, JOURNAL_FILE))
+    if data is None: return meta, 0, True
+    if len(data) < _FILE_HEADER.size: return meta, 0, False
+    magic, version, journal_epoch = _FILE_HEADER.unpack_from(data)
+    if magic == JOURNAL_MAGIC and version == FORMAT_VERSION and journal_epoch == epoch:
+        return _replay(data, _FILE_HEADER.size, store, meta)
+    if journal_epoch != epoch - 1: return meta, 0, False
+    # Crash during compaction, after the snapshot was written: the old journal is in it, later records are in the next one
+    data = _read_journal(os.path.join(directory, JOURNAL_NEXT_FILE))
+    if data is not None and len(data) >= _FILE_HEADER.size and _FILE_HEADER.unpack_from(data) == (JOURNAL_MAGIC, FORMAT_VERSION, epoch):
+        return _replay(data, _FILE_HEADER.size, store, meta)
+    return meta, 0, True
+
+
+def _read_journal(path):
+    try:
+        with open(path, 'rb') as f: return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _replay(data, pos, store, meta):
+    '''Applies journal records to the store's arrays directly (no journaling, one version bump).'''
+    times, slides = store._times, store._slides
+    view = memoryview(data)
+    replayed, end = 0, len(data)
+    unpack_header, header_size = _RECORD_HEADER.unpack_from, _RECORD_HEADER.size
+    unpack_pair, unpack_one, crc32 = _PAIR.unpack_from, _ONE.unpack_from, zlib.crc32
+    while pos < end:
+        if pos + header_size > end: return meta, replayed, False
+        op, length, crc = unpack_header(data, pos)
+        start = pos + header_size
+        pos = start + length
+        if pos > end or crc32(view[start:pos]) != crc: return meta, replayed, False
+
+        if op == OP_INSERT: # Fixed-size records are decoded in place, the hot path of a replay
+            t, s = unpack_pair(data, start)
+            i = bisect_right(times, t)
+            times.insert(i, t)
+            slides.insert(i, s)
+        elif op == OP_DELETE:
+            (i,) = unpack_one(data, start)
+            del times[i]
+            del slides[i]
+        elif op == OP_SET_SLIDE:
+            i, s = unpack_pair(data, start)
+            slides[i] = s
+        elif op == OP_RENUMBER:
+            slides = store._slides = type(slides)('q', range(len(times)))
+        elif op == OP_CLEAR:
+            del times[:]
+            del slides[:]
+        elif op == OP_META:
+            meta = json.loads(bytes(view[start:pos]).decode('utf-8'))
+        elif op in (OP_CHANGE, OP_LOAD):
+            a, b, c = _COUNTS.unpack_from(data, start)
+            count = (length - _COUNTS.size) // 8 # a + b + c, plus a removed slides if the record has them
+            arrays = np.frombuffer(data, dtype='<i8', count=count, offset=start + _COUNTS.size)
+            if op == OP_CHANGE:
+                removed_slides = arrays[a + b + c:] if count == 2 * a + b + c else None
+                store.apply_change(arrays[:a], arrays[a:a + b], arrays[a + b:a + b + c], removed_slides)
+            else:
+                store.load_ms(arrays[:a], arrays[a:a + b])
+            times, slides = store._times, store._slides # Bulk paths rebind the arrays
+        else:
+            return meta, replayed, False
+        replayed += 1
+    store.version += 1
+    return meta, replayed, True
+
+# END OF FILE keyframes/journal.py
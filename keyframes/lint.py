@@ -0,0 +1,142 @@
+# START OF FILE keyframes/lint.py
+'''Timing lint: per-keyframe findings kept current as the store changes.
+
+The linter observes a KeyframeStore. A finding for keyframe i depends only
+on keyframe i, its successor and a few global settings (audio end, slide
+count, minimum display time). So a single insert, delete or slide change
+only re-checks the one to three keyframes around it, and a renumber only
+touches the slide flags that actually changed. Bulk edits and setting
+changes re-check everything in one vectorized pass.
+'''
+from array import array
+import numpy as np
+
+LINT_ZERO_LENGTH = 1 # Segment has no duration (keyframe shares its time with the next)
+LINT_SHORT = 2 # Segment shorter than the minimum display time
+LINT_BEYOND_END = 4 # Keyframe after the end of the audio
+LINT_NO_SLIDE = 8 # Keyframe refers to a slide that is not loaded (more keyframes than slides)
+LINT_KINDS = (LINT_ZERO_LENGTH, LINT_SHORT, LINT_BEYOND_END, LINT_NO_SLIDE)
+LINT_LABELS = {LINT_ZERO_LENGTH: "zero-length segment", LINT_SHORT: "segment shorter than minimum",
+               LINT_BEYOND_END: "after end of audio", LINT_NO_SLIDE: "no slide loaded for it"}
+LINT_SYMBOLS = {LINT_ZERO_LENGTH: "0", LINT_SHORT: "s", LINT_BEYOND_END: ">", LINT_NO_SLIDE: "?"}
+DEFAULT_MIN_DISPLAY_SECONDS = 0.5
+
+
+class TimingLinter:
+    '''Keeps a bitmask of LINT_* flags per keyframe, aligned with the observed store.'''
+
+    def __init__(self, store, min_display_seconds=DEFAULT_MIN_DISPLAY_SECONDS):
+        self.store = store
+        self.end_ms = 0 # 0 = audio length unknown (end-of-audio checks off)
+        self.num_slides = 0 # 0 = no slides loaded (slide checks off)
+        self.min_ms = int(round(min_display_seconds * 1000))
+        self.version = 0 # Bumped whenever any flag changes, for UI caching
+        self._flags = array('B')
+        self._counts = dict.fromkeys(LINT_KINDS, 0)
+        store.observers.append(self)
+        self.recheck_all()
+
+    # --- Queries ---
+    def flags_at(self, index): return self._flags[index]
+    def count(self, kind): return self._counts[kind]
+    def total(self): return sum(self._counts.values())
+
+    def describe(self, index):
+        flags = self._flags[index]
+        return ", ".join(LINT_LABELS[kind] for kind in LINT_KINDS if flags & kind)
+
+    def symbols(self, index):
+        flags = self._flags[index]
+        return "".join(LINT_SYMBOLS[kind] for kind in LINT_KINDS if flags & kind)
+
+    def flagged_indices(self):
+        return np.flatnonzero(np.frombuffer(self._flags, dtype=np.uint8)) if self._flags else np.zeros(0, dtype=np.int64)
+
+    def summary(self):
+        '''Short text such as "2 zero-length segments, 1 after end of audio" ('' if clean).'''
+        return ", ".join(f"{self._counts[kind]} x {LINT_LABELS[kind]}" for kind in LINT_KINDS if self._counts[kind])
+
+    # --- Settings ---
+    def configure(self, end_seconds=None, num_slides=None, min_display_seconds=None):
+        '''Updates the global settings; re-checks everything only if one of them changed.'''
+        end_ms = self.end_ms if end_seconds is None else max(0, int(round(end_seconds * 1000)))
+        num_slides = self.num_slides if num_slides is None else int(num_slides)
+        min_ms = self.min_ms if min_display_seconds is None else int(round(min_display_seconds * 1000))
+        if (end_ms, num_slides, min_ms) == (self.end_ms, self.num_slides, self.min_ms): return
+        self.end_ms, self.num_slides, self.min_ms = end_ms, num_slides, min_ms
+        self.recheck_all()
+
+    # --- Checks ---
+    def _check(self, index):
+        '''Flags for one keyframe from the store (O(1)).'''
+        store = self.store
+        t = store.time_ms_at(index)
+        flags = 0
+        if self.end_ms and t > self.end_ms: flags |= LINT_BEYOND_END
+        if index + 1 < len(store): duration = store.time_ms_at(index + 1) - t
+        elif self.end_ms and t <= self.end_ms: duration = self.end_ms - t
+        else: duration = None # Last keyframe with no known end: no segment to judge
+        if duration == 0: flags |= LINT_ZERO_LENGTH
+        elif duration is not None and duration < self.min_ms: flags |= LINT_SHORT
+        if self.num_slides and not 0 <= store.slide_at(index) < self.num_slides: flags |= LINT_NO_SLIDE
+        return flags
+
+    def _set(self, index, flags):
+        old = self._flags[index]
+        if old == flags: return
+        for kind in LINT_KINDS:
+            if old & kind: self._counts[kind] -= 1
+            if flags & kind: self._counts[kind] += 1
+        self._flags[index] = flags
+        self.version += 1
+
+    def _recheck(self, first, last):
+        for i in range(max(first, 0), min(last, len(self._flags) - 1) + 1):
+            self._set(i, self._check(i))
+
+    def recheck_all(self):
+        '''Vectorized full pass (bulk edits and setting changes).'''
+        times, slides = self.store.times_ms(), self.store.slides()
+        n = len(times)
+        flags = np.zeros(n, dtype=np.uint8)
+        if n:
+            durations = np.diff(times, append=self.end_ms if self.end_ms else times[-1]).astype(np.int64)
+            has_segment = np.ones(n, dtype=bool)
+            if self.end_ms: has_segment[-1] = times[-1] <= self.end_ms
+            else: has_segment[-1] = False
+            flags[has_segment & (durations == 0)] |= LINT_ZERO_LENGTH
+            flags[has_segment & (durations > 0) & (durations < self.min_ms)] |= LINT_SHORT
+            if self.end_ms: flags[times > self.end_ms] |= LINT_BEYOND_END
+            if self.num_slides: flags[(slides < 0) | (slides >= self.num_slides)] |= LINT_NO_SLIDE
+        self._flags = array('B', flags.tobytes())
+        self._counts = {kind: int(np.count_nonzero(flags & kind)) for kind in LINT_KINDS}
+        self.version += 1
+
+    # --- Store observer interface ---
+    def on_insert(self, time_ms, slide, index):
+        self._flags.insert(index, 0)
+        self._recheck(index - 1, index) # New segment and the one it split
+
+    def on_delete(self, index, time_ms, slide):
+        old = self._flags[index]
+        for kind in LINT_KINDS:
+            if old & kind: self._counts[kind] -= 1
+        del self._flags[index]
+        self.version += 1
+        self._recheck(index - 1, index - 1) # The previous segment now runs to the next keyframe
+
+    def on_set_slide(self, index, slide, previous_slide): self._recheck(index, index)
+    def on_change(self, removed_ms, added_ms, added_slides, removed_slides): self.recheck_all()
+    def on_load(self, times_ms, slides): self.recheck_all()
+    def on_clear(self): self.recheck_all()
+
+    def on_renumber(self, previous_slides):
+        '''Only the slide check depends on the slide numbers: flips LINT_NO_SLIDE where it changed.'''
+        if not self.num_slides: return
+        previous_slides = np.asarray(previous_slides)
+        was_missing = (previous_slides < 0) | (previous_slides >= self.num_slides)
+        is_missing = np.arange(len(previous_slides)) >= self.num_slides
+        for i in np.flatnonzero(was_missing != is_missing).tolist():
+            self._set(i, self._flags[i] ^ LINT_NO_SLIDE)
+
+# END OF FILE keyframes/lint.py
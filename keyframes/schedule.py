@@ -0,0 +1,87 @@
+# START OF FILE keyframes/schedule.py
+import math
+from bisect import bisect_right
+import numpy as np
+
+SCHEDULE_EPSILON = 0.0001 # A time this close before a keyframe already shows its slide
+
+
+def _query_ms(time_seconds):
+    '''Query time in whole milliseconds such that ms >= keyframe_ms iff time >= keyframe - epsilon.'''
+    return math.floor((time_seconds + SCHEDULE_EPSILON) * 1000.0)
+
+
+class SlideSchedule:
+    '''Keyframe start times mapped to slide indices, with a playback cursor.
+
+    Sequential queries (playback ticks) advance the cursor in amortized O(1);
+    jumps (seeks) fall back to a binary search. The schedule is rebuilt lazily
+    when the KeyframeStore's version changes.
+    '''
+
+    def __init__(self):
+        self._starts = [] # Keyframe times (ms), sorted
+        self._slides = [] # Slide index per keyframe
+        self._starts_array = np.zeros(0, dtype=np.int64)
+        self._slides_array = np.zeros(0, dtype=np.int64)
+        self._version = None
+        self._cursor = 0 # Index of the keyframe that was active at the last query
+
+    def sync(self, store):
+        '''Rebuilds from the store if it changed since the last build.'''
+        if store.version == self._version: return
+        self._starts_array = store.times_ms()
+        self._slides_array = store.slides()
+        self._starts = self._starts_array.tolist()
+        self._slides = self._slides_array.tolist()
+        self._version = store.version
+        self._cursor = 0
+
+    def __len__(self): return len(self._starts)
+
+    def keyframe_index_at(self, time_seconds):
+        '''Index of the keyframe active at time_seconds (the first one before any keyframe), or -1 if empty.'''
+        starts = self._starts
+        n = len(starts)
+        if n == 0: return -1
+        t = _query_ms(time_seconds)
+        c = self._cursor
+        if starts[c] <= t:
+            # Common case during playback: still inside the same segment, or just crossed into the next one
+            if c + 1 >= n or t < starts[c + 1]: return c
+            if c + 2 >= n or t < starts[c + 2]:
+                self._cursor = c + 1
+                return c + 1
+        c = max(0, bisect_right(starts, t) - 1) # Seek: binary search
+        self._cursor = c
+        return c
+
+    def slide_at(self, time_seconds):
+        '''Slide index scheduled at time_seconds, or -1 if there are no keyframes.'''
+        index = self.keyframe_index_at(time_seconds)
+        return self._slides[index] if index != -1 else -1
+
+    def slide_at_keyframe(self, index): return self._slides[index]
+
+    def upcoming_slides(self, index, count, max_scan=64):
+        '''Up to `count` distinct slides scheduled after keyframe `index`, soonest first.'''
+        found = []
+        for slide in self._slides[index + 1:index + 1 + max_scan]:
+            if slide not in found: found.append(slide)
+            if len(found) >= count: break
+        return found
+
+    def slides_for_times(self, times_seconds):
+        '''Vectorized slide lookup for an array of times (e.g. every video frame); -1 if empty.'''
+        times = np.asarray(times_seconds, dtype=np.float64)
+        if len(self._starts_array) == 0: return np.full(times.shape, -1, dtype=np.int64)
+        query = np.floor((times + SCHEDULE_EPSILON) * 1000.0).astype(np.int64)
+        index = np.maximum(np.searchsorted(self._starts_array, query, side='right') - 1, 0)
+        return self._slides_array[index]
+
+    def slides_for_frames(self, fps, duration_seconds, start_seconds=0.0):
+        '''Slide index for every frame at the given frame rate over [start, start + duration).'''
+        n_frames = max(0, int(math.ceil(duration_seconds * fps - 1e-9)))
+        return self.slides_for_times(start_seconds + np.arange(n_frames) / float(fps))
+
+# END OF FILE keyframes/schedule.py
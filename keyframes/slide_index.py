@@ -0,0 +1,129 @@
+# START OF FILE keyframes/slide_index.py
+'''Reverse index from slide to the keyframes that show it.
+
+Keyframes carry an explicit slide reference, so one slide can be shown by
+several keyframes (an agenda slide revisited between sections). The index
+observes a KeyframeStore and keeps, per slide, the sorted times (ms) of the
+keyframes showing it. Times are used instead of positions because every
+insert or delete shifts the positions after it, while times only change when
+that keyframe itself is edited. Single edits update one or two slide entries
+in O(log k); bulk edits rebuild the whole index in one vectorized pass.
+'''
+from array import array
+from bisect import bisect_left, bisect_right, insort
+import numpy as np
+
+
+class SlideUsageIndex:
+    '''slide index -> sorted keyframe times (ms), aligned with the observed store.'''
+
+    def __init__(self, store):
+        self.store = store
+        self.version = 0 # Bumped on every change, for UI caching
+        self._times = {}
+        store.observers.append(self)
+        self.rebuild()
+
+    # --- Queries ---
+    def count(self, slide):
+        '''Number of keyframes showing `slide`.'''
+        times = self._times.get(slide)
+        return len(times) if times else 0
+
+    def times_ms(self, slide):
+        '''Sorted times (ms) at which `slide` is shown.'''
+        return list(self._times.get(slide, ()))
+
+    def keyframes_for(self, slide):
+        '''Store indices of the keyframes showing `slide`, in time order.'''
+        indices = []
+        previous = None
+        for t in self._times.get(slide, ()):
+            # A repeated time is another keyframe of the same tie: continue after the one just found
+            indices.append(self._store_index(slide, t, indices[-1] + 1 if t == previous else None))
+            previous = t
+        return indices
+
+    def keyframe_at(self, slide, time_ms):
+        '''Store index of the first keyframe at `time_ms` that shows `slide`.'''
+        return self._store_index(slide, time_ms)
+
+    def _store_index(self, slide, time_ms, start=None):
+        store_times, store_slides = self.store._times, self.store._slides
+        i = bisect_left(store_times, time_ms) if start is None else start
+        while store_slides[i] != slide: i += 1 # Another slide at the same time
+        return i
+
+    def next_use(self, slide, after_ms):
+        '''Time (ms) of the first keyframe showing `slide` after `after_ms`, wrapping around; None if unused.'''
+        times = self._times.get(slide)
+        if not times: return None
+        i = bisect_right(times, after_ms)
+        return times[i] if i < len(times) else times[0]
+
+    def used_slides(self):
+        return sorted(self._times)
+
+    def usage_counts(self, num_slides):
+        '''int64 array of how many keyframes show each of slides 0..num_slides-1.'''
+        counts = np.zeros(num_slides, dtype=np.int64)
+        for slide, times in self._times.items():
+            if 0 <= slide < num_slides: counts[slide] = len(times)
+        return counts
+
+    def summary(self, num_slides):
+        '''Short usage text, e.g. "12 of 40 slides used, 3 shown more than once, 28 never shown".'''
+        counts = self.usage_counts(num_slides)
+        used = int(np.count_nonzero(counts))
+        repeated = int(np.count_nonzero(counts > 1))
+        text = f"{used} of {num_slides} slides used"
+        if repeated: text += f", {repeated} shown more than once"
+        if used < num_slides: text += f", {num_slides - used} never shown"
+        return text
+
+    # --- Maintenance ---
+    def rebuild(self):
+        '''Vectorized full pass: group the (already time-sorted) keyframes by slide.'''
+        times, slides = self.store.times_ms(), self.store.slides()
+        self._times = {}
+        if len(times):
+            order = np.argsort(slides, kind='stable') # Stable, so each group stays in time order
+            grouped_slides, grouped_times = slides[order], times[order]
+            starts = np.flatnonzero(np.diff(grouped_slides, prepend=grouped_slides[0] - 1))
+            ends = np.append(starts[1:], len(order))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                self._times[int(grouped_slides[start])] = array('q', grouped_times[start:end].tolist())
+        self.version += 1
+
+    def _add(self, slide, time_ms):
+        times = self._times.get(slide)
+        if times is None: self._times[slide] = array('q', (time_ms,))
+        else: insort(times, time_ms)
+
+    def _remove(self, slide, time_ms):
+        times = self._times[slide]
+        del times[bisect_left(times, time_ms)]
+        if not times: del self._times[slide]
+
+    # --- Store observer interface ---
+    def on_insert(self, time_ms, slide, index):
+        self._add(slide, time_ms)
+        self.version += 1
+
+    def on_delete(self, index, time_ms, slide):
+        self._remove(slide, time_ms)
+        self.version += 1
+
+    def on_set_slide(self, index, slide, previous_slide):
+        if slide == previous_slide: return
+        time_ms = self.store.time_ms_at(index)
+        self._remove(previous_slide, time_ms)
+        self._add(slide, time_ms)
+        self.version += 1
+
+    def on_change(self, removed_ms, added_ms, added_slides, removed_slides): self.rebuild()
+    def on_load(self, times_ms, slides): self.rebuild()
+    def on_clear(self): self.rebuild()
+    def on_renumber(self, previous_slides): self.rebuild()
+
+# END OF FILE keyframes/slide_index.py
@@ -0,0 +1,300 @@
+# START OF FILE keyframes/store.py
+from array import array
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+KEYFRAME_KEYS = ('time', 'slideIndex')
+
+
+def to_ms(time_seconds):
+    '''Seconds (float) to integer milliseconds, the store's time unit.'''
+    return int(round(float(time_seconds) * 1000.0))
+
+
+class KeyframeView:
+    '''Dict-compatible view of one keyframe in a KeyframeStore.
+
+    Supports kf['time'], kf['slideIndex'], kf.get(...), item assignment and
+    comparison with plain dicts, so code written for the old list of dicts
+    keeps working. A view refers to a position: it is only valid until the
+    store is next modified.
+    '''
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == 'time': return self._store.time_at(self._index)
+        if key == 'slideIndex': return self._store.slide_at(self._index)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'time': self._store.move(self._index, value)
+        elif key == 'slideIndex': self._store.set_slide(self._index, value)
+        else: raise KeyError(key)
+
+    def get(self, key, default=None):
+        try: return self[key]
+        except KeyError: return default
+
+    def keys(self): return iter(KEYFRAME_KEYS)
+    def values(self): return (self[k] for k in KEYFRAME_KEYS)
+    def items(self): return ((k, self[k]) for k in KEYFRAME_KEYS)
+    def __iter__(self): return iter(KEYFRAME_KEYS)
+    def __len__(self): return len(KEYFRAME_KEYS)
+    def __contains__(self, key): return key in KEYFRAME_KEYS
+    def copy(self): return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, (KeyframeView, dict)): return self.copy() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self): return repr(self.copy())
+
+
+class KeyframeStore:
+    '''Keyframes kept sorted by time in parallel contiguous arrays.
+
+    Times are integer milliseconds (array 'q'), slide indices live in a
+    parallel array. Lookups are binary searches; insert/delete are a binary
+    search plus one memmove of the tail. `version` increases on every change
+    so callers can cache derived data (schedules, list text, ...). Objects in
+    `observers` (the autosave journal, the timing linter) are told about every
+    mutation after it happened: on_insert(time_ms, slide, index),
+    on_delete(index, time_ms, slide), on_set_slide(index, slide,
+    previous_slide), on_change(removed_ms, added_ms, added_slides, removed_slides),
+    on_load(times_ms, slides), on_clear(), on_renumber(previous_slides).
+    '''
+
+    def __init__(self, keyframes=None):
+        self._times = array('q')
+        self._slides = array('q')
+        self.version = 0
+        self.observers = []
+        if keyframes: self.replace([kf['time'] for kf in keyframes], [kf.get('slideIndex', -1) for kf in keyframes])
+
+    def _notify(self, event, *args):
+        for observer in self.observers: getattr(observer, event)(*args)
+
+    # --- Sequence protocol (list-of-dicts compatibility) ---
+    def __len__(self): return len(self._times)
+    def __bool__(self): return len(self._times) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice): return [KeyframeView(self, i) for i in range(*index.indices(len(self)))]
+        return KeyframeView(self, self._position(index))
+
+    def _position(self, index):
+        '''index as a position (negative counts from the end, like a list); IndexError if out of range.'''
+        if index < 0: index += len(self._times)
+        if not 0 <= index < len(self._times): raise IndexError("keyframe index out of range")
+        return index
+
+    def __iter__(self):
+        return (KeyframeView(self, i) for i in range(len(self._times)))
+
+    def __delitem__(self, index):
+        self.delete(index)
+
+    def __repr__(self): return f"KeyframeStore({self.to_list()!r})"
+
+    # --- Element access ---
+    def time_at(self, index): return self._times[index] / 1000.0
+    def time_ms_at(self, index): return self._times[index]
+    def slide_at(self, index): return self._slides[index]
+
+    def set_slide(self, index, slide_index):
+        index = self._position(index)
+        previous = self._slides[index]
+        self._slides[index] = int(slide_index)
+        self.version += 1
+        if self.observers: self._notify('on_set_slide', index, int(slide_index), previous)
+
+    def times_ms(self):
+        '''Copy of all times as an int64 numpy array (milliseconds).'''
+        return np.array(self._times, dtype=np.int64)
+
+    def times_seconds(self):
+        return self.times_ms() / 1000.0
+
+    def slides(self):
+        return np.array(self._slides, dtype=np.int64)
+
+    def to_list(self):
+        '''Plain list of {'time', 'slideIndex'} dicts.'''
+        return [{'time': t / 1000.0, 'slideIndex': s} for t, s in zip(self._times, self._slides)]
+
+    # --- Queries (all O(log n)) ---
+    def find(self, time_seconds, tolerance=0.0005):
+        '''Index of a keyframe within tolerance of time_seconds, or -1.'''
+        return self.nearest(time_seconds, tolerance)
+
+    def nearest(self, time_seconds, tolerance=None):
+        '''Index of the keyframe closest to time_seconds (within tolerance if given), or -1.'''
+        if not self._times: return -1
+        t = to_ms(time_seconds)
+        i = bisect_left(self._times, t)
+        best = -1
+        for j in (i - 1, i):
+            if 0 <= j < len(self._times) and (best == -1 or abs(self._times[j] - t) < abs(self._times[best] - t)):
+                best = j
+        if tolerance is not None and abs(self._times[best] - t) > to_ms(tolerance): return -1
+        return best
+
+    def index_at_or_before(self, time_seconds):
+        '''Index of the last keyframe with time <= time_seconds, or -1 if none.'''
+        return bisect_right(self._times, to_ms(time_seconds)) - 1
+
+    def range(self, start_seconds, end_seconds):
+        '''(lo, hi) index bounds of keyframes with start <= time < end.'''
+        return bisect_left(self._times, to_ms(start_seconds)), bisect_left(self._times, to_ms(end_seconds))
+
+    # --- Mutation ---
+    def insert(self, time_seconds, slide_index=-1):
+        '''Inserts a keyframe keeping time order; returns its index.'''
+        t = to_ms(time_seconds)
+        i = bisect_right(self._times, t)
+        self._times.insert(i, t)
+        self._slides.insert(i, int(slide_index))
+        self.version += 1
+        if self.observers: self._notify('on_insert', t, int(slide_index), i)
+        return i
+
+    def add(self, time_seconds, slide_index=-1, min_distance=0.010):
+        '''Inserts unless a keyframe lies within min_distance. Returns (index, inserted).'''
+        existing = self.nearest(time_seconds)
+        if existing != -1 and abs(self._times[existing] - to_ms(time_seconds)) < to_ms(min_distance):
+            return existing, False
+        return self.insert(time_seconds, slide_index), True
+
+    def delete(self, index):
+        '''Removes the keyframe at index; returns its (time_seconds, slide_index).'''
+        index = self._position(index)
+        time_ms, slide = self._times[index], self._slides[index]
+        del self._times[index]
+        del self._slides[index]
+        self.version += 1
+        if self.observers: self._notify('on_delete', index, time_ms, slide)
+        return time_ms / 1000.0, slide
+
+    def move(self, index, new_time_seconds):
+        '''Changes one keyframe's time (keeping its slide); returns its new index.'''
+        _, slide_index = self.delete(index)
+        return self.insert(new_time_seconds, slide_index)
+
+    def extend(self, times_seconds, slide_indices=None):
+        '''Bulk insert: one merge sort instead of one insert per keyframe.'''
+        times = np.round(np.asarray(times_seconds, dtype=np.float64) * 1000.0).astype(np.int64)
+        if len(times) == 0: return
+        slides = np.full(len(times), -1, dtype=np.int64) if slide_indices is None else np.asarray(slide_indices, dtype=np.int64)
+        self._load(np.concatenate((self.times_ms(), times)), np.concatenate((self.slides(), slides)))
+        if self.observers: self._notify('on_change', (), times, slides, ())
+
+    def replace(self, times_seconds, slide_indices):
+        '''Replaces all keyframes (input need not be sorted).'''
+        times = np.round(np.asarray(times_seconds, dtype=np.float64) * 1000.0).astype(np.int64)
+        self.load_ms(times, slide_indices)
+
+    def load_ms(self, times_ms, slide_indices):
+        '''Replaces all keyframes from integer-millisecond times (input need not be sorted).'''
+        times_ms, slide_indices = np.asarray(times_ms, dtype=np.int64), np.asarray(slide_indices, dtype=np.int64)
+        self._load(times_ms, slide_indices)
+        if self.observers: self._notify('on_load', times_ms, slide_indices)
+
+    def apply_change(self, removed_ms, added_ms, added_slides, removed_slides=None):
+        '''Removes keyframes by exact (time ms, slide) pair and inserts others, as one edit.
+
+        Keyframes may share a time, so each removal is matched on its slide
+        too (on time alone if removed_slides is None), one keyframe per pair.
+        All removals are located before anything changes: if one has no
+        match, ValueError is raised and the store is left untouched. Small
+        changes go through bisect/insert (observers see each step as
+        on_delete/on_insert); large ones are one vectorized merge reported as
+        on_change.
+        '''
+        removed_ms = np.asarray(removed_ms, dtype=np.int64)
+        added_ms = np.asarray(added_ms, dtype=np.int64)
+        added_slides = np.asarray(added_slides, dtype=np.int64)
+        if removed_slides is not None: removed_slides = np.asarray(removed_slides, dtype=np.int64)
+        if len(removed_ms) + len(added_ms) <= 8:
+            indices = self._locate(removed_ms.tolist(), None if removed_slides is None else removed_slides.tolist())
+            for i in sorted(indices, reverse=True): # Back to front: earlier indices stay valid
+                t, slide = self._times[i], self._slides[i]
+                del self._times[i]
+                del self._slides[i]
+                if self.observers: self._notify('on_delete', i, t, slide)
+            for t, s in zip(added_ms.tolist(), added_slides.tolist()):
+                i = bisect_right(self._times, t)
+                self._times.insert(i, t)
+                self._slides.insert(i, s)
+                if self.observers: self._notify('on_insert', t, s, i)
+            self.version += 1
+            return
+
+        times, slides = self.times_ms(), self.slides()
+        if len(removed_ms):
+            keep = np.ones(len(times), dtype=bool)
+            keep[self._locate_vectorized(times, slides, removed_ms, removed_slides)] = False
+            times, slides = times[keep], slides[keep]
+        self._load(np.concatenate((times, added_ms)), np.concatenate((slides, added_slides)))
+        if self.observers:
+            self._notify('on_change', removed_ms, added_ms, added_slides,
+                         removed_slides if removed_slides is not None else np.full(len(removed_ms), -1, dtype=np.int64))
+
+    def _locate(self, removed_ms, removed_slides):
+        '''Distinct indices of the keyframes matching each (time, slide) pair (any slide if removed_slides is None).'''
+        taken = set()
+        for k, t in enumerate(removed_ms):
+            i = bisect_left(self._times, t)
+            while i < len(self._times) and self._times[i] == t:
+                if i not in taken and (removed_slides is None or self._slides[i] == removed_slides[k]): break
+                i += 1
+            else:
+                slide = "" if removed_slides is None else f" with slide {removed_slides[k]}"
+                raise ValueError(f"No keyframe at {t} ms{slide}")
+            taken.add(i)
+        return taken
+
+    @staticmethod
+    def _locate_vectorized(times, slides, removed_ms, removed_slides):
+        '''Vectorized _locate: pairs are ranked to one integer key, then matched once per occurrence.'''
+        if removed_slides is None: slides, removed_slides = np.zeros_like(times), np.zeros_like(removed_ms)
+        n = len(times)
+        pairs = np.concatenate((np.stack((times, slides), axis=1), np.stack((removed_ms, removed_slides), axis=1)))
+        keys = np.unique(pairs, axis=0, return_inverse=True)[1].reshape(-1)
+        order = np.argsort(keys[:n], kind='stable')
+        present, wanted = keys[:n][order], np.sort(keys[n:])
+        # Equal pairs are removed once per occurrence: offset each repeat past the previous match
+        repeat = np.arange(len(wanted)) - np.searchsorted(wanted, wanted, side='left')
+        position = np.searchsorted(present, wanted, side='left') + repeat
+        if np.any(position >= n) or np.any(present[np.minimum(position, n - 1)] != wanted):
+            raise ValueError("Some keyframes to remove are not present")
+        return order[position]
+
+    def _load(self, times_ms, slides):
+        order = np.argsort(times_ms, kind='stable')
+        self._times = array('q', times_ms[order].tolist())
+        self._slides = array('q', slides[order].tolist())
+        self.version += 1
+
+    def clear(self):
+        self._times = array('q')
+        self._slides = array('q')
+        self.version += 1
+        if self.observers: self._notify('on_clear')
+
+    def renumber_slides(self):
+        '''Assigns slide i to keyframe i (one slide per keyframe, in deck order).
+
+        Does nothing (no version bump, no notification) if the slides already
+        follow keyframe order.
+        '''
+        previous = self.slides()
+        if np.array_equal(previous, np.arange(len(previous))): return
+        self._slides = array('q', range(len(self._times)))
+        self.version += 1
+        if self.observers: self._notify('on_renumber', previous)
+
+# END OF FILE keyframes/store.py
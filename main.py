@@ -1,6 +1,7 @@
 import sys
 import os
 import platform
+import multiprocessing
 import tkinter as tk # Import tkinter early for version check?
 import traceback # For printing detailed errors
 
@@ -13,12 +14,13 @@ if script_dir not in sys.path:
      print(f"Added {script_dir} to sys.path")
 
 # --- Environment Checks ---
-print(f"Python Version: {sys.version}")
-try:
-    print(f"Tkinter Version: {tk.Tcl().eval('info patchlevel')}") # Get Tk version
-except tk.TclError as e:
-    print(f"Could not get Tkinter version: {e}")
-print(f"Platform: {platform.system()} {platform.release()}")
+def print_environment():
+    print(f"Python Version: {sys.version}")
+    try:
+        print(f"Tkinter Version: {tk.Tcl().eval('info patchlevel')}") # Get Tk version
+    except tk.TclError as e:
+        print(f"Could not get Tkinter version: {e}")
+    print(f"Platform: {platform.system()} {platform.release()}")
 
 
 # --- DPI Awareness (Windows specific) ---
@@ -84,33 +86,34 @@ def set_dpi_awareness():
          return False
     return False # Default if not Windows or failed
 
-set_dpi_awareness()
-
 # --- Main Application Import and Run ---
 # Import the main window class AFTER setting DPI awareness
 # Add detailed error handling for potential import issues
-try:
-    print("Importing application modules...")
-    from ui.main_window import AudioKeyframeEditor
-    print("Application modules imported successfully.")
-except ImportError as e:
-     print("\n--- ImportError ---")
-     print(f"Failed to import application components: {e}")
-     print("This might happen if:")
-     print(" 1. You haven't run install.bat successfully.")
-     print(" 2. You are not running 'run.bat' or 'python main.py' from the correct directory.")
-     print(" 3. There's an issue with the Python environment or installed packages.")
-     print(" 4. A file is missing or corrupted (check handlers/ ui/ folders).")
-     print("\nPlease check the console output from install.bat and ensure requirements.txt is correct.")
-     traceback.print_exc() # Print traceback for more details
-     input("Press Enter to exit.") # Keep console open
-     sys.exit(1)
-except Exception as general_import_error:
-     print("\n--- Unexpected Error During Import ---")
-     traceback.print_exc()
-     print(f"\nError: {general_import_error}")
-     input("An unexpected error occurred while importing application modules. Press Enter to exit.")
-     sys.exit(1)
+def import_application():
+    '''Imports the main window class; exits with a hint if the application cannot be loaded.'''
+    try:
+        print("Importing application modules...")
+        from ui.main_window import AudioKeyframeEditor
+        print("Application modules imported successfully.")
+        return AudioKeyframeEditor
+    except ImportError as e:
+         print("\n--- ImportError ---")
+         print(f"Failed to import application components: {e}")
+         print("This might happen if:")
+         print(" 1. You haven't run install.bat successfully.")
+         print(" 2. You are not running 'run.bat' or 'python main.py' from the correct directory.")
+         print(" 3. There's an issue with the Python environment or installed packages.")
+         print(" 4. A file is missing or corrupted (check handlers/ ui/ folders).")
+         print("\nPlease check the console output from install.bat and ensure requirements.txt is correct.")
+         traceback.print_exc() # Print traceback for more details
+         input("Press Enter to exit.") # Keep console open
+         sys.exit(1)
+    except Exception as general_import_error:
+         print("\n--- Unexpected Error During Import ---")
+         traceback.print_exc()
+         print(f"\nError: {general_import_error}")
+         input("An unexpected error occurred while importing application modules. Press Enter to exit.")
+         sys.exit(1)
 
 
 def run_application():
@@ -180,6 +183,12 @@ if __name__ == "__main__":
     # args = parser.parse_args()
     # if args.debug: print("Debug mode enabled.")
 
+    # All start-up side effects happen here, not at import time: slide hashing
+    # starts its worker processes with the "spawn" method, which re-imports this module.
+    multiprocessing.freeze_support()
+    print_environment()
+    set_dpi_awareness() # Before the main window module (and tkinter's root) is loaded
+    AudioKeyframeEditor = import_application()
     run_application()
 
 # END OF FILE main.py
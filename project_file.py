@@ -0,0 +1,231 @@
+# START OF FILE project_file.py
+'''Binary project file (.akfproj) with independently loadable sections.
+
+Layout: a fixed header, a table of contents (tag, offset, length, CRC32 per
+section), then the sections. Opening reads the header, the TOC and the small
+META and KEYF sections. ANLY (cached analysis arrays) and SLDS (per-slide
+content hashes) are only read when asked for.
+
+    META  JSON: audio reference + content hash, slides folder + digest, selection/view state
+    KEYF  keyframe count, then LEB128 varints: time deltas (ms), zigzag(slide - position)
+    ANLY  numpy .npz (no pickles) of analysis artifacts, candidates and snap features
+    SLDS  JSON list of {name, size, mtime, sha256} for each slide file
+'''
+import hashlib
+import io
+import json
+import os
+import struct
+import zlib
+import numpy as np
+
+PROJECT_EXTENSION = ".akfproj"
+PROJECT_MAGIC = b"AKFP"
+PROJECT_VERSION = 1
+SECTION_META = b"META"
+SECTION_KEYFRAMES = b"KEYF"
+SECTION_ANALYSIS = b"ANLY"
+SECTION_SLIDES = b"SLDS"
+HASH_CHUNK_BYTES = 1 << 20
+
+_HEADER = struct.Struct("<4sHHI") # magic, version, flags, section count
+_TOC_ENTRY = struct.Struct("<4sQQI") # tag, offset, length, crc32
+_COUNT = struct.Struct("<I")
+
+
+class ProjectFileError(ValueError):
+    '''Unreadable or corrupt project file.'''
+
+
+# --- Varint coding (vectorized) ---
+def encode_varints(values):
+    '''LEB128-encodes non-negative integers into bytes.'''
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0: return b""
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10): nbytes += values >= np.uint64(1 << (7 * k))
+    starts = np.cumsum(nbytes) - nbytes
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        has = nbytes > k
+        byte = (values[has] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[has] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[has] + k] = (byte | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def decode_varints(data, count):
+    '''Decodes `count` LEB128 integers; returns (uint64 array, bytes consumed).'''
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buf < 0x80)[:count]
+    if len(ends) < count: raise ProjectFileError("Keyframe data is truncated.")
+    used = int(ends[-1]) + 1 if count else 0
+    buf = buf[:used].astype(np.uint64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shift = (np.arange(used) - np.repeat(starts, np.diff(np.concatenate((starts, [used]))))) * 7
+    if used and shift.max() > 63: raise ProjectFileError("Keyframe varint is too long.")
+    parts = (buf & np.uint64(0x7F)) << shift.astype(np.uint64)
+    return (np.add.reduceat(parts, starts) if count else np.zeros(0, dtype=np.uint64)), used
+
+
+def encode_keyframes(times_ms, slides):
+    '''KEYF payload: count, delta-coded sorted times, zigzag slide offsets from the positional default.'''
+    times_ms = np.asarray(times_ms, dtype=np.int64)
+    slides = np.asarray(slides, dtype=np.int64)
+    if len(times_ms) and (times_ms[0] < 0 or np.any(np.diff(times_ms) < 0)):
+        raise ValueError("Keyframe times must be sorted and non-negative.")
+    deltas = np.diff(times_ms, prepend=0)
+    offsets = slides - np.arange(len(slides), dtype=np.int64)
+    zigzag = (offsets << 1) ^ (offsets >> 63)
+    return _COUNT.pack(len(times_ms)) + encode_varints(deltas) + encode_varints(zigzag.view(np.uint64))
+
+
+def decode_keyframes(payload):
+    (count,) = _COUNT.unpack_from(payload)
+    deltas, used = decode_varints(memoryview(payload)[_COUNT.size:], count)
+    zigzag, _ = decode_varints(memoryview(payload)[_COUNT.size + used:], count)
+    times_ms = np.cumsum(deltas.astype(np.int64))
+    offsets = (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+    return times_ms, offsets + np.arange(count, dtype=np.int64)
+
+
+# --- Analysis arrays (nested dicts/lists of arrays <-> flat npz) ---
+def _flatten(value, prefix, out):
+    if isinstance(value, dict):
+        for key, item in value.items(): _flatten(item, f"{prefix}/{key}", out)
+    elif isinstance(value, (list, tuple)):
+        out[f"{prefix}/#len"] = np.array(len(value))
+        for i, item in enumerate(value): _flatten(item, f"{prefix}/#{i}", out)
+    else:
+        array = np.asarray(value)
+        if array.dtype.kind in "biufU": out[prefix] = array
+        else: print(f"Note: Analysis value '{prefix.lstrip('/')}' is not stored in the project (type {type(value).__name__}).")
+
+
+def _unflatten(flat):
+    root = {}
+    for path in sorted(flat):
+        node, parts = root, path.split("/")[1:]
+        for part in parts[:-1]: node = node.setdefault(part, {})
+        array = flat[path]
+        node[parts[-1]] = array.item() if array.ndim == 0 and parts[-1] != "#len" else array
+
+    def rebuild(node):
+        if not isinstance(node, dict): return node
+        if "#len" in node: return [rebuild(node.get(f"#{i}")) for i in range(int(node["#len"]))]
+        return {key: rebuild(item) for key, item in node.items()}
+    return rebuild(root)
+
+
+def encode_analysis(artifacts):
+    flat = {}
+    _flatten(artifacts, "", flat)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{path.replace("/", "|"): array for path, array in flat.items()})
+    return buffer.getvalue()
+
+
+def decode_analysis(payload):
+    with np.load(io.BytesIO(payload), allow_pickle=False) as npz:
+        return _unflatten({name.replace("|", "/"): npz[name] for name in npz.files})
+
+
+# --- Content hashes ---
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""): digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_file(path, known=None):
+    '''{name, size, mtime, sha256} for a file; reuses `known`'s hash if size and mtime are unchanged.'''
+    stat = os.stat(path)
+    entry = {'name': os.path.basename(path), 'size': stat.st_size, 'mtime': int(stat.st_mtime_ns)}
+    if known and known.get('size') == entry['size'] and known.get('mtime') == entry['mtime'] and known.get('sha256'):
+        entry['sha256'] = known['sha256']
+    else:
+        entry['sha256'] = hash_file(path)
+    return entry
+
+
+def slides_digest(entries):
+    '''One hash over the ordered slide list (names and contents).'''
+    digest = hashlib.sha256()
+    for entry in entries: digest.update(f"{entry['name']}\0{entry['sha256']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+# --- Reading / writing ---
+def write_project(path, meta, times_ms, slides, analysis=None, slide_entries=None):
+    '''Writes a project file atomically (temp file + os.replace).'''
+    sections = [(SECTION_META, json.dumps(meta, indent=1).encode('utf-8')),
+                (SECTION_KEYFRAMES, encode_keyframes(times_ms, slides))]
+    if analysis: sections.append((SECTION_ANALYSIS, encode_analysis(analysis)))
+    if slide_entries is not None: sections.append((SECTION_SLIDES, json.dumps(slide_entries).encode('utf-8')))
+
+    offset = _HEADER.size + _TOC_ENTRY.size * len(sections)
+    toc = []
+    for tag, payload in sections:
+        toc.append(_TOC_ENTRY.pack(tag, offset, len(payload), zlib.crc32(payload)))
+        offset += len(payload)
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(PROJECT_MAGIC, PROJECT_VERSION, 0, len(sections)))
+            for entry in toc: f.write(entry)
+            for _, payload in sections: f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try: os.remove(temp_path)
+        except OSError: pass
+        raise
+
+
+class ProjectFile:
+    '''An opened project: header, TOC, META and KEYF are read eagerly; other sections on demand.'''
+
+    def __init__(self, path):
+        self.path = path
+        self._toc = {}
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size: raise ProjectFileError("Not a project file (too short).")
+            magic, version, _, count = _HEADER.unpack(header)
+            if magic != PROJECT_MAGIC: raise ProjectFileError("Not an Audio Keyframe Editor project file.")
+            if version > PROJECT_VERSION: raise ProjectFileError(f"Project file version {version} is newer than this editor supports.")
+            toc = f.read(_TOC_ENTRY.size * count)
+            if len(toc) < _TOC_ENTRY.size * count: raise ProjectFileError("Project file table of contents is truncated.")
+            for i in range(count):
+                tag, offset, length, crc = _TOC_ENTRY.unpack_from(toc, i * _TOC_ENTRY.size)
+                self._toc[tag] = (offset, length, crc)
+            self.meta = json.loads(self._read(f, SECTION_META).decode('utf-8'))
+            self.times_ms, self.slides = decode_keyframes(self._read(f, SECTION_KEYFRAMES))
+
+    def has_section(self, tag): return tag in self._toc
+
+    def _read(self, f, tag):
+        if tag not in self._toc: raise ProjectFileError(f"Project file has no {tag.decode()} section.")
+        offset, length, crc = self._toc[tag]
+        f.seek(offset)
+        payload = f.read(length)
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise ProjectFileError(f"Project section {tag.decode()} is corrupt.")
+        return payload
+
+    def read_section(self, tag):
+        '''Reads and checks one section's bytes (safe to call from a worker thread).'''
+        with open(self.path, 'rb') as f: return self._read(f, tag)
+
+    def load_analysis(self):
+        '''The ANLY artifacts dict, or None if the project has none.'''
+        if not self.has_section(SECTION_ANALYSIS): return None
+        return decode_analysis(self.read_section(SECTION_ANALYSIS))
+
+    def load_slide_entries(self):
+        if not self.has_section(SECTION_SLIDES): return None
+        return json.loads(self.read_section(SECTION_SLIDES).decode('utf-8'))
+
+# END OF FILE project_file.py
@@ -0,0 +1,60 @@
+# START OF FILE slides/folder_scan.py
+'''Slide folder listing and change detection.
+
+A scan is a single os.scandir pass. The directory entries give the file type
+without a stat, and one stat per slide gives the size and mtime used to
+detect re-exported files. Sort keys are memoized by file name, so a rescan
+of a large deck only computes keys for new names. Two listings of the same
+folder diff by name, size and mtime.
+'''
+import os
+from functools import lru_cache
+from slides.decode import is_slide_file
+# Ensure utils is importable
+try:
+    from utils import natural_sort_key
+except ImportError:
+    print("ERROR: Cannot import from utils.py in folder_scan. Ensure it's accessible.")
+    def natural_sort_key(s): return s # Basic fallback
+
+
+@lru_cache(maxsize=16384)
+def slide_sort_key(name):
+    '''Natural sort key of a file name (tuple, memoized).'''
+    return tuple(natural_sort_key(name))
+
+
+class SlideListing:
+    '''One scan of a slide folder: slide paths in natural order, and name -> (size, mtime_ns).'''
+
+    def __init__(self, folder, entries):
+        self.folder = folder
+        self.entries = entries
+        self.names = sorted(entries, key=slide_sort_key)
+        self.paths = [os.path.join(folder, name) for name in self.names]
+
+    def __len__(self): return len(self.names)
+
+
+def scan_slide_folder(folder):
+    '''Lists the slide images directly inside folder (raises OSError if it cannot be read).'''
+    entries = {}
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not is_slide_file(entry.name): continue
+            try:
+                if not entry.is_file(): continue
+                stat = entry.stat()
+            except OSError: continue # Deleted or unreadable between listing and stat
+            entries[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return SlideListing(folder, entries)
+
+
+def diff_listings(old, new):
+    '''(added, removed, modified) file names from listing old to listing new.'''
+    added = [name for name in new.names if name not in old.entries]
+    removed = [name for name in old.names if name not in new.entries]
+    modified = [name for name in new.names if name in old.entries and old.entries[name] != new.entries[name]]
+    return added, removed, modified
+
+# END OF FILE slides/folder_scan.py
@@ -0,0 +1,108 @@
+# START OF FILE slides/image_cache.py
+'''Bounded LRU cache of display-ready slide images.
+
+Entries are keyed by (path, mtime_ns, width, height), so a re-exported file
+or a different viewer size never returns a stale image. The cache is
+limited by an estimate of the pixel memory it holds, not by entry count: a
+4K slide and a thumbnail cost very different amounts.
+'''
+import math
+import os
+from collections import OrderedDict
+
+SLIDE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def slide_cache_key(path, width, height):
+    '''Cache key for a slide rendered to fit width x height (raises OSError if the file is gone).'''
+    return (path, os.stat(path).st_mtime_ns, int(width), int(height))
+
+
+def image_nbytes(image):
+    '''Approximate pixel memory of a PIL image (the Tk PhotoImage holds a second copy).'''
+    return image.width * image.height * len(image.getbands())
+
+
+class SlideImageCache:
+    '''LRU map of key -> (PIL image, Tk PhotoImage) under a byte budget, with hit/miss counters.'''
+
+    def __init__(self, max_bytes=SLIDE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict() # key -> (image, photo, nbytes); most recently used last
+        self._by_path = {} # path -> set of its keys in _entries
+
+    def __len__(self): return len(self._entries)
+    def __contains__(self, key): return key in self._entries
+
+    def get(self, key):
+        '''(image, photo) for key, or None. A hit becomes the most recently used entry.'''
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key, image, photo):
+        '''Adds or replaces an entry, then evicts least recently used ones until within budget.'''
+        nbytes = 2 * image_nbytes(image)
+        if key in self._entries: self._remove(key)
+        if nbytes > self.max_bytes: return # Larger than the whole budget: display it, but don't keep it
+        self._entries[key] = (image, photo, nbytes)
+        self._by_path.setdefault(key[0], set()).add(key)
+        self.bytes_used += nbytes
+        while self.bytes_used > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def nearest(self, path, mtime_ns, width, height):
+        '''(image, photo) of the cached size of this file version closest to width x height, or None.
+
+        Used for stand-ins while the exact size is rendered; larger sizes are
+        preferred, since scaling down looks better than scaling up. Not
+        counted as a hit or miss.
+        '''
+        best, best_score = None, None
+        for key in self._by_path.get(path, ()):
+            if key[1] != mtime_ns: continue
+            image = self._entries[key][0]
+            scale = min(width / image.width, height / image.height) # Scale the stand-in would need
+            score = abs(math.log(scale)) * (2.0 if scale > 1.0 else 1.0)
+            if best_score is None or score < best_score: best, best_score = key, score
+        if best is None: return None
+        image, photo, _ = self._entries[best]
+        return image, photo
+
+    def _remove(self, key):
+        self.bytes_used -= self._entries.pop(key)[2]
+        keys = self._by_path[key[0]]
+        keys.discard(key)
+        if not keys: del self._by_path[key[0]]
+
+    def discard_path(self, path):
+        '''Drops every size cached for one file.'''
+        for key in list(self._by_path.get(path, ())): self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_path.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'bytes': self.bytes_used, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def describe(self):
+        stats = self.stats()
+        return (f"{stats['entries']} image(s), {stats['bytes'] / 1e6:.1f} of {stats['max_bytes'] / 1e6:.0f} MB, "
+                f"{stats['hits']} hit(s) / {stats['misses']} miss(es) ({stats['hit_rate']:.0%}), "
+                f"{stats['evictions']} evicted")
+
+# END OF FILE slides/image_cache.py
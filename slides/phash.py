@@ -0,0 +1,348 @@
+# START OF FILE slides/phash.py
+'''Perceptual hashes of slides and a Hamming-distance index for near-duplicates.
+
+A slide's hash is the 64-bit DCT hash: the slide is reduced to 32x32 gray,
+and each of the 8x8 lowest DCT frequencies contributes one bit (1 if it is
+above their median). Similar images get hashes that differ in few bits.
+Hashes are computed from the 'thumb' rendition in the deck's rendition
+container, or from the slide file if there is none. The work runs in a
+process pool, so it does not compete with the Tk thread for the GIL. The
+pool's processes are spawned (never forked from the running Tk/pygame
+process) and kept for the whole session. Results
+are kept per deck in a JSON file next to the rendition container, valid
+while the slide's size and mtime match.
+
+HammingIndex answers "which hashes are within d bits of this one" without
+comparing every pair (multi-index hashing, see its docstring).
+'''
+import io
+import json
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import numpy as np
+from PIL import Image
+from slides.decode import decode_slide
+
+PHASH_EXTENSION = ".phash.json"
+PHASH_CACHE_VERSION = 1
+PHASH_SOURCE_LABEL = 'thumb' # Rendition the hash is computed from
+PHASH_BATCH = 64 # Slides per process-pool task
+PHASH_MAX_PROCESSES = 4
+NEAR_DUPLICATE_DISTANCE = 6 # Max differing bits (of 64) for two slides to count as near-duplicates
+INDEX_CHUNKS = 4 # Multi-index hashing: 4 tables of 16-bit chunks
+HASH_BITS = 64
+_DCT_SIZE = 32
+_LOW_FREQUENCIES = 8
+
+
+def _dct_matrix(n):
+    '''Orthonormal DCT-II matrix: coefficients = D @ x.'''
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def perceptual_hash(image):
+    '''64-bit DCT hash of a PIL image, as an int.'''
+    gray = image.convert('L').resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.BOX)
+    coefficients = _DCT @ np.asarray(gray, dtype=np.float64) @ _DCT.T
+    low = coefficients[:_LOW_FREQUENCIES, :_LOW_FREQUENCIES].ravel()
+    bits = low > np.median(low[1:]) # The DC term (overall brightness) would skew the median
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def hash_batch(jobs):
+    '''Process-pool worker: hashes slides. Returns [(name, entry)], entry = [size, mtime_ns, hash hex or None, error].
+
+    jobs are (name, slide path, size, mtime_ns, rendition) with rendition
+    (container path, file offset, length, crc32) or None. A rendition that
+    cannot be read (e.g. the container was compacted meanwhile) falls back to
+    the slide file.
+    '''
+    results = []
+    for name, slide_path, size, mtime_ns, rendition in jobs:
+        try:
+            image = _read_rendition(*rendition) if rendition else None
+            if image is None: image = decode_slide(slide_path, 192, 108)
+            results.append((name, [size, mtime_ns, f"{perceptual_hash(image):016x}", ""]))
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as e:
+            results.append((name, [size, mtime_ns, None, str(e) or e.__class__.__name__]))
+    return results
+
+
+def _read_rendition(container, offset, length, crc):
+    with open(container, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    if len(data) != length or zlib.crc32(data) != crc: return None
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def plan_hash_jobs(slide_files, renditions, cache_path):
+    '''Worker: loads the hash cache and lists the slides whose hash must be (re)computed.
+
+    Returns (entries still valid by name, jobs for hash_batch).
+    '''
+    known = load_phash_cache(cache_path)
+    valid, jobs = {}, []
+    for path in slide_files:
+        name = os.path.basename(path)
+        try: stat = os.stat(path)
+        except OSError: continue # Gone; the next rescan drops it
+        entry = known.get(name)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            valid[name] = entry
+            continue
+        location = renditions.locate(path, PHASH_SOURCE_LABEL, stat) if renditions is not None else None
+        jobs.append((name, path, stat.st_size, stat.st_mtime_ns,
+                     (renditions.path, *location) if location else None))
+    return valid, jobs
+
+
+def load_phash_cache(path):
+    '''Worker: name -> entry from a deck's hash file ({} if missing or unreadable).'''
+    try:
+        with open(path, 'r', encoding='utf-8') as f: data = json.load(f)
+    except (OSError, ValueError): return {}
+    if not isinstance(data, dict) or data.get('version') != PHASH_CACHE_VERSION: return {}
+    return data.get('slides', {})
+
+
+def save_phash_cache(path, entries):
+    '''Worker: writes the hash file atomically.'''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': PHASH_CACHE_VERSION, 'slides': entries}, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+class HammingIndex:
+    '''Finds hashes within a Hamming distance of a query (multi-index hashing).
+
+    Each 64-bit hash is split into INDEX_CHUNKS chunks, and every chunk has a
+    table mapping its value to the ids that have it. If two hashes differ in
+    at most d bits, then by pigeonhole some chunk differs in at most
+    d // INDEX_CHUNKS bits. A query therefore looks up, in each table, the
+    chunk values within that many bits of its own chunk. Only those
+    candidates get a full distance check. For d < INDEX_CHUNKS that is one
+    exact lookup per table.
+    '''
+
+    def __init__(self, hashes):
+        self.hashes = hashes # id -> hash (int), or None where there is none
+        self._chunk_bits = HASH_BITS // INDEX_CHUNKS
+        self._tables = [{} for _ in range(INDEX_CHUNKS)]
+        for item, value in enumerate(hashes):
+            if value is None: continue
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                table.setdefault(chunk, []).append(item)
+        self._flips = {} # bits per chunk -> XOR masks with at most that many bits set
+
+    def _chunks(self, value):
+        mask = (1 << self._chunk_bits) - 1
+        return [(value >> (i * self._chunk_bits)) & mask for i in range(INDEX_CHUNKS)]
+
+    def _flip_masks(self, bits):
+        masks = self._flips.get(bits)
+        if masks is None:
+            masks = [sum(1 << b for b in flipped) for n in range(bits + 1)
+                     for flipped in combinations(range(self._chunk_bits), n)]
+            self._flips[bits] = masks
+        return masks
+
+    def query(self, value, max_distance=NEAR_DUPLICATE_DISTANCE):
+        '''[(distance, id)] of the hashes within max_distance of value, nearest first.'''
+        masks = self._flip_masks(max_distance // INDEX_CHUNKS)
+        seen, found = set(), []
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for mask in masks:
+                for item in table.get(chunk ^ mask, ()):
+                    if item in seen: continue
+                    seen.add(item)
+                    distance = hamming_distance(value, self.hashes[item])
+                    if distance <= max_distance: found.append((distance, item))
+        return sorted(found)
+
+    def pairs(self, max_distance=NEAR_DUPLICATE_DISTANCE):
+        '''[(id a, id b, distance)] with a < b for every pair within max_distance.'''
+        result = []
+        for item, value in enumerate(self.hashes):
+            if value is None: continue
+            result.extend((item, other, distance) for distance, other in self.query(value, max_distance) if other > item)
+        return result
+
+
+class SlideHashIndex:
+    '''Hashes of one deck by slide index, with near-duplicate queries.'''
+
+    def __init__(self, slide_files, entries):
+        hashes = []
+        for path in slide_files:
+            entry = entries.get(os.path.basename(path))
+            hashes.append(int(entry[2], 16) if entry and entry[2] else None)
+        self.index = HammingIndex(hashes)
+        self.failed = sum(1 for value in hashes if value is None)
+
+    def __len__(self): return len(self.index.hashes)
+
+    def distance(self, a, b):
+        '''Bits by which slides a and b differ, or None if either has no hash.'''
+        hashes = self.index.hashes
+        if not (0 <= a < len(hashes) and 0 <= b < len(hashes)) or hashes[a] is None or hashes[b] is None: return None
+        return hamming_distance(hashes[a], hashes[b])
+
+    def similar(self, a, b, max_distance=NEAR_DUPLICATE_DISTANCE):
+        distance = self.distance(a, b)
+        return distance is not None and distance <= max_distance
+
+    def near_duplicates_of(self, slide, max_distance=NEAR_DUPLICATE_DISTANCE):
+        '''[(distance, slide index)] of the other slides within max_distance, nearest first.'''
+        value = self.index.hashes[slide] if 0 <= slide < len(self) else None
+        if value is None: return []
+        return [(distance, other) for distance, other in self.index.query(value, max_distance) if other != slide]
+
+    def groups(self, max_distance=NEAR_DUPLICATE_DISTANCE):
+        '''Sets of two or more slides linked by near-duplicate pairs, as sorted lists, in deck order.'''
+        parent = list(range(len(self)))
+        def find(item):
+            while parent[item] != item:
+                parent[item] = parent[parent[item]]
+                item = parent[item]
+            return item
+        for a, b, _ in self.index.pairs(max_distance): parent[find(b)] = find(a)
+        members = {}
+        for item in range(len(self)): members.setdefault(find(item), []).append(item)
+        return sorted((group for group in members.values() if len(group) > 1), key=lambda group: group[0])
+
+
+class SlideHasher:
+    '''Hashes a deck in a process pool and builds its SlideHashIndex.
+
+    Starting a pass abandons the previous one: its batches still waiting in
+    the process pool are cancelled. The pool is created on first use with
+    the "spawn" start method and kept until close(), so later passes do not
+    pay for starting processes again (if processes cannot be started, the
+    TaskRunner's threads are used). The finished index is stored in .index
+    and handed to on_index on the Tk thread. The hash file is saved in the
+    background.
+    '''
+
+    def __init__(self, task_runner, on_index):
+        self.tasks = task_runner
+        self.on_index = on_index
+        self.index = None # SlideHashIndex of the last finished pass
+        self.running = False
+        self.generation = 0
+        self._pool = None # None = not started yet, False = no processes here (threads are used)
+        self._pool_futures = set() # Batches of the current pass still in the pool
+
+    def cancel(self):
+        '''Abandons the running pass and forgets the index (e.g. another folder was loaded).'''
+        self.generation += 1
+        self.running = False
+        self.index = None
+        self._cancel_pool_batches()
+
+    def close(self):
+        '''Abandons the running pass and stops the pool's processes (application exit).'''
+        self.generation += 1
+        self.running = False
+        self._pool_futures.clear()
+        if self._pool: self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._pool is not False: self._pool = None
+
+    def start(self, slide_files, renditions, cache_path):
+        self.generation += 1
+        self._cancel_pool_batches()
+        generation = self.generation
+        self.running = True
+        self._pass = {'files': list(slide_files), 'path': cache_path, 'entries': {}, 'pending': 0,
+                      'computed': 0, 'started': time.perf_counter()}
+        self.tasks.submit(plan_hash_jobs, self._pass['files'], renditions, cache_path,
+                          on_done=lambda result: self._on_planned(generation, *result),
+                          on_error=lambda error: self._on_planned(generation, {}, [], error), background=True)
+
+    def _on_planned(self, generation, valid, jobs, error=None):
+        if generation != self.generation: return
+        if error is not None: print(f"Slide hashing: could not read the hash cache: {error}")
+        state = self._pass
+        state['entries'].update(valid)
+        batches = [jobs[i:i + PHASH_BATCH] for i in range(0, len(jobs), PHASH_BATCH)]
+        state['pending'] = len(batches)
+        if not batches:
+            self._finish()
+            return
+        for batch in batches: self._submit(generation, batch)
+
+    def _submit(self, generation, batch):
+        if self._pool is None:
+            try: self._pool = ProcessPoolExecutor(max_workers=min(PHASH_MAX_PROCESSES, os.cpu_count() or 1),
+                                                  mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, NotImplementedError, ValueError) as e:
+                print(f"Slide hashing: no process pool ({e}); hashing on worker threads.")
+                self._pool = False
+        if self._pool:
+            try:
+                future = self._pool.submit(hash_batch, batch)
+                self._pool_futures.add(future)
+                future.add_done_callback(lambda f: self.tasks.post(self._on_pool_batch, generation, batch, f))
+                return
+            except RuntimeError as e: # Pool broken (a worker process died)
+                print(f"Slide hashing: process pool unavailable ({e}); hashing on worker threads.")
+                self._pool = False
+        self.tasks.submit(hash_batch, batch, on_done=lambda results: self._on_batch(generation, results),
+                          on_error=lambda error: self._on_batch(generation, [], error, batch), background=True)
+
+    def _on_pool_batch(self, generation, batch, future):
+        self._pool_futures.discard(future)
+        if future.cancelled(): return
+        error = future.exception()
+        if error is None: self._on_batch(generation, future.result())
+        elif generation == self.generation: # Typically BrokenProcessPool: every queued batch fails the same way and is retried on threads
+            if self._pool:
+                print(f"Slide hashing: process pool failed ({error}); hashing on worker threads.")
+                self._pool.shutdown(wait=False)
+                self._pool_futures.clear()
+            self._pool = False
+            self._submit(generation, batch)
+
+    def _on_batch(self, generation, results, error=None, batch=()):
+        if generation != self.generation: return
+        state = self._pass
+        state['pending'] -= 1
+        state['entries'].update(results)
+        state['computed'] += len(results)
+        if error is not None: print(f"Slide hashing failed for {len(batch)} slide(s): {error}")
+        if state['pending'] == 0: self._finish()
+
+    def _finish(self):
+        state = self._pass
+        self.running = False
+        self.index = SlideHashIndex(state['files'], state['entries'])
+        print(f"Slide hashing: {len(self.index)} slides ({state['computed']} computed) "
+              f"in {time.perf_counter() - state['started']:.2f}s")
+        if state['computed']:
+            self.tasks.submit(save_phash_cache, state['path'], state['entries'],
+                              on_error=lambda error: print(f"Could not save slide hash cache: {error}"))
+        self.on_index(self.index)
+
+    def _cancel_pool_batches(self):
+        '''Drops the abandoned pass's batches that have not started; running ones finish and are ignored.'''
+        for future in self._pool_futures: future.cancel()
+        self._pool_futures.clear()
+
+# END OF FILE slides/phash.py
@@ -0,0 +1,80 @@
+# START OF FILE slides/prefetch.py
+'''Background decoding of slides that are about to be shown.
+
+Decoding and resizing a large PNG takes long enough to stall the Tk thread
+at a slide transition. The prefetcher runs render(path, width, height) on
+the task runner's workers. Only the final PhotoImage is built on the Tk
+thread, when the result is delivered. Finished renditions go into the
+shared SlideImageCache, so the next display of that slide is a cache hit.
+'''
+from PIL import ImageTk
+from slides.image_cache import slide_cache_key
+
+PREFETCH_AHEAD = 3 # Upcoming scheduled slides to prepare during playback
+PREFETCH_MAX_IN_FLIGHT = 4 # Cap on queued renders, so prefetching never floods the workers
+
+
+class SlidePrefetcher:
+    '''Queues slide renders on a TaskRunner and caches the results.'''
+
+    def __init__(self, cache, task_runner, render, max_in_flight=PREFETCH_MAX_IN_FLIGHT):
+        self.cache = cache
+        self.tasks = task_runner
+        self.render = render # render(path, width, height) -> PIL image; runs on a worker
+        self.max_in_flight = max_in_flight
+        self.on_ready = None # Optional callback(key), called on the Tk thread after a render lands in the cache
+        self.generation = 0 # Bumped by reset(); results of older generations are dropped
+        self.prefetched = 0 # Renditions delivered to the cache
+        self._in_flight = {} # cache key -> Future
+        self._failed = set() # Keys whose render raised; not retried until reset()
+
+    def reset(self):
+        '''Forgets queued work (e.g. a new slide folder); its results will be ignored.'''
+        self.generation += 1
+        self._in_flight.clear()
+        self._failed.clear()
+
+    def request(self, paths, width, height):
+        '''Queues renders for paths (most urgent first) that are neither cached nor already queued.'''
+        for path in paths:
+            if len(self._in_flight) >= self.max_in_flight: return
+            try: key = slide_cache_key(path, width, height)
+            except OSError: continue # Missing file: the display path reports it
+            if key in self.cache or key in self._in_flight or key in self._failed: continue
+            future = self.tasks.submit(self.render, path, width, height,
+                                       on_done=lambda image, key=key, gen=self.generation: self._on_rendered(key, gen, image),
+                                       on_error=lambda error, key=key: self._on_failed(key, error), background=True)
+            if future is None: return # Runner shut down
+            self._in_flight[key] = future
+
+    def take(self, key):
+        '''If key is being rendered, waits for it and returns the PIL image (raises its error); else None.
+
+        Used by the display path on a cache miss: waiting for a render that
+        is already running is never slower than starting a new one. A render
+        still queued behind other work is cancelled instead (None is
+        returned), so the caller renders it inline rather than waiting for
+        a free worker.
+        '''
+        future = self._in_flight.get(key)
+        if future is None: return None
+        if not future.running() and future.cancel():
+            del self._in_flight[key]
+            return None
+        del self._in_flight[key]
+        return future.result() # Running, or finished with its callback not yet dispatched
+
+    def _on_rendered(self, key, generation, image):
+        if generation != self.generation: return
+        self._in_flight.pop(key, None)
+        if key in self.cache: return # Already taken by the display path
+        self.cache.put(key, image, ImageTk.PhotoImage(image)) # The only Tk-thread work
+        self.prefetched += 1
+        if self.on_ready: self.on_ready(key)
+
+    def _on_failed(self, key, error):
+        if self._in_flight.pop(key, None) is not None:
+            self._failed.add(key)
+            print(f"Slide prefetch failed for {key[0]}: {error}")
+
+# END OF FILE slides/prefetch.py
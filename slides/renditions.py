@@ -0,0 +1,247 @@
+# START OF FILE slides/renditions.py
+'''Persistent per-deck cache of pre-scaled slide renditions.
+
+Each slide folder gets one container file in the slide cache directory,
+named after a hash of the folder path. The container is a file header
+followed by append-only records:
+
+    record header  <III  meta length, blob length, crc32(meta)
+    meta           JSON: name, size, mtime, original width/height and, per
+                   rendition, [offset in blob, length, width, height, crc32]
+    blob           the encoded renditions, concatenated
+
+Opening reads only the record headers and metas; blobs are read when a
+rendition is asked for. A newer record for the same file name supersedes
+the older one. compact() rewrites the container without superseded or
+deleted entries. Entries are valid while the slide's size and mtime match.
+A torn record at the end (crash while appending) is cut off on open.
+'''
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+import zlib
+from PIL import Image
+from slides.decode import decode_slide, fit_size, RESIZE_REDUCING_GAP
+
+RENDITION_SIZES = (('thumb', 192, 108), ('filmstrip', 384, 216), ('viewer', 1280, 720)) # Smallest first
+RENDITION_EXTENSION = ".akfr"
+RENDITION_MAGIC = b"AKFR"
+RENDITION_VERSION = 1
+JPEG_QUALITY = 92
+COMPACT_MIN_GARBAGE_BYTES = 8 * 1024 * 1024
+FAST_MIN_SCALE = 0.7 # Stand-ins may enlarge a smaller rendition up to 1/0.7x (briefly soft, much cheaper to decode)
+
+_FILE_HEADER = struct.Struct("<4sHH") # magic, version, reserved
+_RECORD_HEADER = struct.Struct("<III") # meta length, blob length, crc32(meta)
+
+
+def container_path(cache_dir, folder, extension=RENDITION_EXTENSION):
+    '''Container file for a slide folder (one per deck); other per-deck caches pass their own extension.'''
+    key = os.path.normcase(os.path.abspath(folder)).encode('utf-8')
+    return os.path.join(cache_dir, hashlib.sha1(key).hexdigest()[:20] + extension)
+
+
+def make_renditions(slide_path, sizes=RENDITION_SIZES):
+    '''Decodes a slide once and derives every rendition from it.
+
+    Returns ((width, height) of the original, {label: PIL image}). Renditions
+    are never larger than the original.
+    '''
+    with Image.open(slide_path) as probe: width, height = probe.size
+    label, box_w, box_h = sizes[-1]
+    largest = decode_slide(slide_path, min(box_w, width), min(box_h, height))
+    images = {label: largest}
+    for label, box_w, box_h in sizes[:-1]:
+        size = fit_size(width, height, min(box_w, width), min(box_h, height))
+        images[label] = largest if size == largest.size else largest.resize(size, Image.Resampling.LANCZOS,
+                                                                            reducing_gap=RESIZE_REDUCING_GAP)
+    return (width, height), images
+
+
+def encode_rendition(image):
+    '''JPEG (4:4:4, so slide text stays crisp) for opaque images, PNG where there is alpha.'''
+    buffer = io.BytesIO()
+    if image.mode in ('RGB', 'L'): image.save(buffer, 'JPEG', quality=JPEG_QUALITY, subsampling=0)
+    else: image.save(buffer, 'PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+class RenditionCache:
+    '''One deck's container: index in memory, blobs on disk. Safe to use from worker threads.'''
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = {} # name -> (meta, record position, record length, blob position)
+        self.live_bytes = 0
+        self.garbage_bytes = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            self._file = open(path, 'r+b')
+        except FileNotFoundError:
+            self._file = open(path, 'w+b')
+        self._scan()
+
+    def __len__(self): return len(self._index)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _scan(self):
+        f = self._file
+        header = f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header)[:2] != (RENDITION_MAGIC, RENDITION_VERSION):
+            f.seek(0)
+            f.truncate()
+            f.write(_FILE_HEADER.pack(RENDITION_MAGIC, RENDITION_VERSION, 0))
+            f.flush()
+            return
+        pos, end = _FILE_HEADER.size, os.fstat(f.fileno()).st_size
+        while pos + _RECORD_HEADER.size <= end:
+            f.seek(pos)
+            meta_len, blob_len, crc = _RECORD_HEADER.unpack(f.read(_RECORD_HEADER.size))
+            record_len = _RECORD_HEADER.size + meta_len + blob_len
+            if pos + record_len > end: break
+            meta_bytes = f.read(meta_len)
+            if zlib.crc32(meta_bytes) != crc: break
+            self._add_to_index(json.loads(meta_bytes.decode('utf-8')), pos, record_len, pos + _RECORD_HEADER.size + meta_len)
+            pos += record_len
+        if pos < end:
+            print(f"Slide cache: dropping {end - pos} byte(s) of incomplete data at the end of {os.path.basename(self.path)}.")
+            f.truncate(pos)
+
+    def _add_to_index(self, meta, record_pos, record_len, blob_pos):
+        previous = self._index.get(meta['name'])
+        if previous is not None:
+            self.live_bytes -= previous[2]
+            self.garbage_bytes += previous[2]
+        self._index[meta['name']] = (meta, record_pos, record_len, blob_pos)
+        self.live_bytes += record_len
+
+    # --- Queries ---
+    def entry(self, slide_path, stat=None):
+        '''The current meta for a slide, or None if missing or outdated (size/mtime changed).'''
+        indexed = self._index.get(os.path.basename(slide_path))
+        if indexed is None: return None
+        if stat is None:
+            try: stat = os.stat(slide_path)
+            except OSError: return None
+        meta = indexed[0]
+        return meta if meta['size'] == stat.st_size and meta['mtime'] == stat.st_mtime_ns else None
+
+    def stale(self, slide_files):
+        '''Slides without an up-to-date entry.'''
+        return [path for path in slide_files if self.entry(path) is None]
+
+    def load(self, slide_path, label):
+        '''A cached rendition as a PIL image, or None (missing, outdated or corrupt).'''
+        meta = self.entry(slide_path)
+        if meta is None or label not in meta['renditions']: return None
+        return self._read(meta, label)
+
+    def locate(self, slide_path, label, stat=None):
+        '''(file offset, length, crc32) of a current rendition, for readers that open the file themselves; or None.'''
+        meta = self.entry(slide_path, stat)
+        if meta is None or label not in meta['renditions']: return None
+        offset, length, _, _, crc = meta['renditions'][label]
+        indexed = self._index.get(meta['name'])
+        if indexed is None or indexed[0] is not meta: return None
+        return indexed[3] + offset, length, crc
+
+    def _read(self, meta, label, draft_size=None):
+        '''Decodes one rendition; draft_size lets a JPEG decode at a reduced DCT scale no smaller than it.'''
+        offset, length, _, _, crc = meta['renditions'][label]
+        with self._lock:
+            indexed = self._index.get(meta['name'])
+            if self._file is None or indexed is None or indexed[0] is not meta: return None
+            self._file.seek(indexed[3] + offset)
+            data = self._file.read(length)
+        if len(data) != length or zlib.crc32(data) != crc: return None
+        image = Image.open(io.BytesIO(data))
+        if draft_size is not None: image.draft(image.mode, draft_size)
+        image.load()
+        return image
+
+    def best_for(self, slide_path, target_width, target_height, fast=False):
+        '''The slide fitted to the target box from the smallest rendition that is large enough, or None.
+
+        fast=True is for stand-ins: a rendition down to FAST_MIN_SCALE of the
+        target counts as large enough (else the largest one is used), JPEGs
+        decode at a reduced DCT scale, and scaling is bilinear.
+        '''
+        meta = self.entry(slide_path)
+        if meta is None: return None
+        size = fit_size(meta['width'], meta['height'], target_width, target_height)
+        need_w, need_h = (size[0] * FAST_MIN_SCALE, size[1] * FAST_MIN_SCALE) if fast else size
+        renditions = [(w * h, label, w >= need_w and h >= need_h) for label, (_, _, w, h, _) in meta['renditions'].items()]
+        candidates = [(area, label) for area, label, large_enough in renditions if large_enough]
+        if candidates: label = min(candidates)[1]
+        elif fast and renditions: label = max(renditions)[1]
+        else: return None
+        image = self._read(meta, label, draft_size=size if fast else None)
+        if image is None or image.size == size: return image
+        if fast: return image.resize(size, Image.Resampling.BILINEAR)
+        return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+
+    # --- Building ---
+    def build(self, slide_path):
+        '''Worker: decodes, scales and encodes one slide, then appends its record.'''
+        stat = os.stat(slide_path)
+        (width, height), images = make_renditions(slide_path)
+        renditions, blobs, offset = {}, [], 0
+        for label, image in images.items():
+            data = encode_rendition(image)
+            renditions[label] = [offset, len(data), image.width, image.height, zlib.crc32(data)]
+            blobs.append(data)
+            offset += len(data)
+        meta = {'name': os.path.basename(slide_path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                'width': width, 'height': height, 'renditions': renditions}
+        self._append(meta, b"".join(blobs))
+
+    def _append(self, meta, blob):
+        meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            if self._file is None: return
+            f = self._file
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            f.write(_RECORD_HEADER.pack(len(meta_bytes), len(blob), zlib.crc32(meta_bytes)) + meta_bytes + blob)
+            f.flush()
+            self._add_to_index(meta, pos, _RECORD_HEADER.size + len(meta_bytes) + len(blob),
+                               pos + _RECORD_HEADER.size + len(meta_bytes))
+
+    def needs_compaction(self, slide_files):
+        names = {os.path.basename(path) for path in slide_files}
+        orphaned = sum(indexed[2] for name, indexed in self._index.items() if name not in names)
+        garbage = self.garbage_bytes + orphaned
+        return garbage >= COMPACT_MIN_GARBAGE_BYTES and garbage > self.live_bytes - orphaned
+
+    def compact(self, slide_files):
+        '''Worker: rewrites the container with only the current entries of these slides.'''
+        names = {os.path.basename(path) for path in slide_files}
+        temp_path = self.path + ".tmp"
+        with self._lock:
+            if self._file is None: return
+            index = {}
+            with open(temp_path, 'wb') as out:
+                out.write(_FILE_HEADER.pack(RENDITION_MAGIC, RENDITION_VERSION, 0))
+                for name, (meta, record_pos, record_len, blob_pos) in self._index.items():
+                    if name not in names: continue
+                    self._file.seek(record_pos)
+                    new_pos = out.tell()
+                    out.write(self._file.read(record_len))
+                    index[name] = (meta, new_pos, record_len, new_pos + (blob_pos - record_pos))
+            self._file.close()
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, 'r+b')
+            self._index = index
+            self.live_bytes = sum(indexed[2] for indexed in index.values())
+            self.garbage_bytes = 0
+
+# END OF FILE slides/renditions.py
@@ -0,0 +1,223 @@
+# START OF FILE slides/verify.py
+'''Integrity checks for slide images.
+
+A quick check opens the header and reads the dimensions. It also walks every
+PNG chunk and its CRC (Image.verify), and looks for the end-of-image marker
+of a JPEG. That finds truncated and corrupted files without decoding pixels.
+A full check also decodes every slide. Results are kept per deck in a JSON
+file next to the rendition container, keyed by file name and valid while the
+size and mtime match. A full result also answers a quick check.
+'''
+import json
+import os
+import time
+import warnings
+from collections import Counter
+from PIL import Image
+
+HEALTH_OK = 'ok'
+HEALTH_WARNING = 'warning'
+HEALTH_ERROR = 'error'
+HEALTH_EXTENSION = ".health.json"
+HEALTH_CACHE_VERSION = 1
+VERIFY_BATCH = 32 # Slides per worker task
+VERIFY_MAX_IN_FLIGHT = 2 # Batches running at once in the automatic pass (display prefetches share the background lane)
+VERIFY_FULL_MAX_IN_FLIGHT = 4 # Full decodes are asked for explicitly: fill the background lane
+MIN_SLIDE_WIDTH = 640 # Narrower slides look blurry when scaled up
+MAX_SLIDE_PIXELS = 8192 * 4608 # Larger slides decode slowly
+ASPECT_TOLERANCE = 0.01
+_JPEG_TAIL_BYTES = 4096 # Where the end-of-image marker is looked for (some writers append padding)
+
+
+def check_slide(path, full=False):
+    '''Checks one slide file. Returns (status, width, height, message).'''
+    width = height = 0
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning) # Reported as a warning below
+            with Image.open(path) as image:
+                width, height = image.size
+                image_format = image.format
+                if image_format == 'PNG': image.verify() # Every chunk CRC, up to IEND
+            if full:
+                with Image.open(path) as image: image.load()
+        if image_format == 'JPEG' and not full and not _has_jpeg_end(path):
+            return HEALTH_ERROR, width, height, "Truncated JPEG (no end-of-image marker)"
+    except Image.DecompressionBombError as e:
+        return HEALTH_ERROR, width, height, f"Too large to decode: {e}"
+    except (OSError, SyntaxError, ValueError) as e: # Unreadable, unidentified, truncated, bad CRC
+        return HEALTH_ERROR, width, height, str(e) or e.__class__.__name__
+    if width * height > MAX_SLIDE_PIXELS:
+        return HEALTH_WARNING, width, height, f"Very large ({width}x{height}): slow to decode"
+    if width < MIN_SLIDE_WIDTH:
+        return HEALTH_WARNING, width, height, f"Low resolution ({width}x{height}): blurry when enlarged"
+    return HEALTH_OK, width, height, ""
+
+
+def _has_jpeg_end(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - _JPEG_TAIL_BYTES))
+        return b'\xff\xd9' in f.read()
+
+
+def verify_batch(paths, known, full):
+    '''Worker: checks paths, reusing known[name] results whose size/mtime still match.
+
+    Returns [(name, entry)], entry = [size, mtime_ns, full, status, width, height, message].
+    '''
+    results = []
+    for path in paths:
+        name = os.path.basename(path)
+        try: stat = os.stat(path)
+        except OSError as e:
+            results.append((name, [0, 0, True, HEALTH_ERROR, 0, 0, f"Cannot read file: {e.strerror}"]))
+            continue
+        entry = known.get(name)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns and (entry[2] or not full):
+            results.append((name, entry))
+            continue
+        results.append((name, [stat.st_size, stat.st_mtime_ns, full, *check_slide(path, full)]))
+    return results
+
+
+def load_health_cache(path):
+    '''Worker: name -> entry from a deck's health file ({} if missing or unreadable).'''
+    try:
+        with open(path, 'r', encoding='utf-8') as f: data = json.load(f)
+    except (OSError, ValueError): return {}
+    if not isinstance(data, dict) or data.get('version') != HEALTH_CACHE_VERSION: return {}
+    return data.get('slides', {})
+
+
+def save_health_cache(path, entries):
+    '''Worker: writes the health file atomically.'''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': HEALTH_CACHE_VERSION, 'slides': entries}, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+class SlideHealthReport:
+    '''Per-slide results of one verification pass, plus deck-level dimension checks.'''
+
+    def __init__(self, slide_files, entries, full):
+        self.full = full
+        self.rows = [] # [slide index, file name, status, width, height, message]
+        for index, path in enumerate(slide_files):
+            name = os.path.basename(path)
+            entry = entries.get(name)
+            if entry is None: continue
+            self.rows.append([index, name, entry[3], entry[4], entry[5], entry[6]])
+        self._check_aspect_ratios()
+        self.counts = Counter(row[2] for row in self.rows)
+        self._by_index = {row[0]: row for row in self.rows}
+
+    def _check_aspect_ratios(self):
+        '''Slides whose aspect ratio differs from most of the deck will be letter-/pillarboxed.'''
+        sizes = Counter((row[3], row[4]) for row in self.rows if row[2] != HEALTH_ERROR and row[4] > 0)
+        if not sizes: return
+        (common_w, common_h), _ = sizes.most_common(1)[0]
+        common_aspect = common_w / common_h
+        for row in self.rows:
+            if row[2] != HEALTH_OK or row[4] <= 0: continue
+            if abs(row[3] / row[4] - common_aspect) > ASPECT_TOLERANCE * common_aspect:
+                row[2] = HEALTH_WARNING
+                row[5] = f"Aspect ratio differs from most slides ({common_w}x{common_h}): shown with borders"
+
+    def problems(self):
+        '''Rows that are not OK, errors first.'''
+        return sorted((row for row in self.rows if row[2] != HEALTH_OK), key=lambda row: (row[2] != HEALTH_ERROR, row[0]))
+
+    def status_of(self, index):
+        '''(status, message) of slide index, or (None, "") if it was not checked.'''
+        row = self._by_index.get(index)
+        return (row[2], row[5]) if row else (None, "")
+
+    def summary(self):
+        errors, warnings_ = self.counts.get(HEALTH_ERROR, 0), self.counts.get(HEALTH_WARNING, 0)
+        kind = "fully decoded" if self.full else "checked"
+        if not errors and not warnings_: return f"All {len(self.rows)} slides {kind}: no problems found"
+        parts = [f"{errors} unreadable" if errors else "", f"{warnings_} with warnings" if warnings_ else ""]
+        return f"{len(self.rows)} slides {kind}: " + ", ".join(part for part in parts if part)
+
+
+
+class SlideVerifier:
+    '''Runs verification passes on a TaskRunner, a few batches at a time.
+
+    Starting a pass abandons the previous one. The finished SlideHealthReport
+    is stored in .report and handed to on_report on the Tk thread. The health
+    file is saved in the background.
+    '''
+
+    def __init__(self, task_runner, on_report):
+        self.tasks = task_runner
+        self.on_report = on_report
+        self.report = None # Report of the last finished pass
+        self.running = False
+        self.generation = 0 # Bumped per pass; results of older passes are dropped
+        self._known = {} # name -> entry for self._known_path, the cache the workers reuse
+        self._known_path = None
+
+    def cancel(self):
+        '''Abandons the running pass and forgets the report (e.g. another folder was loaded).'''
+        self.generation += 1
+        self.running = False
+        self.report = None
+
+    def start(self, slide_files, cache_path, full=False):
+        self.generation += 1
+        generation = self.generation
+        self.running = True
+        self._pass = {'files': list(slide_files), 'path': cache_path, 'full': full, 'results': {},
+                      'batches': [], 'active': 0, 'started': time.perf_counter()}
+        if cache_path == self._known_path:
+            self._on_loaded(generation, self._known)
+        else:
+            self.tasks.submit(load_health_cache, cache_path,
+                              on_done=lambda known: self._on_loaded(generation, known),
+                              on_error=lambda error: self._on_loaded(generation, {}))
+
+    def _on_loaded(self, generation, known):
+        if generation != self.generation: return
+        self._known, self._known_path = known, self._pass['path']
+        files = self._pass['files']
+        self._pass['batches'] = [files[i:i + VERIFY_BATCH] for i in range(0, len(files), VERIFY_BATCH)][::-1]
+        self._dispatch(generation)
+
+    def _dispatch(self, generation):
+        state = self._pass
+        if not state['batches'] and state['active'] == 0:
+            self._finish()
+            return
+        limit = VERIFY_FULL_MAX_IN_FLIGHT if state['full'] else VERIFY_MAX_IN_FLIGHT
+        while state['batches'] and state['active'] < limit:
+            batch = state['batches'].pop()
+            state['active'] += 1
+            self.tasks.submit(verify_batch, batch, self._known, state['full'],
+                              on_done=lambda results: self._on_batch(generation, results),
+                              on_error=lambda error, batch=batch: self._on_batch(generation, [], error, batch),
+                              background=True)
+
+    def _on_batch(self, generation, results, error=None, batch=()):
+        if generation != self.generation: return
+        state = self._pass
+        state['active'] -= 1
+        state['results'].update(results)
+        if error is not None: # Unexpected; report the batch as unchecked rather than stalling the pass
+            print(f"Slide verification failed for {len(batch)} slide(s): {error}")
+        self._dispatch(generation)
+
+    def _finish(self):
+        state = self._pass
+        self.running = False
+        self._known = state['results']
+        self.report = SlideHealthReport(state['files'], state['results'], state['full'])
+        print(f"Slide verification: {self.report.summary()} in {time.perf_counter() - state['started']:.2f}s")
+        self.tasks.submit(save_health_cache, state['path'], state['results'],
+                          on_error=lambda error: print(f"Could not save slide health cache: {error}"))
+        self.on_report(self.report)
+
+# END OF FILE slides/verify.py
@@ -0,0 +1,106 @@
+# START OF FILE task_runner.py
+import os
+import queue
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class TaskRunner:
+    '''Runs work on background threads and hands results back on the Tk thread.
+
+    Tkinter widgets must only be touched from the main thread, so completion
+    callbacks are queued and dispatched by poll(), which the main window calls
+    from its periodic update loop.
+
+    Work submitted with background=True (slide renders, rendition builds,
+    verification and hashing) shares one lane of at most background_limit
+    tasks, one less than the worker count. Whatever the slide pipelines
+    queue, a worker stays free for exports, project files and analysis.
+    Background tasks beyond the limit wait in the runner, not the executor,
+    so their Futures can still be cancelled.
+    '''
+
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="akfe-worker")
+        self._callbacks = queue.SimpleQueue()
+        self._closed = False
+        self.max_workers = max_workers
+        self.background_limit = max(1, max_workers - 1) # With a single worker there is nothing to keep free
+        self._background = deque() # (future, func, args, kwargs) waiting for a background slot
+        self._background_active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, on_done=None, on_error=None, background=False, **kwargs):
+        '''Runs func(*args, **kwargs) on a worker (in the background lane if background is set).
+
+        on_done(result) or on_error(exception) is later called on the Tk thread.
+        Returns the Future, or None if the runner has been shut down.
+        '''
+        if self._closed: return None
+        if background:
+            future = Future()
+            with self._lock: self._background.append((future, func, args, kwargs))
+            self._start_background()
+        else:
+            future = self._executor.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda f: self._callbacks.put((f, on_done, on_error)))
+        return future
+
+    def _start_background(self):
+        with self._lock:
+            while self._background and self._background_active < self.background_limit and not self._closed:
+                task = self._background.popleft()
+                if task[0].cancelled(): continue
+                self._background_active += 1
+                self._executor.submit(self._run_background, *task)
+
+    def _run_background(self, future, func, args, kwargs):
+        try:
+            if future.set_running_or_notify_cancel(): # False if it was cancelled before it got a worker
+                try: result = func(*args, **kwargs)
+                except BaseException as e: future.set_exception(e)
+                else: future.set_result(result)
+        finally:
+            with self._lock: self._background_active -= 1
+            self._start_background()
+
+    def post(self, callback, *args):
+        '''Queues callback(*args) to run on the Tk thread (safe to call from workers).'''
+        if not self._closed:
+            self._callbacks.put((None, callback, args))
+
+    def poll(self, max_callbacks=50):
+        '''Dispatches queued callbacks. Must be called from the Tk thread.'''
+        for _ in range(max_callbacks):
+            try: future, on_done, extra = self._callbacks.get_nowait()
+            except queue.Empty: return
+            try:
+                if future is None: # Posted callback
+                    on_done(*extra)
+                elif future.cancelled():
+                    continue
+                elif future.exception() is not None:
+                    error = future.exception()
+                    if extra: extra(error)
+                    else:
+                        print(f"Background task failed: {error}")
+                        traceback.print_exception(type(error), error, error.__traceback__)
+                elif on_done:
+                    on_done(future.result())
+            except Exception as e:
+                print(f"Error in background task callback: {e}")
+                traceback.print_exc()
+
+    def shutdown(self):
+        '''Stops accepting work and cancels anything not yet started.'''
+        with self._lock:
+            self._closed = True
+            waiting = [task[0] for task in self._background]
+            self._background.clear()
+        for future in waiting: future.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# END OF FILE task_runner.py
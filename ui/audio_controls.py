@@ -99,8 +99,12 @@ class AudioControls(ttk.Frame):
         speed_menu.bind("<<ComboboxSelected>>", lambda event: self.commands['set_speed'](event.widget.get()))
 
 
-    def update_display(self, update_path=True, update_time=True, update_play_button=True):
+    def update_display(self, update_path=True, update_time=True, update_play_button=True, update_speed=False):
         '''Updates the UI elements in this control section.'''
+        if update_speed: # Same spelling as the combobox values ("0.75x", "1.0x")
+            speed = f"{self.state.playback_speed:.2f}".rstrip('0')
+            try: self.speed_var.set(speed + ("0x" if speed.endswith('.') else "x"))
+            except tk.TclError: pass
         if update_path:
             try:
                 # Check if the ENTRY widget exists before setting the variable
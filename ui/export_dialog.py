@@ -0,0 +1,48 @@
+# START OF FILE ui/export_dialog.py
+import os
+import tkinter as tk
+from tkinter import ttk
+from keyframes.export import EXPORT_FORMATS, output_paths
+
+
+class ExportFormatsDialog(tk.Toplevel):
+    '''Modal dialog to pick which formats an export writes.'''
+
+    def __init__(self, parent, base_path, selected):
+        super().__init__(parent)
+        self.title("Export Formats")
+        self.transient(parent)
+        self.resizable(False, False)
+        self.result = None
+        self._vars = {fmt: tk.BooleanVar(value=fmt in selected) for fmt in EXPORT_FORMATS}
+        paths = output_paths(base_path, EXPORT_FORMATS)
+
+        frame = ttk.Frame(self, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text=f"Write these files to {os.path.dirname(base_path) or '.'}:").pack(anchor=tk.W, pady=(0, 5))
+        for fmt, writer in EXPORT_FORMATS.items():
+            ttk.Checkbutton(frame, text=f"{writer.label}  —  {os.path.basename(paths[fmt])}",
+                            variable=self._vars[fmt]).pack(anchor=tk.W)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(buttons, text="Cancel", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="Export", command=self._on_ok).pack(side=tk.RIGHT, padx=(0, 5))
+        self.bind("<Return>", lambda e: self._on_ok())
+        self.bind("<Escape>", lambda e: self.destroy())
+
+        self.grab_set()
+        self.wait_window(self)
+
+    def _on_ok(self):
+        chosen = [fmt for fmt, var in self._vars.items() if var.get()]
+        if not chosen: return # Keep the dialog open until something is selected
+        self.result = chosen
+        self.destroy()
+
+
+def ask_export_formats(parent, base_path, selected):
+    '''Shows the dialog; returns the chosen format keys, or None if cancelled.'''
+    return ExportFormatsDialog(parent, base_path, selected).result
+
+# END OF FILE ui/export_dialog.py
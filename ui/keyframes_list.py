@@ -13,6 +13,7 @@ class KeyframesList(ttk.Frame):
 
     def create_widgets(self):
         keyframes_frame = ttk.LabelFrame(self, text="Keyframes")
+        self.keyframes_frame = keyframes_frame # Title shows the lint finding count
         # Allow this frame to expand vertically, give it some padding
         keyframes_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0,5))
 
@@ -57,7 +58,7 @@ class KeyframesList(ttk.Frame):
         spacer.pack(side=tk.LEFT, expand=True, fill=tk.X)
 
         # Export Button
-        export_button = ttk.Button(actions_frame, text="Export JSON...", width=14,
+        export_button = ttk.Button(actions_frame, text="Export...", width=14,
                                    command=self.commands['export_keyframes'])
         export_button.pack(side=tk.RIGHT, padx=2)
 
@@ -80,6 +81,9 @@ class KeyframesList(ttk.Frame):
 
         # Get formatted strings from handler
         formatted_keyframes = self.commands['get_formatted_keyframes']()
+        issues = len(self.state.lint.flagged_indices())
+        try: self.keyframes_frame.config(text=f"Keyframes ({issues} with timing issues)" if issues else "Keyframes")
+        except tk.TclError: pass
 
         # --- Repopulate Listbox ---
         try:
@@ -10,7 +10,11 @@ import traceback # For printing detailed errors
 # Need to import AppState and utils before handlers/UI that use them
 try:
     from app_state import AppState
-    from utils import RESIZE_DEBOUNCE_MS, WAVEFORM_UPDATE_INTERVAL_MS, format_time
+    from task_runner import TaskRunner
+    from utils import RESIZE_DEBOUNCE_MS, WAVEFORM_UPDATE_INTERVAL_MS, AUTOSAVE_DIR, format_time
+    from keyframes.journal import KeyframeJournal, claim_orphaned_sessions, read_session, remove_session
+    from keyframes.store import KeyframeStore
+    from project_file import PROJECT_EXTENSION
 except ImportError as e:
     print(f"ERROR: Failed to import core modules (app_state, utils): {e}")
     traceback.print_exc()
@@ -29,6 +33,8 @@ try:
     # from ui.waveform_display import WaveformDisplay # Removed
     from ui.keyframes_list import KeyframesList
     from ui.status_bar import StatusBar
+    from ui.export_dialog import ask_export_formats
+    from ui.slide_health_dialog import SlideHealthDialog
 except ImportError as e:
     print(f"ERROR: Failed to import UI component: {e}")
     traceback.print_exc()
@@ -42,6 +48,8 @@ try:
     from handlers.slide_handler import SlideHandler
     from handlers.keyframe_handler import KeyframeHandler
     from handlers.event_handler import EventHandler
+    from handlers.analysis_handler import AnalysisHandler, SENTENCE_MIN_SCORE
+    from handlers.project_handler import ProjectHandler
 except ImportError as e:
     print(f"ERROR: Failed to import handler module: {e}")
     traceback.print_exc()
@@ -77,16 +85,22 @@ class AudioKeyframeEditor(tk.Tk):
         # Core Components
         print("Initializing state and handlers...")
         self.state = AppState()
+        self.task_runner = TaskRunner() # Background work; results are polled in periodic_update
         # Pass self.update_ui method reference to handlers
         self.audio_handler = AudioHandler(self.state, self.update_ui)
-        self.slide_handler = SlideHandler(self.state, self.update_ui)
-        self.keyframe_handler = KeyframeHandler(self.state, self.update_ui)
+        self.slide_handler = SlideHandler(self.state, self.update_ui, self.task_runner)
+        self.keyframe_handler = KeyframeHandler(self.state, self.update_ui, self.task_runner)
+        self.analysis_handler = AnalysisHandler(self.state, self.update_ui, self.task_runner)
+        self.project_handler = ProjectHandler(self.state, self.update_ui, self.task_runner,
+                                              self.audio_handler, self.slide_handler, self.analysis_handler)
+        self.journal = KeyframeJournal(AUTOSAVE_DIR, self.task_runner) # Crash-recovery autosave of keyframe edits
 
         # UI Elements (initialized to None, created in _create_layout)
         self.menu_bar = None
         self.slides_viewer = None
         self.audio_controls = None
         self.timeline_canvas = None # <<< Added timeline canvas reference
+        self.slide_health_dialog = None # Open Slide Health Report window, if any
         # self.waveform_display = None # Removed
         self.keyframes_list = None
         self.status_bar = None
@@ -162,6 +176,8 @@ class AudioKeyframeEditor(tk.Tk):
         left_frame_outer.pack_propagate(False) # Prevent shrinking below initial size
         self.slides_viewer = SlidesViewer(left_frame_outer, self.state, self._get_ui_commands())
         self.slides_viewer.pack(fill=tk.BOTH, expand=True)
+        if self.slide_handler.refiner: # High-quality renders replace quick stand-ins when they land
+            self.slide_handler.refiner.on_ready = self.slides_viewer.on_slide_refined
         top_pane.add(left_frame_outer, weight=1) # Resizing weight
 
 
@@ -177,6 +193,8 @@ class AudioKeyframeEditor(tk.Tk):
         # 2. Timeline Canvas below controls
         self.timeline_canvas = TimelineCanvas(right_frame_outer, self.state, self._get_ui_commands())
         self.timeline_canvas.pack(fill=tk.X, expand=False, pady=(2, 5))
+        if self.slide_handler.thumbnailer: # Filmstrip thumbnails are rendered in the background
+            self.slide_handler.thumbnailer.on_ready = self.timeline_canvas.on_thumbnail_ready
 
         # 3. Keyframes list takes the remaining space
         self.keyframes_list = KeyframesList(right_frame_outer, self.state, self._get_ui_commands())
@@ -222,6 +240,7 @@ class AudioKeyframeEditor(tk.Tk):
              print("Starting periodic update loop...")
              if self.winfo_exists():
                   self._update_loop_id = self.after(100, self.periodic_update) # Store ID
+                  self.after(200, self._offer_session_restore)
 
          except Exception as e:
               print(f"ERROR initializing EventHandler: {e}")
@@ -232,7 +251,7 @@ class AudioKeyframeEditor(tk.Tk):
     def _get_ui_commands(self):
         '''Returns a dictionary of commands, safely checking handler existence.'''
         handlers_ready = all(hasattr(self, name) and getattr(self, name) is not None
-                            for name in ['audio_handler', 'slide_handler', 'keyframe_handler'])
+                            for name in ['audio_handler', 'slide_handler', 'keyframe_handler', 'analysis_handler'])
         event_handler_ready = hasattr(self, 'event_handler') and self.event_handler is not None
 
         safe_lambda = lambda *args, **kwargs: None
@@ -240,7 +259,14 @@ class AudioKeyframeEditor(tk.Tk):
             'open_audio', 'select_slides', 'import_keyframes', 'export_keyframes', 'exit',
             'toggle_play', 'stop_play', 'seek', 'skip_fwd', 'skip_bwd', 'set_speed', 'get_current_time',
             'add_keyframe', 'delete_keyframe', 'edit_keyframe', 'get_formatted_keyframes', 'select_keyframe',
-            'goto_start', 'goto_end', 'get_slide_for_display', 'show_instructions', 'show_about'
+            'goto_start', 'goto_end', 'get_slide_for_display', 'show_instructions', 'show_about',
+            'analyze_audio', 'toggle_snap', 'detect_speaker_turns', 'add_speaker_keyframes',
+            'detect_sections', 'seed_section_keyframes', 'add_sentence_keyframes',
+            'undo', 'redo', 'ripple_shift', 'scale_range', 'delete_range', 'quantize_keyframes',
+            'open_project', 'save_project', 'save_project_as',
+            'set_keyframe_slide', 'find_slide', 'renumber_slides', 'get_slide_thumbnail',
+            'rescan_slides', 'slide_health_report', 'verify_slides_full', 'slide_problem',
+            'get_slide_quick', 'refine_slide', 'near_duplicate_slides', 'merge_similar_keyframes'
         ]
         all_commands = {k: safe_lambda for k in expected_keys}
 
@@ -251,6 +277,9 @@ class AudioKeyframeEditor(tk.Tk):
             'select_slides': self.select_slides_folder,
             'import_keyframes': self.import_keyframes,
             'export_keyframes': self.export_keyframes,
+            'open_project': self.open_project,
+            'save_project': self.save_project,
+            'save_project_as': lambda: self.save_project(ask_path=True),
             'exit': self._on_close,
             'toggle_play': self.audio_handler.toggle_playback,
             'stop_play': self.audio_handler.stop_playback,
@@ -259,15 +288,44 @@ class AudioKeyframeEditor(tk.Tk):
             'skip_bwd': lambda: self.audio_handler.skip_time(-5),
             'set_speed': self.audio_handler.set_playback_speed,
             'get_current_time': self.audio_handler.get_current_playback_position,
-            'add_keyframe': lambda: self.keyframe_handler.add_keyframe(self.audio_handler.get_current_playback_position()),
+            'add_keyframe': lambda: self.keyframe_handler.add_keyframe(self.audio_handler.get_current_playback_position(), snap=True),
+            # The menu is built before the event handler exists, so its dialogs are looked up when invoked
+            'ripple_shift': lambda: self._call_event_handler('ripple_shift_dialog'),
+            'scale_range': lambda: self._call_event_handler('scale_range_dialog'),
+            'delete_range': lambda: self._call_event_handler('delete_range_dialog'),
+            'quantize_keyframes': lambda: self._call_event_handler('quantize_dialog'),
+            'set_keyframe_slide': lambda: self._call_event_handler('set_keyframe_slide_dialog'),
+            'find_slide': lambda: self._call_event_handler('find_slide_dialog'),
+            'renumber_slides': self.keyframe_handler.renumber_slides,
+            'undo': self.keyframe_handler.undo,
+            'redo': self.keyframe_handler.redo,
             'delete_keyframe': lambda: self.keyframe_handler.delete_keyframe(self.state.selected_keyframe_index),
             'get_formatted_keyframes': self.keyframe_handler.get_formatted_keyframes,
             'select_keyframe': self.keyframe_handler.select_keyframe,
             'goto_start': lambda: self.audio_handler.seek(0),
             'goto_end': lambda: self.audio_handler.seek(self.state.audio_duration) if self.state.has_audio() else None,
             'get_slide_for_display': self.slide_handler.get_slide_for_display,
+            'get_slide_thumbnail': self.slide_handler.get_slide_thumbnail,
+            'get_slide_quick': self.slide_handler.get_slide_quick,
+            'refine_slide': self.slide_handler.refine_slide,
+            'rescan_slides': self.slide_handler.rescan_slides,
+            'slide_health_report': self.show_slide_health,
+            'verify_slides_full': lambda: self.slide_handler.verify_slides(full=True),
+            'slide_problem': self.slide_handler.slide_problem,
+            'near_duplicate_slides': self.show_near_duplicates,
+            'merge_similar_keyframes': self.merge_similar_keyframes,
             'show_instructions': self.show_instructions,
             'show_about': self.show_about,
+            'analyze_audio': self.analysis_handler.analyze_audio,
+            'toggle_snap': self.analysis_handler.toggle_snapping,
+            'detect_speaker_turns': self.analysis_handler.detect_speaker_turns,
+            'add_speaker_keyframes': lambda: self.keyframe_handler.add_keyframes(
+                self.analysis_handler.candidate_times('speaker'), source="speaker turns"),
+            'detect_sections': self.analysis_handler.detect_sections,
+            'seed_section_keyframes': lambda: self.keyframe_handler.add_keyframes(
+                self.analysis_handler.candidate_times('section', min_score=1.0), source="top-level sections"),
+            'add_sentence_keyframes': lambda: self.keyframe_handler.add_keyframes(
+                self.analysis_handler.candidate_times('sentence', min_score=SENTENCE_MIN_SCORE), source="sentence starts"),
         })
         if event_handler_ready:
             all_commands['edit_keyframe'] = self.event_handler.edit_selected_keyframe_time
@@ -276,6 +334,11 @@ class AudioKeyframeEditor(tk.Tk):
 
         return all_commands
 
+    def _call_event_handler(self, method_name):
+        '''Invokes an EventHandler method once the handler has been initialized.'''
+        handler = getattr(self, 'event_handler', None)
+        if handler is not None: getattr(handler, method_name)()
+
     # --- Action Methods ---
     def open_audio_file(self):
         '''Handles the 'Open Audio' action.'''
@@ -295,8 +358,12 @@ class AudioKeyframeEditor(tk.Tk):
                 if self.state.create_keyframe_at_zero and not self.state.has_keyframes():
                     print("Adding initial keyframe at 0.0s")
                     self.keyframe_handler.add_keyframe(0.0) # This calls update_ui internally
+                    self.state.edit_history.clear() # The initial keyframe is not an undoable edit
+                self._start_autosave()
                 # Explicitly update slide and list after potential keyframe add
                 self.update_ui(current_slide=True, keyframes=True, keyframes_list_selection=True)
+                # Extract snap features (pauses, onsets, beats) without blocking the UI
+                self.analysis_handler.analyze_audio()
 
 
     def select_slides_folder(self):
@@ -310,7 +377,8 @@ class AudioKeyframeEditor(tk.Tk):
             self.update_ui(status=True)
             self.update()
 
-            if self.slide_handler.load_slides(folder_path): pass
+            if self.slide_handler.load_slides(folder_path) and self.journal.active:
+                self.journal.update_meta(slides_directory=folder_path)
 
     def import_keyframes(self):
         '''Handles the 'Import Keyframes' action.'''
@@ -345,19 +413,108 @@ class AudioKeyframeEditor(tk.Tk):
              initial_filename = f"{base}_keyframes.json"
 
         file_path = filedialog.asksaveasfilename(
-            title="Save Keyframes",
+            title="Export Keyframes (other formats use the same name)",
             initialfile=initial_filename,
             defaultextension=".json",
             filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
             parent=self
         )
         if file_path:
-            self.state.status_message = f"Exporting keyframes to {os.path.basename(file_path)}..."
+            formats = ask_export_formats(self, file_path, self.state.export_formats)
+            if not formats: return
+            self.state.export_formats = formats
+            self.keyframe_handler.export_keyframes(file_path, formats) # Writes on a worker; reports via status bar
+
+
+    def open_project(self):
+        '''Handles the 'Open Project' action.'''
+        file_path = filedialog.askopenfilename(
+            title="Open Project",
+            filetypes=[("Keyframe Projects", f"*{PROJECT_EXTENSION}"), ("All Files", "*.*")],
+            parent=self
+        )
+        if file_path:
+            self.state.status_message = f"Opening project: {os.path.basename(file_path)}..."
             self.update_ui(status=True)
             self.update()
+            if self.project_handler.open_project(file_path):
+                self._start_autosave()
 
-            self.keyframe_handler.export_keyframes(file_path)
+    def save_project(self, ask_path=False):
+        '''Handles 'Save Project' (re-uses the open project's path unless ask_path).'''
+        if not self.state.has_audio():
+            messagebox.showinfo("Save Project", "Load an audio file before saving a project.", parent=self)
+            return
+        file_path = self.state.project_file
+        if ask_path or not file_path:
+            base = os.path.splitext(os.path.basename(self.state.audio_file))[0] if self.state.audio_file else "project"
+            file_path = filedialog.asksaveasfilename(
+                title="Save Project",
+                initialfile=f"{base}{PROJECT_EXTENSION}",
+                defaultextension=PROJECT_EXTENSION,
+                filetypes=[("Keyframe Projects", f"*{PROJECT_EXTENSION}"), ("All Files", "*.*")],
+                parent=self
+            )
+        if file_path:
+            self.project_handler.save_project(file_path) # Hashes and writes on a worker
 
+    # --- Autosave / Crash Recovery ---
+    def _start_autosave(self):
+        '''Starts journaling keyframe edits for the loaded audio (replaces any previous session files).'''
+        if not self.state.has_audio(): return
+        try:
+            self.journal.start(self.state.keyframes, {'audio_file': self.state.audio_file,
+                                                      'slides_directory': self.state.slides_directory})
+        except OSError as e: print(f"Warning: Autosave unavailable: {e}")
+
+    def _offer_session_restore(self):
+        '''On startup, offers to restore keyframes from sessions that did not close cleanly (newest first).
+
+        Sessions of other instances that are still running are never touched.
+        Once one session is restored, the remaining ones are kept for the next start.
+        '''
+        restored_one = False
+        for directory, lock in claim_orphaned_sessions(AUTOSAVE_DIR):
+            if restored_one: lock.release()
+            else: restored_one = self._offer_restore_of(directory, lock)
+
+    def _offer_restore_of(self, directory, lock):
+        '''Offers one orphaned session; True if it was restored. The session is deleted unless restoring fails.'''
+        restored = KeyframeStore()
+        try:
+            meta, replayed, complete = read_session(directory, restored)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read autosave session: {e}")
+            remove_session(directory, lock)
+            return False
+        audio_file = meta.get('audio_file')
+        if not audio_file or not os.path.exists(audio_file):
+            print(f"Autosave session refers to missing audio '{audio_file}'; discarding it.")
+            remove_session(directory, lock)
+            return False
+
+        message = (f"A previous session did not close cleanly.\n\n"
+                   f"Restore {len(restored)} keyframe(s) for {os.path.basename(audio_file)}?")
+        if not complete: message += "\n\n(The last edits before the crash were incomplete and will be missing.)"
+        if not messagebox.askyesno("Restore Session", message, parent=self):
+            remove_session(directory, lock)
+            return False
+
+        print(f"Restoring autosave session: {replayed} journaled operation(s) replayed.")
+        if not self.audio_handler.load_audio(audio_file):
+            lock.release() # Kept for the next start
+            return False
+        slides_directory = meta.get('slides_directory')
+        if slides_directory and os.path.isdir(slides_directory): self.slide_handler.load_slides(slides_directory)
+        self.state.keyframes.load_ms(restored.times_ms(), restored.slides())
+        self.state.edit_history.clear()
+        self.state.selected_keyframe_index = -1
+        self.state.status_message = f"Restored {len(restored)} keyframes from the autosave."
+        self.update_ui(timeline_keyframes=True, current_slide=True, keyframes=True, keyframes_list_selection=True, status=True)
+        self._start_autosave() # The keyframes now live in this instance's session
+        remove_session(directory, lock)
+        self.analysis_handler.analyze_audio()
+        return True
 
     # --- UI Update Orchestration ---
 
@@ -380,6 +537,11 @@ class AudioKeyframeEditor(tk.Tk):
                       traceback.print_exc()
              return None
 
+        # Lint findings depend on the audio length and slide count too; refresh markers if those changed them
+        lint_version = self.state.lint.version
+        self.state.lint.configure(end_seconds=self.state.audio_duration, num_slides=len(self.state.slide_files))
+        if self.state.lint.version != lint_version: kwargs['keyframes'] = True
+
         # --- Apply Updates Based on Flags ---
 
         if kwargs.get('file_paths', False):
@@ -393,6 +555,10 @@ class AudioKeyframeEditor(tk.Tk):
         if kwargs.get('play_button', False):
             _try_update(self.audio_controls, 'update_display', update_path=False, update_time=False, update_play_button=True)
 
+        if kwargs.get('speed', False):
+            _try_update(self.audio_controls, 'update_display', update_path=False, update_time=False, update_play_button=False,
+                        update_speed=True)
+
         if kwargs.get('keyframes', False): # List content update
             _try_update(self.keyframes_list, 'update_list')
             _try_update(self.timeline_canvas, 'update_keyframe_markers') # Update timeline markers too
@@ -405,6 +571,9 @@ class AudioKeyframeEditor(tk.Tk):
         if kwargs.get('timeline_keyframes', False):
              _try_update(self.timeline_canvas, 'update_keyframe_markers')
 
+        if kwargs.get('analysis', False): # Analysis results (candidates, segment lanes) changed
+             _try_update(self.timeline_canvas, 'update_analysis_lanes')
+
         # Slide updates
         if kwargs.get('slides', False): # On load slides
              if self.slides_viewer and self.slide_handler:
@@ -412,6 +581,8 @@ class AudioKeyframeEditor(tk.Tk):
                       slide_idx = self.slide_handler.find_slide_index_for_time(self.state.current_position)
                       self.state.current_slide_index = slide_idx
                       _try_update(self.slides_viewer, 'update_display', update_path=False, update_slide=True)
+                      _try_update(self.timeline_canvas, 'update_filmstrip', force=True) # Files may have been re-exported
+                      self.slide_handler.prefetch_for_time(self.state.current_position)
                   except Exception as e: print(f"Error finding/displaying slide after load: {e}")
 
         elif kwargs.get('current_slide', False): # During playback/seek
@@ -422,8 +593,13 @@ class AudioKeyframeEditor(tk.Tk):
                       if new_slide_idx != self.state.current_slide_index:
                            self.state.current_slide_index = new_slide_idx
                            _try_update(self.slides_viewer, 'display_slide', new_slide_idx)
+                      # Decode the next scheduled slides on workers before their transitions arrive
+                      self.slide_handler.prefetch_for_time(current_time)
                   except Exception as e: print(f"Error updating current slide display: {e}")
 
+        if kwargs.get('slide_health', False) and self.slide_health_dialog is not None:
+            _try_update(self.slide_health_dialog, 'show_report', self.slide_handler.verifier.report)
+
         if kwargs.get('status', False):
             _try_update(self.status_bar, 'update_status')
 
@@ -440,6 +616,13 @@ class AudioKeyframeEditor(tk.Tk):
              print(f"Error during periodic audio update: {e}")
              traceback.print_exc()
 
+        self.task_runner.poll() # Deliver finished background work on the Tk thread
+        self.slide_handler.poll_folder_changes() # Picks up added/re-exported slides without a reload
+        try: self.journal.tick() # Batched fsync / compaction of the autosave journal
+        except OSError as e:
+            print(f"Autosave disabled after write error: {e}")
+            self.journal.stop()
+
         try:
              if self.winfo_exists():
                   self._update_loop_id = self.after(WAVEFORM_UPDATE_INTERVAL_MS, self.periodic_update)
@@ -486,9 +669,15 @@ class AudioKeyframeEditor(tk.Tk):
                  try: self.after_cancel(self.resize_timer)
                  except ValueError: pass
                  self.resize_timer = None
+            if self.timeline_canvas and self.timeline_canvas._filmstrip_timer:
+                 try: self.timeline_canvas.after_cancel(self.timeline_canvas._filmstrip_timer)
+                 except ValueError: pass
             if hasattr(self.slides_viewer, '_resize_timer') and self.slides_viewer._resize_timer:
                  try: self.slides_viewer.after_cancel(self.slides_viewer._resize_timer)
                  except ValueError: pass
+            if hasattr(self.slides_viewer, '_refine_timer') and self.slides_viewer._refine_timer:
+                 try: self.slides_viewer.after_cancel(self.slides_viewer._refine_timer)
+                 except ValueError: pass
             if hasattr(self.slides_viewer, '_update_slide_timer') and self.slides_viewer._update_slide_timer:
                  try: self.slides_viewer.after_cancel(self.slides_viewer._update_slide_timer)
                  except ValueError: pass
@@ -497,6 +686,16 @@ class AudioKeyframeEditor(tk.Tk):
                  print("Stopping playback...")
                  self.audio_handler.stop_playback()
 
+            if hasattr(self, 'journal'):
+                 self.journal.stop(discard=True) # Clean exit: nothing to recover next time
+
+            if hasattr(self, 'task_runner'):
+                 self.task_runner.shutdown()
+
+            if hasattr(self, 'slide_handler'):
+                 self.slide_handler.close_renditions() # Releases the slide cache container
+                 if self.slide_handler.hasher: self.slide_handler.hasher.close() # Stops the hashing processes
+
             print("Cleaning up Pygame...")
             if pygame.get_init():
                 pygame.mixer.quit()
@@ -517,34 +716,104 @@ class AudioKeyframeEditor(tk.Tk):
 Audio Keyframe Editor - Instructions
 
 1.  **Load Audio:** File -> Open Audio File... (WAV, MP3, OGG) `(Ctrl+O)`
-2.  **Load Slides:** File -> Select Slides Folder... (1.png, 2.png, ...) `(Ctrl+L)`
+2.  **Load Slides:** File -> Select Slides Folder... (1.png, 2.png, ... ; JPEG and WebP also work) `(Ctrl+L)`
 3.  **Playback:**
     *   Click 'Play' or press `Space` to Play/Pause.
     *   Click 'Stop' to stop playback and return to start.
     *   Click `←5s` / `→5s` or press `Left`/`Right` arrow keys to skip.
     *   Use `Home`/`End` keys to go to start/end of audio.
     *   Click on the grey timeline bar to seek to a specific time.
+    *   Slides added to or re-exported into the folder are picked up automatically within about a second
+        (File -> Rescan Slides Folder `(F5)` checks immediately); keyframes are kept.
+    *   Every slide is checked in the background after loading (truncated/corrupt files, odd sizes).
+        Edit -> Slides -> Slide Health Report lists problems; 'Decode All Slides' also decodes each one.
+    *   Slides that look alike (e.g. animation builds) are listed by Edit -> Slides -> Near-Duplicate Slides;
+        Merge Keyframes of Near-Duplicate Slides turns each run of keyframes showing them into one.
+    *   The strip under the timeline shows each keyframe's slide; hover it for a larger preview.
 4.  **Keyframes:**
     *   Press 'k' or click '+ Keyframe' to add a keyframe at the current playback position.
+    *   Press `Ctrl+G` to toggle snapping new keyframes to nearby pauses, onsets and beats.
     *   Click a keyframe in the list to select it (highlighted orange on timeline).
     *   Press `Delete` or `Backspace` or click 'Delete' button to remove the selected keyframe.
     *   Double-click a keyframe in the list or select it and press `Ctrl+E` (or click 'Edit Time') to modify its time.
-5.  **Import/Export:**
+    *   Press `Ctrl+Z` to undo and `Ctrl+Y` (or `Ctrl+Shift+Z`) to redo keyframe edits.
+    *   A new keyframe shows the slide after the one before it. Edit -> Slides -> Set Slide for Selected
+        Keyframe... points it at any slide, so a slide can be shown several times (e.g. an agenda slide).
+        Find Keyframes Showing Slide... jumps to each keyframe that shows a slide.
+5.  **Projects:** File -> Save Project / Open Project... stores the audio and slide references, keyframes,
+    view state and the audio analysis in one `.akfproj` file.
+6.  **Import/Export:**
     *   File -> Import Keyframes... `(Ctrl+I)` (Load audio first!).
-    *   File -> Export Keyframes as JSON... `(Ctrl+S)` (or 'Export JSON' button).
+    *   File -> Export Keyframes... `(Ctrl+S)` (or the 'Export...' button). Choose any of JSON, text summary,
+        CSV, SRT/WebVTT chapters and an ffmpeg concat list; files are only replaced once all are written.
 
 **Tips:**
 *   The first keyframe at 0.0s cannot be deleted.
 *   Keyframes determine when each corresponding slide *starts* appearing.
 *   The exported JSON contains the duration each slide is shown.
+*   Keyframes with timing problems (zero-length or very short segments, past the end of the audio,
+    no matching slide) are drawn violet on the timeline and marked with `!` in the list.
+*   Keyframe edits are autosaved continuously; after a crash the next start offers to restore them.
 '''
         messagebox.showinfo("Instructions", instructions, parent=self)
 
+    def show_slide_health(self):
+        '''Opens (or raises) the Slide Health Report window.'''
+        if not self.state.has_slides() or self.slide_handler.verifier is None:
+            messagebox.showinfo("Slide Health Report", "Load a slides folder first.", parent=self)
+            return
+        if self.slide_health_dialog is not None and self.slide_health_dialog.winfo_exists():
+            self.slide_health_dialog.lift()
+            return
+        verifier = self.slide_handler.verifier
+        self.slide_health_dialog = SlideHealthDialog(self, verifier.report,
+                                                     on_show_slide=self.keyframe_handler.select_next_use_of_slide,
+                                                     on_full_check=self._verify_slides_from_dialog)
+        self.slide_health_dialog.bind("<Destroy>", lambda e: setattr(self, 'slide_health_dialog', None)
+                                      if e.widget is self.slide_health_dialog else None)
+
+    def show_near_duplicates(self):
+        '''Lists the groups of near-duplicate slides found by the last hash pass.'''
+        title = "Near-Duplicate Slides"
+        if not self.state.has_slides():
+            messagebox.showinfo(title, "Load a slides folder first.", parent=self)
+            return
+        groups = self.slide_handler.near_duplicate_groups()
+        if groups is None:
+            messagebox.showinfo(title, "Slides are still being compared; try again in a moment.", parent=self)
+            return
+        if not groups:
+            messagebox.showinfo(title, f"No near-duplicates among the {len(self.state.slide_files)} slides.", parent=self)
+            return
+        shown = 15
+        lines = [", ".join(str(slide + 1) for slide in group) for group in groups[:shown]]
+        if len(groups) > shown: lines.append(f"... and {len(groups) - shown} more group(s)")
+        messagebox.showinfo(title, f"{len(groups)} group(s) of slides that look alike:\n\n" + "\n".join(lines) +
+                            "\n\nEdit -> Slides -> Merge Keyframes of Near-Duplicate Slides merges"
+                            " consecutive keyframes that show them.", parent=self)
+
+    def merge_similar_keyframes(self):
+        '''Confirms, then merges consecutive keyframes showing near-duplicate slides.'''
+        if not self.state.has_keyframes(): return
+        if self.slide_handler.near_duplicate_groups() is None:
+            messagebox.showinfo("Merge Keyframes", "Slides are still being compared; try again in a moment.", parent=self)
+            return
+        if not messagebox.askyesno("Merge Keyframes",
+                                   "Merge each run of consecutive keyframes whose slides look alike into one keyframe?\n\n"
+                                   "The run keeps its first time and shows its last slide (the complete build). "
+                                   "This can be undone.", parent=self):
+            return
+        self.keyframe_handler.merge_similar_slide_keyframes(self.slide_handler.slides_similar)
+
+    def _verify_slides_from_dialog(self):
+        if self.slide_handler.verify_slides(full=True) and self.slide_health_dialog is not None:
+            self.slide_health_dialog.show_report(self.slide_handler.verifier.report, running=True)
+
     def show_about(self):
         about_text = '''
 Audio Keyframe Editor v1.4 (Simple Timeline)
 
-Synchronize slideshow images (PNG) with audio narration.
+Synchronize slideshow images (PNG, JPEG, WebP) with audio narration.
 
 Features:
 - Simple timeline visualization with keyframe markers
@@ -16,18 +16,44 @@ def create_menu_bar(root, commands):
     file_menu = tk.Menu(menubar, tearoff=0)
     _add_command(file_menu, "Open Audio File...", 'open_audio', "Ctrl+O")
     _add_command(file_menu, "Select Slides Folder...", 'select_slides', "Ctrl+L")
+    _add_command(file_menu, "Rescan Slides Folder", 'rescan_slides', "F5")
+    file_menu.add_separator()
+    _add_command(file_menu, "Open Project...", 'open_project')
+    _add_command(file_menu, "Save Project", 'save_project')
+    _add_command(file_menu, "Save Project As...", 'save_project_as')
     file_menu.add_separator()
     _add_command(file_menu, "Import Keyframes...", 'import_keyframes', "Ctrl+I")
-    _add_command(file_menu, "Export Keyframes as JSON...", 'export_keyframes', "Ctrl+S")
+    _add_command(file_menu, "Export Keyframes...", 'export_keyframes', "Ctrl+S")
     file_menu.add_separator()
     _add_command(file_menu, "Exit", 'exit')
     menubar.add_cascade(label="File", menu=file_menu)
 
     # --- Edit menu ---
     edit_menu = tk.Menu(menubar, tearoff=0)
+    _add_command(edit_menu, "Undo", 'undo', "Ctrl+Z")
+    _add_command(edit_menu, "Redo", 'redo', "Ctrl+Y")
+    edit_menu.add_separator()
     _add_command(edit_menu, "Add Keyframe", 'add_keyframe', "K")
     _add_command(edit_menu, "Edit Selected Keyframe Time", 'edit_keyframe', "Ctrl+E")
     _add_command(edit_menu, "Delete Selected Keyframe", 'delete_keyframe', "Del/Bksp")
+    bulk_menu = tk.Menu(edit_menu, tearoff=0)
+    _add_command(bulk_menu, "Ripple Shift After Time...", 'ripple_shift')
+    _add_command(bulk_menu, "Scale Time Range...", 'scale_range')
+    _add_command(bulk_menu, "Delete Time Range...", 'delete_range')
+    _add_command(bulk_menu, "Quantize to Frame Rate...", 'quantize_keyframes')
+    edit_menu.add_cascade(label="Bulk Edit", menu=bulk_menu)
+    slides_menu = tk.Menu(edit_menu, tearoff=0)
+    _add_command(slides_menu, "Set Slide for Selected Keyframe...", 'set_keyframe_slide')
+    _add_command(slides_menu, "Find Keyframes Showing Slide...", 'find_slide')
+    _add_command(slides_menu, "Renumber Slides in Keyframe Order", 'renumber_slides')
+    slides_menu.add_separator()
+    _add_command(slides_menu, "Slide Health Report...", 'slide_health_report')
+    _add_command(slides_menu, "Decode All Slides to Check Them", 'verify_slides_full')
+    _add_command(slides_menu, "Near-Duplicate Slides...", 'near_duplicate_slides')
+    _add_command(slides_menu, "Merge Keyframes of Near-Duplicate Slides...", 'merge_similar_keyframes')
+    edit_menu.add_cascade(label="Slides", menu=slides_menu)
+    edit_menu.add_separator()
+    _add_command(edit_menu, "Toggle Snap to Audio Features", 'toggle_snap', "Ctrl+G")
     menubar.add_cascade(label="Edit", menu=edit_menu)
 
     # --- Navigate menu ---
@@ -44,6 +70,18 @@ def create_menu_bar(root, commands):
     _add_command(playback_menu, "Stop", 'stop_play')
     menubar.add_cascade(label="Playback", menu=playback_menu)
 
+    # --- Analysis menu ---
+    analysis_menu = tk.Menu(menubar, tearoff=0)
+    _add_command(analysis_menu, "Analyze Audio Features", 'analyze_audio')
+    _add_command(analysis_menu, "Add Keyframes at Sentence Starts", 'add_sentence_keyframes')
+    analysis_menu.add_separator()
+    _add_command(analysis_menu, "Detect Speaker Turns", 'detect_speaker_turns')
+    _add_command(analysis_menu, "Add Keyframes at Speaker Turns", 'add_speaker_keyframes')
+    analysis_menu.add_separator()
+    _add_command(analysis_menu, "Detect Sections (Novelty)", 'detect_sections')
+    _add_command(analysis_menu, "Seed Keyframes from Top-Level Sections", 'seed_section_keyframes')
+    menubar.add_cascade(label="Analysis", menu=analysis_menu)
+
     # --- Help menu ---
     help_menu = tk.Menu(menubar, tearoff=0)
     _add_command(help_menu, "Instructions", 'show_instructions')
@@ -0,0 +1,63 @@
+# START OF FILE ui/slide_health_dialog.py
+import tkinter as tk
+from tkinter import ttk
+from slides.verify import HEALTH_ERROR
+
+
+class SlideHealthDialog(tk.Toplevel):
+    '''Non-modal window listing the slides the verification pass found problems with.'''
+
+    COLUMNS = (('slide', "Slide", 50), ('file', "File", 160), ('status', "Status", 70),
+               ('size', "Size", 90), ('problem', "Problem", 380))
+
+    def __init__(self, parent, report, on_show_slide, on_full_check):
+        super().__init__(parent)
+        self.title("Slide Health Report")
+        self.transient(parent)
+        self.on_show_slide = on_show_slide # callback(slide index)
+        self.summary_var = tk.StringVar()
+
+        frame = ttk.Frame(self, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, textvariable=self.summary_var).pack(anchor=tk.W, pady=(0, 5))
+
+        table = ttk.Frame(frame)
+        table.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(table, columns=[key for key, _, _ in self.COLUMNS], show='headings', height=14)
+        for key, text, width in self.COLUMNS:
+            self.tree.heading(key, text=text)
+            self.tree.column(key, width=width, anchor=tk.W, stretch=(key == 'problem'))
+        self.tree.tag_configure('error', foreground="#B91C1C")
+        self.tree.tag_configure('warning', foreground="#B45309")
+        scrollbar = ttk.Scrollbar(table, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", self._on_double_click)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(buttons, text="Double-click a slide to find the keyframes showing it.").pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="Decode All Slides", command=on_full_check).pack(side=tk.RIGHT, padx=(0, 5))
+        self.bind("<Escape>", lambda e: self.destroy())
+
+        self.show_report(report)
+
+    def show_report(self, report, running=False):
+        '''Fills the table from a SlideHealthReport (None while the first check is still running).'''
+        self.tree.delete(*self.tree.get_children())
+        if report is None:
+            self.summary_var.set("Checking slides...")
+            return
+        self.summary_var.set(report.summary() + (" - checking again..." if running else ""))
+        for index, name, status, width, height, message in report.problems():
+            size = f"{width}x{height}" if width else "?"
+            self.tree.insert('', tk.END, iid=str(index), values=(index + 1, name, status, size, message),
+                             tags=('error' if status == HEALTH_ERROR else 'warning',))
+
+    def _on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item: self.on_show_slide(int(item))
+
+# END OF FILE ui/slide_health_dialog.py
@@ -5,7 +5,17 @@ import os
 from PIL import Image, ImageTk # Keep PIL import here for type hinting if needed
 
 class SlidesViewer(ttk.Frame):
-    '''UI component for displaying slides and selecting the folder.'''
+    '''UI component for displaying slides and selecting the folder.
+
+    Rendering is progressive: a slide that is not cached at the canvas size
+    is first shown as a quick stand-in, and the high-quality render replaces
+    it once input (resizing, stepping through slides) has been quiet for
+    REFINE_SETTLE_MS. Stand-ins that are superseded before then are never
+    refined.
+    '''
+
+    RESIZE_COALESCE_MS = 15 # Resize events closer together than this are shown once
+    REFINE_SETTLE_MS = 120 # Quiet time before the high-quality render of a stand-in starts
 
     def __init__(self, parent, app_state, commands, **kwargs):
         super().__init__(parent, **kwargs)
@@ -15,6 +25,10 @@ class SlidesViewer(ttk.Frame):
         self._update_slide_timer = None # Timer for debouncing slide updates
         self.slide_info_label = None # Initialize instance variable
         self.folder_entry = None # Initialize instance variable
+        self._image_item = None # The one canvas image item, re-pointed at each slide's photo
+        self._message_item = None # Canvas text item for load errors
+        self._refine_timer = None # Pending start of a high-quality render
+        self._refine_wanted = None # (index, width, height) shown as a stand-in, else None
 
         self.create_widgets()
 
@@ -96,14 +110,14 @@ class SlidesViewer(ttk.Frame):
              self._clear_canvas_and_info(index)
              return
 
-         # --- Request slide image from handler ---
-         img, photo = self.commands['get_slide_for_display'](index, canvas_width, canvas_height)
+         # --- Request slide image from handler: cached or quick stand-in first, full render if neither exists ---
+         img, photo, final = self.commands['get_slide_quick'](index, canvas_width, canvas_height)
+         if photo is None:
+             img, photo = self.commands['get_slide_for_display'](index, canvas_width, canvas_height)
+             final = True
+         self._schedule_refinement(None if final else (index, canvas_width, canvas_height))
 
          # --- Update Canvas ---
-         # Clear previous content MUST happen before potentially erroring on create_image
-         try: self.slides_canvas.delete("all")
-         except tk.TclError: return # Exit if widget destroyed
-
          if photo and img:
              # PhotoImage reference is kept in AppState by the handler
              # Calculate position to center the image
@@ -111,11 +125,13 @@ class SlidesViewer(ttk.Frame):
              y = max(0, (canvas_height - img.height) // 2)
 
              try:
-                  self.slides_canvas.create_image(x, y, anchor=tk.NW, image=photo)
+                  self._show_image(x, y, photo)
                   filename = os.path.basename(self.state.slide_files[index])
                   # Check the LABEL widget exists before setting the variable
                   if hasattr(self, 'slide_info_label') and self.slide_info_label.winfo_exists(): # <-- CORRECTED CHECK
-                      self.slide_info_var.set(f"Slide {index + 1} of {len(self.state.slide_files)}: {filename}")
+                      shown = self.state.slide_usage.count(index)
+                      repeat_info = f" (shown {shown}x)" if shown > 1 else ""
+                      self.slide_info_var.set(f"Slide {index + 1} of {len(self.state.slide_files)}: {filename}{repeat_info}")
              except tk.TclError as e:
                   print(f"Error displaying slide {index+1} on canvas: {e}")
                   # Check the LABEL widget exists before setting the variable
@@ -124,12 +140,11 @@ class SlidesViewer(ttk.Frame):
          else:
              # Display error message on canvas if loading failed
              error_text = f"Error loading slide {index+1}"
+             problem = self.commands['slide_problem'](index) if 'slide_problem' in self.commands else ""
+             if problem: error_text += f"\n{problem}"
              try:
                  if self.slides_canvas.winfo_exists(): # Check again before drawing text
-                      self.slides_canvas.create_text(
-                           canvas_width // 2, canvas_height // 2,
-                           text=error_text, fill="red", font=("Arial", 12), anchor=tk.CENTER
-                      )
+                      self._show_message(canvas_width // 2, canvas_height // 2, error_text)
                       # Check the LABEL widget exists before setting the variable
                       if hasattr(self, 'slide_info_label') and self.slide_info_label.winfo_exists(): # <-- CORRECTED CHECK
                           self.slide_info_var.set(f"Slide {index + 1} (Load Error)")
@@ -138,11 +153,32 @@ class SlidesViewer(ttk.Frame):
              # Ensure photo ref is cleared if load failed (handler should do this too)
              self.state.loaded_slide_photo = None
 
+    def _show_image(self, x, y, photo):
+        '''Points the canvas image item at photo (created once, then only reconfigured).'''
+        canvas = self.slides_canvas
+        if self._image_item is None:
+            self._image_item = canvas.create_image(x, y, anchor=tk.NW, image=photo)
+        else:
+            canvas.itemconfigure(self._image_item, image=photo, state=tk.NORMAL)
+            canvas.coords(self._image_item, x, y)
+        if self._message_item is not None: canvas.itemconfigure(self._message_item, state=tk.HIDDEN)
+
+    def _show_message(self, x, y, text):
+        canvas = self.slides_canvas
+        if self._message_item is None:
+            self._message_item = canvas.create_text(x, y, text=text, fill="red", font=("Arial", 12), anchor=tk.CENTER)
+        else:
+            canvas.itemconfigure(self._message_item, text=text, state=tk.NORMAL)
+            canvas.coords(self._message_item, x, y)
+        if self._image_item is not None: canvas.itemconfigure(self._image_item, state=tk.HIDDEN, image="")
+
     def _clear_canvas_and_info(self, index):
         '''Clears the canvas and updates info label for invalid states.'''
         try:
              if hasattr(self, 'slides_canvas') and self.slides_canvas.winfo_exists():
-                 self.slides_canvas.delete("all")
+                 for item in (self._image_item, self._message_item):
+                     if item is not None: self.slides_canvas.itemconfigure(item, state=tk.HIDDEN)
+                 if self._image_item is not None: self.slides_canvas.itemconfigure(self._image_item, image="")
              info_text = "No slides loaded"
              if self.state.has_slides(): # If slides exist but index is bad
                  info_text = f"Slide {index+1} / {len(self.state.slide_files)} (Invalid Index)"
@@ -156,14 +192,39 @@ class SlidesViewer(ttk.Frame):
         self.state.loaded_slide_photo = None # Clear cached photo reference
 
 
+    def _schedule_refinement(self, wanted):
+        '''(Re)starts the settle timer for the stand-in on screen; None cancels a pending refinement.'''
+        if self._refine_timer:
+            try: self.after_cancel(self._refine_timer)
+            except ValueError: pass
+            self._refine_timer = None
+        self._refine_wanted = wanted
+        if wanted and self.winfo_exists():
+            self._refine_timer = self.after(self.REFINE_SETTLE_MS, self._start_refinement)
+
+    def _start_refinement(self):
+        self._refine_timer = None
+        if self._refine_wanted: self.commands['refine_slide'](*self._refine_wanted)
+
+    def on_slide_refined(self, key):
+        '''A high-quality render landed in the cache: swap it in if it is for the stand-in still shown.'''
+        wanted = self._refine_wanted
+        if not wanted or not self.winfo_exists(): return
+        index, width, height = wanted
+        if (0 <= index < len(self.state.slide_files) and key[0] == self.state.slide_files[index]
+                and key[2:] == (width, height)):
+            self.display_slide(index) # Now a cache hit
+        elif not self._refine_timer:
+            self._start_refinement() # Settled while the refiner was busy with a superseded render
+
     def _on_canvas_resize(self, event):
-        '''Called when the canvas size changes, schedules redraw with debounce.'''
+        '''Called when the canvas size changes; shows a quick stand-in at the new size (refined once resizing stops).'''
         if hasattr(self, '_resize_timer') and self._resize_timer:
             try: self.after_cancel(self._resize_timer)
             except ValueError: pass
-        # Schedule the redisplay after a short delay
+        # Coalesce bursts of resize events
         if self.winfo_exists(): # Check before scheduling
-             self._resize_timer = self.after(150, self._perform_redisplay) # Adjust delay ms
+             self._resize_timer = self.after(self.RESIZE_COALESCE_MS, self._perform_redisplay)
 
     def _perform_redisplay(self):
          '''Actually redraws the slide after the resize debounce timer.'''
@@ -1,6 +1,7 @@
 # START OF FILE ui/timeline_canvas.py
 import tkinter as tk
 from tkinter import ttk
+import numpy as np
 # Ensure utils is importable
 try:
     from utils import format_time
@@ -18,23 +19,50 @@ class TimelineCanvas(ttk.Frame):
     POS_MARKER_COLOR = "#34D399" # Emerald green
     KF_MARKER_COLOR = "#FF4136" # Red
     KF_SELECTED_COLOR = "#FF8C00" # Orange
+    KF_LINT_COLOR = "#7C3AED" # Violet: keyframe has timing lint findings
     KF_MARKER_HEIGHT = 15 # Height of keyframe lines
     POS_MARKER_HEIGHT = 25 # Height of position marker
     CLICK_PADDING = 5 # Pixels padding for click calculation
 
+    # Analysis overlays: candidate ticks along the top of the track, segment lanes below it
+    LANES = ('audio_classes', 'speaker', 'section') # Segment lanes, top to bottom
+    LANE_HEIGHT = 8
+    LANE_GAP = 2
+    CANDIDATE_MAX_HEIGHT = 8
+    CANDIDATE_COLORS = {'speaker': "#7C3AED", 'section': "#059669", 'sentence': "#D97706"}
+    DEFAULT_CANDIDATE_COLOR = "#3B82F6"
+    CLASS_COLORS = ("#D4D4D4", "#60A5FA", "#F472B6") # Indexed by analysis.audio_classes label: silence, speech, music
+    SEGMENT_COLORS = ("#60A5FA", "#F472B6", "#FBBF24", "#34D399", "#A78BFA", "#F87171", "#2DD4BF", "#A3A3A3")
+
+    # Filmstrip lane below the segment lanes: a slide thumbnail per keyframe segment wide enough to hold one
+    FILMSTRIP_HEIGHT = 34
+    THUMB_BOX = (54, 30) # Thumbnail fit box (16:9)
+    TILE_COLORS = ("#F3F4F6", "#E5E7EB") # Alternating tile backgrounds
+    DENSE_COLOR = "#9CA3AF" # Runs of segments too narrow for a thumbnail
+    PREVIEW_BOX = (256, 144) # Hover preview fit box
+    THUMB_REFRESH_MS = 40 # Batches redraws while background thumbnails arrive
+
     def __init__(self, parent, app_state, commands, **kwargs):
         super().__init__(parent, **kwargs)
         self.state = app_state
         self.commands = commands # Expect 'seek' command
 
         self._canvas_width = 1 # Initialize width
+        self._analysis_drawn_width = None # Width the analysis overlays were last drawn at
+        self._filmstrip_tiles = [] # Pooled (frame, image, label) canvas items, one per drawn tile
+        self._filmstrip_marker = None # State the filmstrip was last drawn for
+        self._filmstrip_timer = None # Pending refresh after thumbnails arrived
+        self._preview = None # Hover preview Toplevel (created on first hover)
+        self._preview_slide = None # Slide shown in the preview while hovering, else None
+        self._preview_anchor = None # (x, time) the preview was shown for
         # Ratios removed, calculated on the fly
 
         self.create_widgets()
         # Binding moved to main_window after event_handler is initialized
 
     def create_widgets(self):
-        self.canvas = tk.Canvas(self, height=self.TIMELINE_HEIGHT, bg=self.TIMELINE_BG,
+        canvas_height = self._filmstrip_top() + self.FILMSTRIP_HEIGHT + self.LANE_GAP
+        self.canvas = tk.Canvas(self, height=canvas_height, bg=self.TIMELINE_BG,
                                 highlightthickness=1, highlightbackground="#AAAAAA")
         self.canvas.pack(fill=tk.X, expand=True, padx=5, pady=5)
 
@@ -45,6 +73,9 @@ class TimelineCanvas(ttk.Frame):
 
     # Binding events is now handled in the main window's event handler setup
 
+    def _filmstrip_top(self):
+        return self.TIMELINE_HEIGHT + len(self.LANES) * (self.LANE_HEIGHT + self.LANE_GAP)
+
     def _time_to_pixel(self, time_sec):
         '''Convert time in seconds to horizontal pixel coordinate.'''
         # Ensure canvas width is current before calculation
@@ -58,6 +89,15 @@ class TimelineCanvas(ttk.Frame):
         # Clamp result within the padded area
         return int(max(self.CLICK_PADDING, min(pixel_pos, self._canvas_width - self.CLICK_PADDING)))
 
+    def _times_to_pixels(self, times):
+        '''Vectorized _time_to_pixel for an array of times (returns an int array).'''
+        times = np.asarray(times, dtype=np.float64)
+        if self.state.audio_duration <= 0 or self._canvas_width <= (2 * self.CLICK_PADDING):
+            return np.full(len(times), self.CLICK_PADDING, dtype=np.int64)
+        drawable_width = self._canvas_width - (2 * self.CLICK_PADDING)
+        pixels = self.CLICK_PADDING + (times / self.state.audio_duration) * drawable_width
+        return np.clip(pixels, self.CLICK_PADDING, self._canvas_width - self.CLICK_PADDING).astype(np.int64)
+
     def _pixel_to_time(self, pixel_x):
         '''Convert horizontal pixel coordinate to time in seconds.'''
         self._canvas_width = self.canvas.winfo_width() # Update width
@@ -136,11 +176,11 @@ class TimelineCanvas(ttk.Frame):
             for i in range(max(num_needed, num_existing)):
                 line_id = self._keyframe_lines[i]
                 if i < num_needed:
-                    kf = self.state.keyframes[i]
-                    x_pos = self._time_to_pixel(kf['time'])
+                    x_pos = self._time_to_pixel(self.state.keyframes.time_at(i))
                     is_selected = (i == self.state.selected_keyframe_index)
-                    color = self.KF_SELECTED_COLOR if is_selected else self.KF_MARKER_COLOR
-                    width = 2 if is_selected else 1
+                    has_lint = self.state.lint.flags_at(i) != 0
+                    color = self.KF_SELECTED_COLOR if is_selected else (self.KF_LINT_COLOR if has_lint else self.KF_MARKER_COLOR)
+                    width = 2 if is_selected or has_lint else 1
 
                     self.canvas.coords(line_id, x_pos, kf_y1, x_pos, kf_y2)
                     self.canvas.itemconfig(line_id, fill=color, width=width, state=tk.NORMAL)
@@ -154,7 +194,14 @@ class TimelineCanvas(ttk.Frame):
         except tk.TclError: return
         except Exception as e: print(f"Error drawing keyframes: {e}")
 
-        # 3. Draw Position Marker
+        # 3. Analysis overlays only depend on width (content changes call update_analysis_lanes)
+        if self._analysis_drawn_width != self._canvas_width:
+            self.update_analysis_lanes()
+
+        # 4. Filmstrip (skips itself unless keyframes, slides, selection or width changed)
+        self.update_filmstrip()
+
+        # 5. Draw Position Marker
         try:
             self.update_position_marker()
         except tk.TclError: return
@@ -178,6 +225,178 @@ class TimelineCanvas(ttk.Frame):
         except tk.TclError: pass # Ignore if closing
         except Exception as e: print(f"Error updating position marker: {e}")
 
+    def update_analysis_lanes(self):
+        '''Redraw keyframe candidate ticks and analysis segment lanes from state.'''
+        try:
+            if not self.winfo_exists(): return
+            self._canvas_width = self.canvas.winfo_width()
+            if self._canvas_width <= 1: return
+            self.canvas.delete('analysis')
+            if self.state.has_audio():
+                self._draw_candidates()
+                self._draw_segment_lane('audio_classes', self.state.analysis.get('audio_classes'), self.CLASS_COLORS)
+                self._draw_segment_lane('speaker', self.state.analysis.get('speaker_turns'))
+                self._draw_segment_lane('section', self.state.analysis.get('sections'))
+            self.canvas.tag_raise(self.pos_marker_line)
+            self._analysis_drawn_width = self._canvas_width
+        except tk.TclError: pass
+        except Exception as e: print(f"Error drawing analysis lanes: {e}")
+
+    def _draw_candidates(self):
+        '''Candidate ticks at the top of the track; one tick per pixel column (height = best score).'''
+        drawable = max(1, self._canvas_width)
+        for source, candidates in self.state.keyframe_candidates.items():
+            if len(candidates['times']) == 0: continue
+            pixels = self._times_to_pixels(candidates['times'])
+            best = np.zeros(drawable + 1)
+            np.maximum.at(best, np.clip(pixels, 0, drawable), np.clip(candidates['scores'], 0.05, 1.0))
+            color = self.CANDIDATE_COLORS.get(source, self.DEFAULT_CANDIDATE_COLOR)
+            for x in np.flatnonzero(best):
+                height = max(3, int(best[x] * self.CANDIDATE_MAX_HEIGHT))
+                self.canvas.create_line(int(x), 1, int(x), 1 + height, fill=color, width=1, tags=('analysis',))
+
+    def _draw_segment_lane(self, lane, segments, colors=None):
+        '''Draws labelled (start, end) segments as colored runs in the given lane.'''
+        colors = colors or self.SEGMENT_COLORS
+        if not segments or len(segments['starts']) == 0: return
+        y0 = self.TIMELINE_HEIGHT + self.LANES.index(lane) * (self.LANE_HEIGHT + self.LANE_GAP)
+        x0s = self._times_to_pixels(segments['starts'])
+        x1s = self._times_to_pixels(segments['ends'])
+        for x0, x1, label in zip(x0s, x1s, segments['labels']):
+            if x1 <= x0: continue # Sub-pixel segment
+            color = colors[int(label) % len(colors)]
+            self.canvas.create_rectangle(int(x0), y0, int(x1), y0 + self.LANE_HEIGHT,
+                                         fill=color, outline="", tags=('analysis',))
+
+    def update_filmstrip(self, force=False):
+        '''Draws slide thumbnails in the keyframe segments wide enough to show one.
+
+        Only those segments get canvas items (a pooled frame, image and label
+        per tile, so 2,000 keyframes on a 1,000 px timeline need a few dozen
+        items); each run of narrower segments becomes one bar. Thumbnails come
+        from the slide handler's shared cache. Missing ones show the slide
+        number until on_thumbnail_ready redraws them.
+        '''
+        try:
+            if not self.winfo_exists(): return
+            self._canvas_width = self.canvas.winfo_width()
+            if self._canvas_width <= 1: return
+            state = self.state
+            marker = (state.keyframes.version, state.selected_keyframe_index, self._canvas_width,
+                      state.slides_directory, len(state.slide_files), state.audio_duration)
+            if marker == self._filmstrip_marker and not force: return
+            self._filmstrip_marker = marker
+            self.canvas.delete('filmstrip_dense')
+            used = self._draw_filmstrip() if state.has_audio() and state.has_slides() and state.keyframes else 0
+            for tile in self._filmstrip_tiles[used:]:
+                for item in tile: self.canvas.itemconfigure(item, state=tk.HIDDEN)
+        except tk.TclError: pass
+        except Exception as e: print(f"Error drawing filmstrip: {e}")
+
+    def _draw_filmstrip(self):
+        '''Lays out the tiles; returns how many pooled tiles are in use.'''
+        canvas = self.canvas
+        y0 = self._filmstrip_top()
+        y1 = y0 + self.FILMSTRIP_HEIGHT
+        box_w, box_h = self.THUMB_BOX
+        starts = self._times_to_pixels(self.state.keyframes.times_seconds())
+        starts[0] = self.CLICK_PADDING # The first keyframe's slide also shows before it
+        ends = np.append(starts[1:], self._canvas_width - self.CLICK_PADDING)
+        wide = (ends - starts) >= box_w + 4
+
+        # Runs of narrow segments: one bar per run
+        edges = np.diff(np.concatenate(([0], (~wide).astype(np.int8), [0])))
+        for first, last in zip(np.flatnonzero(edges == 1).tolist(), (np.flatnonzero(edges == -1) - 1).tolist()):
+            if ends[last] > starts[first]:
+                canvas.create_rectangle(int(starts[first]), y0 + box_h // 3, int(ends[last]), y1 - box_h // 3,
+                                        fill=self.DENSE_COLOR, outline="", tags=('filmstrip_dense',))
+
+        slides = self.state.keyframes.slides()
+        get_thumbnail = self.commands.get('get_slide_thumbnail')
+        selected = self.state.selected_keyframe_index
+        wide_indices = np.flatnonzero(wide).tolist()
+        for n, i in enumerate(wide_indices):
+            if n == len(self._filmstrip_tiles):
+                self._filmstrip_tiles.append((
+                    canvas.create_rectangle(0, 0, 0, 0, width=2, state=tk.HIDDEN),
+                    canvas.create_image(0, 0, anchor=tk.NW, state=tk.HIDDEN),
+                    canvas.create_text(0, 0, fill=self.LINE_COLOR, font=("Arial", 8), state=tk.HIDDEN)))
+            frame, image, label = self._filmstrip_tiles[n]
+            x0, x1, slide = int(starts[i]), int(ends[i]), int(slides[i])
+            canvas.coords(frame, x0 + 1, y0 + 1, x1 - 1, y1 - 1)
+            canvas.itemconfigure(frame, fill=self.TILE_COLORS[i % 2], state=tk.NORMAL,
+                                 outline=self.KF_SELECTED_COLOR if i == selected else "")
+            photo = get_thumbnail(slide, box_w, box_h) if get_thumbnail else None
+            if photo:
+                canvas.coords(image, x0 + 3, y0 + 2)
+                canvas.itemconfigure(image, image=photo, state=tk.NORMAL)
+                canvas.itemconfigure(label, state=tk.HIDDEN)
+            else: # Placeholder until the thumbnail is rendered
+                canvas.itemconfigure(image, image="", state=tk.HIDDEN)
+                canvas.coords(label, x0 + 3 + box_w // 2, y0 + self.FILMSTRIP_HEIGHT // 2)
+                canvas.itemconfigure(label, text=str(slide + 1), state=tk.NORMAL)
+        return len(wide_indices)
+
+    def on_thumbnail_ready(self, key=None):
+        '''A background thumbnail landed in the cache: redraw the filmstrip/preview once per batch.'''
+        if self._filmstrip_timer or not self.winfo_exists(): return
+        self._filmstrip_timer = self.after(self.THUMB_REFRESH_MS, self._refresh_thumbnails)
+
+    def _refresh_thumbnails(self):
+        self._filmstrip_timer = None
+        if not self.winfo_exists(): return
+        self.update_filmstrip(force=True)
+        if self._preview_slide is not None: self._show_preview(self._preview_slide, *self._preview_anchor)
+
+    # --- Hover preview ---
+    def _on_hover(self, event):
+        '''Shows a preview of the slide under the pointer while it is over the filmstrip lane.'''
+        y0 = self._filmstrip_top()
+        keyframes = self.state.keyframes
+        if not (self.state.has_audio() and self.state.has_slides() and keyframes) or not (y0 <= event.y < y0 + self.FILMSTRIP_HEIGHT):
+            self._on_leave()
+            return
+        try:
+            time_sec = self._pixel_to_time(event.x)
+            slide = keyframes.slide_at(max(0, keyframes.index_at_or_before(time_sec))) # Same rule as playback
+            self._show_preview(slide, event.x, time_sec)
+        except tk.TclError: pass
+
+    def _on_leave(self, event=None):
+        self._preview_slide = None
+        if self._preview is not None:
+            try: self._preview.withdraw()
+            except tk.TclError: pass
+
+    def _show_preview(self, slide, x, time_sec):
+        if self._preview is None:
+            self._preview = tk.Toplevel(self)
+            self._preview.wm_overrideredirect(True)
+            self._preview.withdraw()
+            self._preview_image = tk.Label(self._preview, bg="#333333", bd=0)
+            self._preview_image.pack()
+            self._preview_text = ttk.Label(self._preview, anchor=tk.CENTER)
+            self._preview_text.pack(fill=tk.X)
+        self._preview_slide = slide
+        self._preview_anchor = (x, time_sec)
+        box_w, box_h = self.PREVIEW_BOX
+        missing = "" if slide < len(self.state.slide_files) else " (not loaded)"
+        get_thumbnail = self.commands.get('get_slide_thumbnail')
+        photo = get_thumbnail(slide, box_w, box_h) if get_thumbnail else None
+        if photo: self._preview_image.configure(image=photo, text="", width=0, height=0)
+        else: self._preview_image.configure(image="", text="Loading..." if not missing else "", fg="#DDDDDD",
+                                            width=box_w // 8, height=box_h // 18)
+        self._preview_image.image = photo # Keep a reference while shown
+        self._preview_text.configure(text=f"Slide {slide + 1}{missing}  @ {format_time(time_sec)}")
+        self._preview.update_idletasks()
+        width, height = self._preview.winfo_reqwidth(), self._preview.winfo_reqheight()
+        left = self.canvas.winfo_rootx() + int(x) - width // 2
+        top = self.canvas.winfo_rooty() - height - 6 # Above the timeline
+        if top < 0: top = self.canvas.winfo_rooty() + self.canvas.winfo_height() + 6
+        self._preview.geometry(f"+{max(0, left)}+{top}")
+        self._preview.deiconify()
+        self._preview.lift()
+
     def update_keyframe_markers(self):
         '''Update only the keyframe markers (color, position).'''
         # Currently redraws everything for simplicity, could be optimized
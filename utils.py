@@ -1,3 +1,4 @@
+import os
 import re
 import numpy as np
 
@@ -7,6 +8,9 @@ WAVEFORM_UPDATE_INTERVAL_MS = 50 # More frequent updates for smoother playback m
 RESIZE_DEBOUNCE_MS = 250
 DEFAULT_SAMPLE_RATE_TARGET = 22050 # Lower SR for faster loading/plotting if needed
 MAX_WAVEFORM_SAMPLES = 500000 # Limit samples for waveform display performance
+FINGERPRINT_FILE_SUFFIX = '.audiofp.json' # Sidecar written next to exported keyframe JSON
+AUTOSAVE_DIR = os.path.join(os.path.expanduser("~"), ".audio_keyframe_editor", "autosave") # Crash-recovery journal
+SLIDE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".audio_keyframe_editor", "slide_cache") # Pre-scaled slide renditions
 
 # --- Utility Functions ---
 
@@ -30,6 +34,7 @@ def clamp(value, min_value, max_value):
 
 def find_nearest_keyframe_index(keyframes, time_seconds, tolerance=0.05):
     '''Finds the index of the nearest keyframe within a tolerance.'''
+    if hasattr(keyframes, 'nearest'): return keyframes.nearest(time_seconds, tolerance) # KeyframeStore: binary search
     min_dist = float('inf')
     nearest_index = -1
     for i, kf in enumerate(keyframes):